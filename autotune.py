@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/autotune.py
+# 按目标质量自动选择 CRF/预设：从输入中截取几个样本片段，并行试编码候选参数，
+# 用 FFmpeg 内置的 SSIM/PSNR 滤镜与样本比较，选出达到目标质量的最快设置（不依赖 PySide6）
+
+import os
+import re
+import time
+import shutil
+import tempfile
+
+from commands import video_encode_args
+from probe_cache import probe_media
+from runner import Runner, STATUS_FINISHED
+
+# 支持 -preset 和 -crf 的编码器
+TUNABLE_CODECS = ("libx264", "libx265")
+DEFAULT_PRESETS = ("veryfast", "faster", "medium", "slow")
+DEFAULT_CRFS = (18, 21, 24, 27, 30)
+DEFAULT_SAMPLE_COUNT = 3
+DEFAULT_SAMPLE_SECONDS = 3.0
+# 质量指标 -> 默认目标值
+METRICS = {"ssim": 0.98, "psnr": 40.0}
+# 达标的候选中，文件大小不超过最小者这一比例的视为“同样大小”，在其中选最快的
+DEFAULT_SIZE_TOLERANCE = 0.10
+
+_SSIM_RE = re.compile(r"SSIM .*All:([\d.]+)")
+_PSNR_RE = re.compile(r"PSNR .*average:([\d.]+|inf)")
+_SCORE_FILTER = "[0:v]split[a0][a1];[1:v]split[b0][b1];[a0][b0]ssim;[a1][b1]psnr"
+
+
+class AutoTuneError(Exception):
+    """无法自动调优（编码器不支持、无法读取时长或样本编码失败）"""
+
+
+def sample_windows(duration, count=DEFAULT_SAMPLE_COUNT, seconds=DEFAULT_SAMPLE_SECONDS):
+    """在 [0, duration) 中均匀选取 count 个样本片段，返回 [(开始, 时长)]
+
+    视频短于全部样本的总时长时只取从开头开始的一个片段。
+    """
+    if duration <= seconds * count:
+        return [(0.0, min(duration, seconds * count))]
+    windows = []
+    for i in range(count):
+        center = duration * (i + 1) / (count + 1)
+        start = min(max(0.0, center - seconds / 2), duration - seconds)
+        windows.append((round(start, 3), seconds))
+    return windows
+
+
+def parse_scores(lines):
+    """从 ssim/psnr 滤镜的日志中读取 (SSIM All, PSNR average)，缺少时为 None"""
+    ssim = psnr = None
+    for line in lines:
+        match = _SSIM_RE.search(line)
+        if match:
+            ssim = float(match.group(1))
+        match = _PSNR_RE.search(line)
+        if match:
+            psnr = float(match.group(1))  # 完全相同时为 inf
+    return ssim, psnr
+
+
+def _reference_command(input_file, start, seconds, options, output):
+    """截取样本片段并无损编码，缩放/帧率与正式编码一致，候选编码与其逐帧比较"""
+    command = ["ffmpeg", "-ss", f"{start:.3f}", "-i", input_file, "-t", f"{seconds:.3f}",
+               "-map", "0:v:0", "-an", "-sn", "-dn"]
+    if options.get("resolution"):
+        command.extend(["-vf", f"scale={options['resolution']}"])
+    if options.get("fps"):
+        command.extend(["-r", options["fps"]])
+    command.extend(["-c:v", "libx264", "-qp", "0", "-preset", "ultrafast", "-y", output])
+    return command
+
+
+def choose_candidate(candidates, metric, target, size_tolerance=DEFAULT_SIZE_TOLERANCE):
+    """从候选结果中选择参数，返回 (候选, 是否达到目标)
+
+    每个预设取达标的最大 CRF（文件最小），文件大小在最小者 size_tolerance 以内的预设中选 CPU 时间最少的；
+    全部不达标时返回质量最高的候选。
+    """
+    scored = [c for c in candidates if c[metric] is not None]
+    if not scored:
+        return None, False
+    passing = [c for c in scored if c[metric] >= target]
+    if not passing:
+        return max(scored, key=lambda c: (c[metric], -c["cost"])), False
+    best_per_preset = {}
+    for candidate in passing:
+        current = best_per_preset.get(candidate["preset"])
+        if current is None or candidate["crf"] > current["crf"]:
+            best_per_preset[candidate["preset"]] = candidate
+    smallest = min(c["kbps"] for c in best_per_preset.values())
+    similar = [c for c in best_per_preset.values() if c["kbps"] <= smallest * (1 + size_tolerance)]
+    return min(similar, key=lambda c: (c["cost"], c["kbps"])), True
+
+
+def autotune(ffmpeg_path, ffprobe_path, input_file, options, metric="ssim", target=None,
+             duration=0.0, presets=DEFAULT_PRESETS, crfs=DEFAULT_CRFS, sample_count=DEFAULT_SAMPLE_COUNT,
+             sample_seconds=DEFAULT_SAMPLE_SECONDS, max_workers=0, size_tolerance=DEFAULT_SIZE_TOLERANCE):
+    """对 options 中的编码器试编码 presets × crfs 组合，返回调优结果（在后台线程中调用）
+
+    返回 {"crf", "preset", "met", "metric", "target", "samples", "candidates", "elapsed"}；
+    candidates 中每项为 {"preset", "crf", "ssim", "psnr", "kbps", "cost"}，质量取各样本中最差的一个，
+    cost 为各样本编码的 CPU 时间之和（平台不支持时为耗时）。duration 未知时通过 FFprobe 读取。
+    """
+    codec = options.get("video_codec", "libx264")
+    if codec not in TUNABLE_CODECS:
+        raise AutoTuneError(f"编码器 {codec} 不支持自动调优 (支持: {', '.join(TUNABLE_CODECS)})")
+    if metric not in METRICS:
+        raise AutoTuneError(f"不支持的质量指标: {metric}")
+    if target is None:
+        target = METRICS[metric]
+    if not duration:
+        probe_data = probe_media(input_file, ffprobe_path)
+        try:
+            duration = float(probe_data["format"]["duration"])
+        except (KeyError, TypeError, ValueError):
+            raise AutoTuneError("无法获取视频时长 (需要 FFprobe)")
+
+    started = time.time()
+    windows = sample_windows(duration, sample_count, sample_seconds)
+    work_dir = tempfile.mkdtemp(prefix="skydreambox_autotune_")
+    runner = Runner(ffmpeg_path, max_workers=max_workers)
+    try:
+        references = [os.path.join(work_dir, f"ref{i}.mkv") for i in range(len(windows))]
+        results = runner.run([_reference_command(input_file, start, seconds, options, ref)
+                              for (start, seconds), ref in zip(windows, references)])
+        for result in results:
+            if result.status != STATUS_FINISHED:
+                raise AutoTuneError("截取样本片段失败: " + " ".join(list(result.log_tail)[-3:]))
+
+        grid = [(preset, crf) for preset in presets for crf in crfs]
+        jobs = []  # (候选序号, 样本序号, 输出文件)
+        commands = []
+        for index, (preset, crf) in enumerate(grid):
+            encode_args = video_encode_args({"video_codec": codec, "crf": str(crf), "preset": preset})
+            for sample, ref in enumerate(references):
+                output = os.path.join(work_dir, f"c{index}_{sample}.mkv")
+                jobs.append((index, sample, output))
+                commands.append(["ffmpeg", "-i", ref] + encode_args + ["-an", "-y", output])
+        encodes = runner.run(commands)
+        scores = runner.run([["ffmpeg", "-i", output, "-i", references[sample], "-lavfi", _SCORE_FILTER,
+                              "-f", "null", "-"] for _, sample, output in jobs])
+
+        candidates = []
+        for index, (preset, crf) in enumerate(grid):
+            ssim_values, psnr_values, cost, size, failed = [], [], 0.0, 0, False
+            for (job_index, _, output), encode, score in zip(jobs, encodes, scores):
+                if job_index != index:
+                    continue
+                if encode.status != STATUS_FINISHED or score.status != STATUS_FINISHED:
+                    failed = True
+                    break
+                ssim, psnr = parse_scores(score.log_tail)
+                ssim_values.append(ssim)
+                psnr_values.append(psnr)
+                cost += encode.cpu_time if encode.cpu_time is not None else encode.elapsed
+                size += os.path.getsize(output)
+            if failed or None in ssim_values or None in psnr_values:
+                continue
+            sampled_seconds = sum(seconds for _, seconds in windows)
+            candidates.append({
+                "preset": preset,
+                "crf": crf,
+                "ssim": min(ssim_values),
+                "psnr": min(psnr_values),
+                "kbps": round(size * 8 / sampled_seconds / 1000, 1),
+                "cost": round(cost, 3),
+            })
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    choice, met = choose_candidate(candidates, metric, target, size_tolerance)
+    if choice is None:
+        raise AutoTuneError("全部候选参数的试编码均失败")
+    return {
+        "crf": str(choice["crf"]),
+        "preset": choice["preset"],
+        "met": met,
+        "metric": metric,
+        "target": target,
+        "samples": windows,
+        "candidates": candidates,
+        "elapsed": round(time.time() - started, 1),
+    }
+
+
+def format_result(result):
+    """将调优结果格式化为文本表格，选中的一行以 * 标记"""
+    metric = result["metric"]
+    lines = [f"{'':2}{'预设':<10}{'CRF':>4}{'SSIM':>9}{'PSNR':>8}{'码率kbps':>11}{'CPU秒':>8}"]
+    for c in result["candidates"]:
+        mark = "*" if (c["preset"], str(c["crf"])) == (result["preset"], result["crf"]) else " "
+        flag = "" if c[metric] >= result["target"] else "  (未达标)"
+        lines.append(f"{mark:2}{c['preset']:<10}{c['crf']:>4}{c['ssim']:>9.4f}{c['psnr']:>8.2f}"
+                     f"{c['kbps']:>11.1f}{c['cost']:>8.2f}{flag}")
+    return "\n".join(lines)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/background.py
+# 在线程池中执行耗时操作，并在GUI线程中回调结果
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+
+class _TaskSignals(QObject):
+    """在GUI线程中创建，工作线程发出的信号会排队到GUI线程处理"""
+    finished = Signal(object)
+    failed = Signal(object)
+
+    def __init__(self, on_finished, on_failed):
+        super().__init__()
+        self._on_finished = on_finished
+        self._on_failed = on_failed
+        self.finished.connect(self._handle_finished)
+        self.failed.connect(self._handle_failed)
+
+    @Slot(object)
+    def _handle_finished(self, result):
+        _active_tasks.discard(self)
+        if self._on_finished:
+            self._on_finished(result)
+
+    @Slot(object)
+    def _handle_failed(self, error):
+        _active_tasks.discard(self)
+        if self._on_failed:
+            self._on_failed(error)
+
+
+class _Task(QRunnable):
+    def __init__(self, fn, args, kwargs, signals):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = signals
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.failed.emit(e)
+        else:
+            self.signals.finished.emit(result)
+
+
+# 保持对信号对象的引用，直到回调完成
+_active_tasks = set()
+
+
+def run_in_background(fn, *args, on_finished=None, on_failed=None, **kwargs):
+    """在全局线程池中执行 fn(*args, **kwargs)，完成后在GUI线程调用 on_finished(结果)
+
+    出现异常时调用 on_failed(异常)。
+    """
+    signals = _TaskSignals(on_finished, on_failed)
+    _active_tasks.add(signals)
+    QThreadPool.globalInstance().start(_Task(fn, args, kwargs, signals))
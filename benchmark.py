@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/benchmark.py
+# 基准测试：用 lavfi 生成固定的测试素材，按各选项卡的命令构建函数执行每种操作，
+# 记录耗时、速度、帧率、CPU时间和峰值内存，并与保存的基线比较
+
+import os
+import json
+import sys
+import time
+import shutil
+import platform
+import statistics
+import subprocess
+import threading
+
+from commands import (build_video_command, build_audio_command, build_mux_command, build_demux_command,
+                      build_img_audio_command, batch_output_path, demux_output_path)
+from trim import build_fast_trim_command
+from runner import Runner, STATUS_FINISHED
+from capabilities import check_binary
+from utils import AUDIO_FORMATS, AUDIO_FORMAT_CODECS
+
+RESULTS_VERSION = 1
+
+# 测试素材: 名称 -> (分辨率, 时长秒, 快速模式时长秒)
+VIDEO_MEDIA = {
+    "360p": ("640x360", 20, 5),
+    "720p": ("1280x720", 20, 5),
+    "1080p": ("1920x1080", 10, 3),
+}
+AUDIO_MEDIA_SECONDS = (120, 20)
+IMAGE_SIZE = "1280x720"
+
+# 视频处理页的编码器/质量组合；编码器不可用时跳过
+VIDEO_CASES = [
+    ("libx264", {"crf": "23"}),
+    ("libx264", {"crf": "28"}),
+    ("libx265", {"crf": "28"}),
+    ("copy", {}),
+]
+QUICK_VIDEO_MEDIA = ("360p", "720p")
+
+# 比较时检查的指标，以及低于该差值时视为测量误差
+COMPARE_METRICS = {
+    "wall_time": 0.05,  # 秒
+    "cpu_time": 0.05,  # 秒
+    "peak_rss_mb": 5.0,
+}
+DEFAULT_THRESHOLD = 10.0  # 百分比
+
+
+class BenchmarkError(Exception):
+    """无法生成测试素材或无法执行基准测试"""
+
+
+def _generate(ffmpeg_path, args, output):
+    if os.path.exists(output):
+        return output
+    temp = output + ".part" + os.path.splitext(output)[1]
+    command = [ffmpeg_path, "-nostdin", "-v", "error", "-y"] + args + [temp]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, encoding='utf-8', errors='ignore')
+    except OSError as e:
+        raise BenchmarkError(f"无法运行 FFmpeg: {e}")
+    if result.returncode != 0:
+        raise BenchmarkError(f"生成测试素材失败: {os.path.basename(output)}\n{result.stderr.strip()}")
+    os.replace(temp, output)
+    return output
+
+
+def generate_media(ffmpeg_path, media_dir, quick=False):
+    """生成（或复用已生成的）测试素材，返回 {名称: 路径}
+
+    素材内容只由参数决定（testsrc2 测试图案 + sine 正弦波），文件名包含参数，可在多次运行间复用。
+    """
+    os.makedirs(media_dir, exist_ok=True)
+    media = {}
+    for name, (size, duration, quick_duration) in VIDEO_MEDIA.items():
+        if quick and name not in QUICK_VIDEO_MEDIA:
+            continue
+        seconds = quick_duration if quick else duration
+        path = os.path.join(media_dir, f"video_{size}_{seconds}s.mp4")
+        media[name] = _generate(ffmpeg_path, [
+            "-f", "lavfi", "-i", f"testsrc2=size={size}:rate=30:duration={seconds}",
+            "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={seconds}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-crf", "18", "-g", "60", "-pix_fmt", "yuv420p",
+            "-c:a", "aac", "-b:a", "192k", "-ac", "2", "-shortest"], path)
+
+    seconds = AUDIO_MEDIA_SECONDS[1] if quick else AUDIO_MEDIA_SECONDS[0]
+    media["audio"] = _generate(ffmpeg_path, [
+        "-f", "lavfi", "-i", f"sine=frequency=1000:sample_rate=48000:duration={seconds}",
+        "-ac", "2", "-c:a", "pcm_s16le"], os.path.join(media_dir, f"audio_{seconds}s.wav"))
+    media["image"] = _generate(ffmpeg_path, [
+        "-f", "lavfi", "-i", f"testsrc2=size={IMAGE_SIZE}", "-frames:v", "1"],
+        os.path.join(media_dir, f"image_{IMAGE_SIZE}.png"))
+    return media
+
+
+def build_cases(media, work_dir, encoders, quick=False):
+    """生成测试用例列表: [{"name", "operation", "command", "outputs"}]"""
+    cases = []
+
+    def add(name, operation, command, *outputs):
+        cases.append({"name": name, "operation": operation, "command": command, "outputs": list(outputs)})
+
+    video_names = [name for name in VIDEO_MEDIA if name in media]
+    for name in video_names:
+        for codec, params in VIDEO_CASES:
+            if codec != "copy" and codec not in encoders:
+                continue
+            label = codec + "".join(f"_{k}{v}" for k, v in params.items())
+            output = os.path.join(work_dir, f"video_{name}_{label}.mp4")
+            options = dict(params, video_codec=codec, audio_codec="aac", audio_bitrate="192k")
+            add(f"video/{name}/{label}", "video", build_video_command(media[name], output, options), output)
+
+    for audio_format in AUDIO_FORMATS:
+        codec = AUDIO_FORMAT_CODECS[audio_format][0]
+        if audio_format != "wav" and codec not in encoders:
+            continue
+        output = batch_output_path(media["audio"], audio_format, work_dir)
+        options = {"format": audio_format, "codec": codec, "bitrate": "192k", "compression_level": "5"}
+        add(f"audio/{audio_format}", "audio", build_audio_command(media["audio"], output, options), output)
+
+    source = media[video_names[-1]]
+    output = os.path.join(work_dir, "mux.mkv")
+    add("mux", "mux", build_mux_command(source, media["audio"], output), output)
+    for stream_type in ("video", "audio"):
+        output = demux_output_path(source, stream_type)
+        add(f"demux/{stream_type}", "demux", build_demux_command(source, stream_type), output)
+    output = os.path.join(work_dir, "trim.mp4")
+    add("trim/fast", "trim", build_fast_trim_command(source, output, 2.0, 4.0), output)
+    output = os.path.join(work_dir, "img_audio.mp4")
+    audio_seconds = AUDIO_MEDIA_SECONDS[1] if quick else AUDIO_MEDIA_SECONDS[0]
+    add("img_audio", "img_audio", build_img_audio_command(media["image"], media["audio"], output,
+                                                          duration=audio_seconds), output)
+    return cases
+
+
+def _case_result(result):
+    progress = result.last_progress or {}
+    return {
+        "status": result.status,
+        "exit_code": result.exit_code,
+        "wall_time": round(result.elapsed, 3),
+        "speed": progress.get("speed") or None,
+        "fps": progress.get("fps") or None,
+        "cpu_time": result.cpu_time,
+        "peak_rss_mb": result.peak_rss_mb,
+    }
+
+
+def run_benchmark(ffmpeg_path, media_dir, quick=False, repeat=1, case_filter="", on_case=None):
+    """执行基准测试，返回结果字典（可直接保存为 JSON）
+
+    每个用例依次单独执行（不并行），重复 repeat 次时取耗时居中的一次。
+    on_case(序号, 总数, 用例名, 结果) 在每个用例完成后调用。
+    """
+    info = check_binary(ffmpeg_path, with_encoders=True)
+    if not info["ok"]:
+        raise BenchmarkError(f"FFmpeg 不可用: {info['error']}")
+    media = generate_media(ffmpeg_path, media_dir, quick)
+    work_dir = os.path.join(media_dir, "output")
+    os.makedirs(work_dir, exist_ok=True)
+    cases = [case for case in build_cases(media, work_dir, info["encoders"], quick) if case_filter in case["name"]]
+
+    runner = Runner(ffmpeg_path, max_workers=1)
+    results = {}
+    try:
+        for index, case in enumerate(cases):
+            runs = []
+            for _ in range(max(1, repeat)):
+                runs.append(_case_result(runner.run([case["command"]])[0]))
+                for output in case["outputs"]:
+                    if os.path.exists(output):
+                        os.remove(output)
+            finished = [run for run in runs if run["status"] == STATUS_FINISHED]
+            if finished:
+                median = statistics.median_low(run["wall_time"] for run in finished)
+                case_result = next(run for run in finished if run["wall_time"] == median)
+            else:
+                case_result = runs[-1]
+            case_result["operation"] = case["operation"]
+            case_result["runs"] = len(runs)
+            results[case["name"]] = case_result
+            if on_case:
+                on_case(index + 1, len(cases), case["name"], case_result)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "ffmpeg": {"path": info["resolved"], "version": info["version"]},
+        "machine": {"platform": platform.platform(), "cpu_count": os.cpu_count(),
+                    "python": sys.version.split()[0]},
+        "quick": quick,
+        "repeat": repeat,
+        "filter": case_filter,
+        "cases": results,
+    }
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """比较两次结果，返回 [{"case", "metric", "baseline", "current", "change", "regression", "improvement"}]
+
+    指标增加超过 threshold% 且超过测量误差时视为性能下降；基线中成功而本次失败或缺失的用例也视为下降
+    （本次用 --filter 排除的用例除外）。
+    """
+    rows = []
+    case_filter = current.get("filter", "")
+    for name, base in sorted(baseline.get("cases", {}).items()):
+        if base.get("status") != STATUS_FINISHED or case_filter not in name:
+            continue
+        cur = current.get("cases", {}).get(name)
+        if cur is None or cur.get("status") != STATUS_FINISHED:
+            rows.append({"case": name, "metric": "status", "baseline": base.get("status"),
+                         "current": cur.get("status") if cur else "missing", "change": None,
+                         "regression": True, "improvement": False})
+            continue
+        for metric, noise in COMPARE_METRICS.items():
+            before, after = base.get(metric), cur.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before * 100
+            rows.append({"case": name, "metric": metric, "baseline": before, "current": after,
+                         "change": round(change, 1),
+                         "regression": change > threshold and after - before > noise,
+                         "improvement": change < -threshold and before - after > noise})
+    return rows
+
+
+def format_comparison(rows, baseline, current, threshold=DEFAULT_THRESHOLD):
+    """将比较结果格式化为文本表格"""
+    lines = [f"基线: {baseline.get('created', '?')}  {baseline.get('ffmpeg', {}).get('version', '')}",
+             f"本次: {current.get('created', '?')}  {current.get('ffmpeg', {}).get('version', '')}",
+             f"阈值: +{threshold:g}%", ""]
+    for row in rows:
+        if row["metric"] == "status":
+            lines.append(f"[下降] {row['case']}: {row['baseline']} -> {row['current']}")
+            continue
+        mark = "[下降]" if row["regression"] else ("[提升]" if row["improvement"] else "      ")
+        lines.append(f"{mark} {row['case']:<32} {row['metric']:<12} "
+                     f"{row['baseline']:>9.2f} -> {row['current']:>9.2f} ({row['change']:+.1f}%)")
+    regressions = sum(1 for row in rows if row["regression"])
+    lines.append("")
+    lines.append(f"共 {regressions} 项性能下降" if regressions else "没有发现性能下降")
+    return "\n".join(lines)
+
+
+def _read_startup_report(process, started, reported):
+    """读取子进程输出直到启动耗时报告或输出结束，结果写入 reported["result"]"""
+    for line in process.stdout:
+        if line.startswith("STARTUP "):
+            result = json.loads(line[len("STARTUP "):])
+            result["process_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            reported["result"] = result
+            return
+
+
+def run_startup_benchmark(repeat=5, offscreen=False, timeout=60):
+    """多次冷启动 main.py --startup-benchmark，返回 {"runs", "median"}
+
+    每次运行记录 process_ms（从启动进程到可交互，含解释器启动）、tti_ms（从 main.py 开始执行到可交互）
+    和 imports_ms（main.py 的模块导入）。offscreen 为 True 时使用 Qt 的 offscreen 平台（无显示器环境）。
+    每次运行超过 timeout 秒仍未报告启动耗时时终止进程并抛出 BenchmarkError；报告后未及时退出的进程直接终止。
+    """
+    main_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    env = dict(os.environ)
+    if offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        try:
+            process = subprocess.Popen([sys.executable, main_script, "--startup-benchmark"], env=env,
+                                       stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+                                       encoding='utf-8', errors='ignore')
+        except OSError as e:
+            raise BenchmarkError(f"无法启动程序: {e}")
+        # 逐行读取会一直阻塞，因此在线程中读取输出，主线程按 timeout 等待启动耗时报告
+        reported = {}
+        reader = threading.Thread(target=_read_startup_report, args=(process, started, reported), daemon=True)
+        reader.start()
+        reader.join(timeout)
+        if reader.is_alive():
+            process.kill()
+            process.wait()
+            raise BenchmarkError(f"程序在 {timeout} 秒内未报告启动耗时，已终止")
+        try:
+            process.wait(timeout=max(0.0, started + timeout - time.perf_counter()))
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        if "result" not in reported:
+            raise BenchmarkError(f"程序未能正常启动 (退出码 {process.returncode})")
+        runs.append(reported["result"])
+    return {
+        "runs": runs,
+        "median": {key: statistics.median(run[key] for run in runs)
+                   for key in ("process_ms", "tti_ms", "imports_ms")},
+    }
@@ -0,0 +1,376 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/capabilities.py
+# FFmpeg/FFprobe 可用性与能力检测（版本、编译配置、编码器列表、硬件加速、编码器实测速度）
+# 结果按 可执行文件路径 + 修改时间 缓存，文件未变化时不再启动进程
+
+import os
+import re
+import json
+import shutil
+import threading
+import time
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+_CACHE_VERSION = 4
+
+# 硬件编码器后缀 -> 所需的硬件加速方式（ffmpeg -hwaccels 中未列出时直接排除；None 表示不检查）
+HW_ENCODER_HWACCELS = {
+    "nvenc": "cuda",
+    "qsv": "qsv",
+    "amf": None,
+    "vaapi": "vaapi",
+    "videotoolbox": "videotoolbox",
+}
+
+# 编码器测试使用的 lavfi 测试源与帧数
+ENCODER_TEST_SOURCE = "testsrc2=size=320x240:rate=30"
+ENCODER_TEST_FRAMES = 48
+ENCODER_TEST_TIMEOUT = 60
+# 默认设置下编码过慢的编码器（libaom 测试一次需要一分钟以上）改用最快的设置测试，
+# 只确认能否使用，结果标记为 "reduced"，排序时排在完整测速的编码器之后
+ENCODER_TEST_ARGS = {
+    "libaom-av1": ["-usage", "realtime", "-cpu-used", "8"],
+}
+_BENCH_RE = re.compile(r"bench: utime=\S+ stime=\S+ rtime=([\d.]+)s")
+_cache_lock = threading.Lock()
+
+
+def resolve_binary(path):
+    """将命令名或路径解析为可执行文件的绝对路径，找不到时返回 None"""
+    if not path:
+        return None
+    found = shutil.which(path)
+    if found:
+        return os.path.abspath(found)
+    if os.path.isfile(path):
+        return os.path.abspath(path)
+    return None
+
+
+def _binary_stamp(abs_path):
+    st = os.stat(abs_path)
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+def _run(args, timeout):
+    return subprocess.run(args, capture_output=True, text=True, encoding='utf-8',
+                          errors='ignore', timeout=timeout)
+
+
+def parse_encoders(output):
+    """解析 `ffmpeg -encoders` 输出，返回 {编码器名: 类型('V'/'A'/'S')}"""
+    encoders = {}
+    started = False
+    for line in output.splitlines():
+        line = line.strip()
+        if line.startswith('------'):
+            started = True
+            continue
+        if not started or not line:
+            continue
+        parts = line.split(None, 2)
+        if len(parts) >= 2 and len(parts[0]) == 6:
+            encoders[parts[1]] = parts[0][0]
+    return encoders
+
+
+def parse_hwaccels(output):
+    """解析 `ffmpeg -hwaccels` 输出，返回硬件加速方式列表"""
+    lines = [line.strip() for line in output.splitlines()]
+    if "Hardware acceleration methods:" in lines:
+        lines = lines[lines.index("Hardware acceleration methods:") + 1:]
+    return [line for line in lines if line]
+
+
+def probe_binary(path, with_encoders=False, timeout=5):
+    """运行 `<path> -version`（可选 `-encoders` 和 `-hwaccels`），返回信息字典
+
+    键: ok, path, resolved, version, configuration, encoders, hwaccels, error
+    """
+    info = {"ok": False, "path": path, "resolved": resolve_binary(path),
+            "version": "", "configuration": "", "encoders": {}, "hwaccels": [], "error": ""}
+    if info["resolved"] is None:
+        info["error"] = "not_found"
+        return info
+    try:
+        result = _run([info["resolved"], "-version"], timeout)
+    except subprocess.TimeoutExpired:
+        info["error"] = "timeout"
+        return info
+    except OSError as e:
+        info["error"] = str(e)
+        return info
+    if result.returncode != 0:
+        info["error"] = f"exit_code:{result.returncode}"
+        return info
+
+    lines = result.stdout.splitlines()
+    info["version"] = lines[0] if lines else ""
+    info["configuration"] = next((l.split(':', 1)[1].strip() for l in lines if l.startswith("configuration:")), "")
+    info["ok"] = True
+
+    if with_encoders:
+        try:
+            result = _run([info["resolved"], "-hide_banner", "-encoders"], timeout * 2)
+            info["encoders"] = parse_encoders(result.stdout)
+            result = _run([info["resolved"], "-hide_banner", "-hwaccels"], timeout)
+            info["hwaccels"] = parse_hwaccels(result.stdout)
+        except (subprocess.TimeoutExpired, OSError):
+            pass
+    return info
+
+
+class DetectionStopped(Exception):
+    """编码器检测已被停止"""
+
+
+class DetectionStop:
+    """用于从其他线程停止编码器检测：设置停止标志并终止正在运行的测试进程"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._process = None
+
+    @property
+    def stopped(self):
+        return self._event.is_set()
+
+    def stop(self):
+        self._event.set()
+        with self._lock:
+            if self._process is not None:
+                self._process.kill()
+
+    def run(self, args, timeout):
+        """与 subprocess.run 相同（捕获文本输出），停止后抛出 DetectionStopped"""
+        with self._lock:
+            if self.stopped:
+                raise DetectionStopped()
+            process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                       encoding='utf-8', errors='ignore')
+            self._process = process
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise
+        finally:
+            with self._lock:
+                self._process = None
+        if self.stopped:
+            raise DetectionStopped()
+        return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
+
+def _encode_test_seconds(ffmpeg_path, encoder, timeout, stop=None):
+    """编码测试帧的耗时（-benchmark 的 rtime，不含进程启动和输入探测），返回 (秒数, 运行结果)"""
+    args = [ffmpeg_path, "-hide_banner", "-nostdin", "-loglevel", "info", "-benchmark",
+            "-f", "lavfi", "-i", ENCODER_TEST_SOURCE, "-frames:v", str(ENCODER_TEST_FRAMES),
+            "-c:v", encoder] + ENCODER_TEST_ARGS.get(encoder, []) + ["-f", "null", "-"]
+    start = time.monotonic()
+    result = (stop or DetectionStop()).run(args, timeout)
+    match = _BENCH_RE.search(result.stderr)
+    return (float(match.group(1)) if match else time.monotonic() - start), result
+
+
+def measure_test_overhead(ffmpeg_path, timeout=30, stop=None):
+    """生成测试源本身的耗时（rawvideo 不做压缩），从各编码器的耗时中扣除；失败时为 0"""
+    try:
+        seconds, result = _encode_test_seconds(ffmpeg_path, "rawvideo", timeout, stop)
+    except (subprocess.TimeoutExpired, OSError):
+        return 0.0
+    return seconds if result.returncode == 0 else 0.0
+
+
+def test_video_encoder(ffmpeg_path, encoder, timeout=ENCODER_TEST_TIMEOUT, overhead=0.0, stop=None):
+    """用 lavfi 测试源实际编码一小段视频，返回 {"ok", "fps", "error"}
+
+    fps 为本机实测的编码速度（帧/秒），按 -benchmark 报告的耗时减去生成测试源的耗时 overhead 计算，
+    仅用于编码器之间的排序。软件编码器在时限内未完成时视为可用但很慢（error 为 "slow"），
+    fps 取按时限估算的上限；硬件编码器超时通常是驱动或设备无响应，视为不可用。
+    ENCODER_TEST_ARGS 中的编码器以最快设置测试，error 为 "reduced"。
+    stop (DetectionStop) 被停止时抛出 DetectionStopped。
+    """
+    try:
+        seconds, result = _encode_test_seconds(ffmpeg_path, encoder, timeout, stop)
+    except subprocess.TimeoutExpired:
+        if _hw_suffix(encoder) is None:
+            return {"ok": True, "fps": round(ENCODER_TEST_FRAMES / timeout, 2), "error": "slow"}
+        return {"ok": False, "fps": 0.0, "error": "timeout"}
+    except OSError as e:
+        return {"ok": False, "fps": 0.0, "error": str(e)}
+    if result.returncode != 0:
+        lines = [l for l in result.stderr.strip().splitlines() if not l.startswith("bench:")]
+        errors = [l for l in lines if "rror" in l] or lines
+        return {"ok": False, "fps": 0.0, "error": errors[-1] if errors else f"exit_code:{result.returncode}"}
+    return {"ok": True, "fps": round(ENCODER_TEST_FRAMES / max(seconds - overhead, 1e-3), 1),
+            "error": "reduced" if encoder in ENCODER_TEST_ARGS else ""}
+
+
+def _hw_suffix(encoder):
+    suffix = encoder.rsplit('_', 1)[-1] if '_' in encoder else ""
+    return suffix if suffix in HW_ENCODER_HWACCELS else None
+
+
+class CapabilityCache:
+    """以 JSON 文件保存的检测结果缓存"""
+
+    def __init__(self, cache_path):
+        self.cache_path = str(cache_path)
+
+    def _load(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == _CACHE_VERSION:
+                return data
+        except (OSError, json.JSONDecodeError, AttributeError):
+            pass
+        return {"version": _CACHE_VERSION, "binaries": {}}
+
+    def get(self, abs_path, key="info"):
+        with _cache_lock:
+            entry = self._load()["binaries"].get(abs_path)
+        if not entry:
+            return None
+        try:
+            if entry.get("stamp") != _binary_stamp(abs_path):
+                return None
+        except OSError:
+            return None
+        return entry.get(key)
+
+    def put(self, abs_path, value, key="info"):
+        with _cache_lock:
+            data = self._load()
+            try:
+                stamp = _binary_stamp(abs_path)
+            except OSError:
+                return
+            entry = data["binaries"].get(abs_path)
+            if not entry or entry.get("stamp") != stamp:
+                entry = {"stamp": stamp}
+            entry[key] = value
+            data["binaries"][abs_path] = entry
+            try:
+                with open(self.cache_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+            except OSError as e:
+                print(f"保存FFmpeg检测缓存失败: {e}")
+
+
+def get_capability_cache():
+    from config import get_config
+    return CapabilityCache(get_config().config_dir / "ffmpeg_capabilities.json")
+
+
+def check_binary(path, with_encoders=False, cache=None):
+    """带缓存的 probe_binary；仅缓存检测成功的结果"""
+    cache = cache or get_capability_cache()
+    resolved = resolve_binary(path)
+    if resolved:
+        cached = cache.get(resolved)
+        if cached and (cached.get("encoders") or not with_encoders):
+            return dict(cached, path=path)
+    info = probe_binary(path, with_encoders)
+    if info["ok"] and info["resolved"]:
+        cache.put(info["resolved"], info)
+    return info
+
+
+def check_binaries(ffmpeg_path, ffprobe_path, cache=None):
+    """同时检测 ffmpeg 与 ffprobe，返回 {"ffmpeg": info, "ffprobe": info}"""
+    cache = cache or get_capability_cache()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        ffmpeg_future = executor.submit(check_binary, ffmpeg_path, True, cache)
+        ffprobe_future = executor.submit(check_binary, ffprobe_path, False, cache)
+        return {"ffmpeg": ffmpeg_future.result(), "ffprobe": ffprobe_future.result()}
+
+
+def detect_video_encoders(ffmpeg_path, candidates, cache=None, stop=None):
+    """检测候选视频编码器在本机是否可用，返回 {编码器: {"ok", "fps", "error"}}
+
+    未编译进 ffmpeg 或缺少对应硬件加速方式的硬件编码器直接排除，
+    其余逐个做测试编码（依次进行，避免相互影响测速）。结果按 ffmpeg 可执行文件缓存，
+    每测完一个编码器立即写入缓存；在时限内未完成的软件编码器仍列出（排在最后），不会因本机较慢而被排除。
+    stop (DetectionStop) 被停止时终止正在运行的测试，只返回已完成的结果。
+    """
+    cache = cache or get_capability_cache()
+    info = check_binary(ffmpeg_path, with_encoders=True, cache=cache)
+    if not info["ok"]:
+        return {}
+    resolved = info["resolved"]
+    candidates = [c for c in dict.fromkeys(candidates) if c != "copy"]
+    results = dict(cache.get(resolved, "video_encoders") or {})
+    missing = [c for c in candidates if c not in results]
+    if not missing:
+        return {c: results[c] for c in candidates}
+
+    overhead = None
+    for encoder in missing:
+        suffix = _hw_suffix(encoder)
+        hwaccel = HW_ENCODER_HWACCELS.get(suffix)
+        if suffix and info["encoders"] and encoder not in info["encoders"]:
+            results[encoder] = {"ok": False, "fps": 0.0, "error": "not_compiled"}
+        elif hwaccel and info["hwaccels"] and hwaccel not in info["hwaccels"]:
+            results[encoder] = {"ok": False, "fps": 0.0, "error": f"no_hwaccel:{hwaccel}"}
+        else:
+            try:
+                if overhead is None:
+                    overhead = measure_test_overhead(resolved, stop=stop)
+                results[encoder] = test_video_encoder(resolved, encoder, overhead=overhead, stop=stop)
+            except DetectionStopped:
+                break
+        cache.put(resolved, results, "video_encoders")
+    return {c: results[c] for c in candidates if c in results}
+
+
+def rank_video_codecs(codecs, results):
+    """按检测结果筛选并排序编码器列表：可用的按实测速度从快到慢，'copy' 保持在最后
+
+    results 为 None（尚未检测）时原样返回。
+    """
+    if results is None:
+        return list(codecs)
+    usable = [c for c in codecs if c != "copy" and results.get(c, {}).get("ok")]
+    # 完整测速的在前；超时 ("slow") 或以最快设置测试 ("reduced") 的速度不可比，排在后面
+    usable.sort(key=lambda c: (not results[c]["error"], results[c]["fps"]), reverse=True)
+    if "copy" in codecs:
+        usable.append("copy")
+    return usable
+
+
+def start_check(ffmpeg_path, ffprobe_path):
+    """在后台线程中开始检测，返回 Future"""
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(check_binaries, ffmpeg_path, ffprobe_path)
+    executor.shutdown(wait=False)
+    return future
+
+
+def describe_check(result):
+    """将检测结果转换为 (FFmpeg是否可用, 提示信息)"""
+    ffmpeg, ffprobe = result["ffmpeg"], result["ffprobe"]
+    ffmpeg_path, ffprobe_path = ffmpeg["path"], ffprobe["path"]
+
+    if not ffmpeg["ok"]:
+        error = ffmpeg["error"]
+        if error == "timeout":
+            return False, "错误: FFmpeg响应超时，无法获取版本信息。"
+        if error.startswith("exit_code:"):
+            return False, f"错误: FFmpeg执行出错 (退出码: {error.split(':', 1)[1]})。\n\n请检查您的FFmpeg安装是否完整。"
+        if ffmpeg_path != "ffmpeg":
+            return False, f"错误: FFmpeg在指定路径未找到: {ffmpeg_path}\n\n请检查FFmpeg路径设置，或使用系统PATH中的FFmpeg。"
+        return False, "错误: FFmpeg未在系统PATH中找到。\n\n请确保您已正确安装FFmpeg，并将其路径添加至系统环境变量中。"
+
+    if not ffprobe["ok"]:
+        if ffprobe["error"] == "timeout":
+            return True, "FFmpeg 已找到，但FFprobe响应超时。\n\n媒体信息预览功能可能受限。"
+        if ffprobe_path != "ffprobe":
+            return True, f"FFmpeg 已找到，但FFprobe在指定路径未找到: {ffprobe_path}\n\n部分功能可能受限。"
+        return True, "FFmpeg 已找到，但FFprobe未在系统PATH中找到。\n\n媒体信息预览功能可能受限。"
+
+    return True, "FFmpeg 和 FFprobe 均已找到。"
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/chunked.py
+# 分段并行编码：在关键帧处切分长视频，各片段由独立的 ffmpeg 进程并行编码，最后用 concat 无损拼接
+
+import os
+import subprocess
+import tempfile
+
+from commands import video_encode_args, audio_encode_args
+from probe_cache import probe_media
+from trim import parse_keyframe_packets, media_start_time
+
+DEFAULT_CHUNK_SECONDS = 60
+MIN_CHUNK_SECONDS = 5
+# 片段边界放在关键帧之前半毫秒：关键帧属于后一个片段，其前一帧属于前一个片段，
+# 不受时间戳舍入影响（代价是后一个片段需要多解码一个 GOP）
+_BOUNDARY_OFFSET = 0.0005
+# 每个目标时间点最多读取的数据包数，覆盖常见的 GOP 长度（x264 默认 keyint=250）
+_SPLIT_SEARCH_PACKETS = 250
+
+
+class ChunkedEncodeError(Exception):
+    """无法分段编码（可改用单进程编码）"""
+
+
+def _ts(seconds):
+    return f"{seconds:.6f}"
+
+
+def nearest_keyframes(keyframes, targets):
+    """为每个目标时间点选一个关键帧：优先取不晚于目标的最近关键帧，没有时取之后最近的"""
+    chosen = set()
+    for target in targets:
+        before = [k for k in keyframes if k <= target]
+        after = [k for k in keyframes if k > target]
+        if before or after:
+            chosen.add(max(before) if before else min(after))
+    return sorted(chosen)
+
+
+def probe_split_points(ffprobe_path, input_file, targets, timeout=60, start_time=0.0):
+    """为每个目标时间点定位一个附近的关键帧，返回关键帧时间列表
+
+    使用 -read_intervals "T%+#N"，从每个时间点的 seek 位置起只读取 N 个数据包，无需扫描整个文件。
+    seek 之后读到的第一个数据包不一定是关键帧（取决于封装格式的 seek 方式），因此读取一段数据包，
+    从中选取关键帧；N 个数据包内都没有关键帧的时间点会被舍弃，最终片段数随之减少。
+    目标时间和返回的时间都相对于文件起始时间 start_time（与 -ss 一致，见 trim.media_start_time）。
+    """
+    if not targets:
+        return []
+    intervals = ",".join(f"{_ts(t + start_time)}%+#{_SPLIT_SEARCH_PACKETS}" for t in targets)
+    command = [ffprobe_path, "-v", "error", "-select_streams", "v:0", "-read_intervals", intervals,
+               "-show_entries", "packet=pts_time,dts_time,flags", "-of", "csv=p=0", input_file]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, encoding='utf-8',
+                                errors='ignore', timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise ChunkedEncodeError(f"读取关键帧失败: {e}")
+    if result.returncode != 0:
+        raise ChunkedEncodeError(f"读取关键帧失败: {result.stderr.strip()}")
+    return nearest_keyframes([pts - start_time for pts, _ in parse_keyframe_packets(result.stdout)], targets)
+
+
+def plan_chunks(duration, keyframes, min_chunk=MIN_CHUNK_SECONDS):
+    """根据关键帧将 [0, duration) 划分为片段，返回 [(开始, 结束)]，最后一个片段的结束为 None(到结尾)"""
+    boundaries = [0.0]
+    for keyframe in sorted(set(keyframes)):
+        if keyframe - boundaries[-1] >= min_chunk and duration - keyframe >= min_chunk:
+            boundaries.append(keyframe - _BOUNDARY_OFFSET)
+    chunks = list(zip(boundaries, boundaries[1:]))
+    chunks.append((boundaries[-1], None))
+    return chunks
+
+
+def prepare_chunked_encode(ffprobe_path, input_file, output_file, options,
+                           chunk_seconds=DEFAULT_CHUNK_SECONDS, threads=0, overwrite=True):
+    """生成分段编码的执行计划（在后台线程中调用）
+
+    返回 {"chunks": [{"command", "description", "duration"}], "final": {...}, "work_dir": 临时目录}。
+    各片段只编码视频，使用相同的编码参数；final 在全部片段完成后拼接视频并编码音频。
+    各片段的码率控制相互独立，因此只支持 CRF/CQ 等恒定质量模式：按码率编码时每段各自
+    分配码率，整体码率和文件大小都无法保证。无法分段时抛出 ChunkedEncodeError。
+    """
+    if options.get("video_codec") == "copy":
+        raise ChunkedEncodeError("视频编码为 copy，无需分段编码")
+    if options.get("video_bitrate"):
+        raise ChunkedEncodeError("按码率编码时各片段的码率控制相互独立，分段编码仅支持 CRF/CQ")
+    if options.get("subtitle"):
+        raise ChunkedEncodeError("内嵌字幕需要完整的时间轴，不支持分段编码")
+
+    probe_data = probe_media(input_file, ffprobe_path)
+    if probe_data is None:
+        raise ChunkedEncodeError("无法读取媒体信息 (需要 FFprobe)")
+    try:
+        duration = float(probe_data["format"]["duration"])
+    except (KeyError, TypeError, ValueError):
+        raise ChunkedEncodeError("无法获取视频时长")
+    if not any(s.get("codec_type") == "video" for s in probe_data.get("streams", [])):
+        raise ChunkedEncodeError("输入文件中没有视频流")
+
+    chunk_seconds = max(chunk_seconds, MIN_CHUNK_SECONDS)
+    targets = [chunk_seconds * i for i in range(1, int(duration // chunk_seconds) + 1)]
+    keyframes = probe_split_points(ffprobe_path, input_file, targets, start_time=media_start_time(probe_data))
+    chunks = plan_chunks(duration, keyframes)
+    if len(chunks) < 2:
+        raise ChunkedEncodeError("视频过短或关键帧过少，无法分段")
+
+    work_dir = tempfile.mkdtemp(prefix="skydreambox_chunks_")
+    name = os.path.basename(output_file)
+    encode_args = video_encode_args(options)
+    if threads > 0:
+        encode_args += ["-threads", str(threads)]
+
+    chunk_jobs = []
+    for index, (start, end) in enumerate(chunks):
+        chunk_path = os.path.join(work_dir, f"chunk{index:04d}.mkv")
+        command = ["ffmpeg", "-ss", _ts(start), "-i", input_file]
+        if end is not None:
+            command.extend(["-t", _ts(end - start)])
+        command.extend(["-map", "0:v:0", "-an", "-sn", "-dn"] + encode_args + ["-f", "matroska", "-y", chunk_path])
+        chunk_jobs.append({"command": command, "path": chunk_path,
+                           "description": f"分段编码 {index + 1}/{len(chunks)}: {name}",
+                           "duration": (end if end is not None else duration) - start})
+
+    list_path = os.path.join(work_dir, "chunks.txt")
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for chunk in chunk_jobs:
+            escaped = chunk["path"].replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    final_command = (["ffmpeg", "-f", "concat", "-safe", "0", "-i", list_path, "-i", input_file,
+                      "-map", "0:v", "-map", "1:a?", "-c:v", "copy"] + audio_encode_args(options)
+                     + (["-y", output_file] if overwrite else [output_file]))
+    final = {"command": final_command, "description": f"分段编码(合并): {name}", "duration": duration}
+    return {"chunks": chunk_jobs, "final": final, "work_dir": work_dir}
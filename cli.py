@@ -0,0 +1,991 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/cli.py
+# 无界面命令行入口，与各选项卡使用相同的命令构建函数（不导入 PySide6）
+#
+# 用法: python cli.py <convert|audio|mux|demux|trim|img-audio> [参数]
+#      python cli.py convert D:/videos/*.mkv --format mp4 --crf 23 -j 4 --json
+#      python cli.py run nightly.toml --report reports/nightly.json
+#      python cli.py bench -o results.json --baseline baseline.json
+#      python cli.py watch /srv/inbox --preset 相机素材 --done-dir /srv/done -j 2
+#
+# 退出码: 0 全部成功; 1 有任务失败; 2 参数错误; 3 没有可处理的输入; 130 被中断
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_NO_INPUT = 3
+EXIT_INTERRUPTED = 130
+
+
+class CliError(Exception):
+    """参数有效但无法执行（退出码见 exit_code）"""
+
+    def __init__(self, message, exit_code=EXIT_USAGE):
+        super().__init__(message)
+        self.exit_code = exit_code
+
+
+# =============================================================================
+# 任务计划
+# =============================================================================
+class Plan:
+    """按阶段执行的任务：同一阶段内并行，同组任务在前一阶段全部成功后才执行下一阶段"""
+
+    def __init__(self):
+        self.stages = []
+        self.skipped = 0
+        self.cleanup_paths = []  # 执行结束后删除的临时文件/目录
+        self.checks = []  # 全部成功后执行的检查，返回 (是否通过, 说明)
+        self.summary = None
+        self.manifest = None  # 按清单执行时记录清单信息，写入报告
+
+    def add_stage(self, tasks):
+        if tasks:
+            self.stages.append(tasks)
+
+    def merge(self, other, group):
+        """合并另一个计划，其任务归入 group 组，各阶段与本计划的对应阶段并行执行"""
+        for index, stage in enumerate(other.stages):
+            for task in stage:
+                task["group"] = group
+            if index < len(self.stages):
+                self.stages[index].extend(stage)
+            else:
+                self.stages.append(stage)
+        self.skipped += other.skipped
+        self.cleanup_paths.extend(other.cleanup_paths)
+        self.checks.extend(other.checks)
+
+    @property
+    def total(self):
+        return sum(len(stage) for stage in self.stages)
+
+
+def _task(command, output, duration=0.0, input_file=""):
+    return {"command": command, "output": output, "duration": duration, "input": input_file, "group": 0}
+
+
+def _expand_inputs(patterns, extensions):
+    """展开输入参数：文件原样保留，文件夹和通配符按扩展名筛选"""
+    from commands import expand_batch_inputs
+    inputs = []
+    for pattern in patterns:
+        if os.path.isfile(pattern):
+            inputs.append(os.path.abspath(pattern))
+        else:
+            inputs.extend(expand_batch_inputs(pattern, extensions))
+    return list(dict.fromkeys(inputs))
+
+
+def _plan_outputs(args, inputs, output_format):
+    """返回 ([(输入, 输出)], 跳过数量)"""
+    from commands import plan_batch
+    if not inputs:
+        raise CliError("没有匹配的输入文件", EXIT_NO_INPUT)
+    if args.output:
+        if len(inputs) != 1:
+            raise CliError("多个输入文件时请使用 --output-dir 而不是 -o")
+        if args.skip_existing and os.path.exists(args.output):
+            return [], 1
+        return [(inputs[0], args.output)], 0
+    if args.output_dir and not os.path.isdir(args.output_dir):
+        raise CliError(f"输出目录不存在: {args.output_dir}")
+    return plan_batch(inputs, output_format, args.output_dir, args.skip_existing)
+
+
+def _require_files(*paths):
+    for path in paths:
+        if path and not os.path.isfile(path):
+            raise CliError(f"文件不存在: {path}", EXIT_NO_INPUT)
+
+
+def _time_arg(value):
+    from utils import time_str_to_seconds
+    return time_str_to_seconds(value) if value else None
+
+
+def _label_for(value, labels):
+    """将 16/24/32 等位深参数转换为界面下拉框中的文本"""
+    if not value:
+        return None
+    for label in labels:
+        if label.startswith(f"{value}-bit"):
+            return label
+    raise CliError(f"不支持的位深: {value} (可选: {', '.join(l.split('-')[0] for l in labels)})")
+
+
+def plan_convert(args, config):
+    from commands import build_video_command
+    from utils import (VIDEO_FORMAT_CODECS, AUDIO_CODECS_FOR_VIDEO_FORMAT, RESOLUTION_PRESETS,
+                       VIDEO_INPUT_EXTENSIONS)
+
+    video_codec = args.vcodec or VIDEO_FORMAT_CODECS[args.format][0]
+    audio_codec = args.acodec or AUDIO_CODECS_FOR_VIDEO_FORMAT[args.format][0]
+    resolution = args.resolution
+    if resolution in RESOLUTION_PRESETS:
+        resolution = f"{RESOLUTION_PRESETS[resolution]}:-1"
+    options = {
+        "video_codec": video_codec,
+        "audio_codec": audio_codec,
+        # 与界面一致：无损和 copy 不设置音频比特率
+        "audio_bitrate": args.abitrate if audio_codec not in ['flac', 'copy', 'alac'] else "",
+        "crf": args.crf or "",
+        "cq": args.cq or "",
+        "preset": args.preset or "",
+        "video_bitrate": args.vbitrate or "",
+        "fps": args.fps or "",
+        "resolution": resolution or "",
+        "subtitle": args.subtitle or "",
+    }
+    _require_files(args.subtitle)
+    _check_convert_modes(args)
+
+    plan = Plan()
+    if args.rendition:
+        _plan_ladder(plan, args, _expand_inputs(args.inputs, VIDEO_INPUT_EXTENSIONS), options)
+        return plan
+    pairs, plan.skipped = _plan_outputs(args, _expand_inputs(args.inputs, VIDEO_INPUT_EXTENSIONS), args.format)
+    if args.chunked:
+        if len(pairs) > 1:
+            raise CliError("--chunked 一次只能处理一个输入文件")
+        if pairs:
+            if args.auto_tune:
+                options = _auto_tune(args, config, pairs[0][0], options)
+            _plan_chunked(plan, args, config, pairs[0], options)
+        return plan
+
+    if args.target_size:
+        for pair in pairs:
+            _plan_two_pass(plan, args, config, pair, options)
+        return plan
+
+    tasks = []
+    for input_file, output_file in pairs:
+        input_options = _auto_tune(args, config, input_file, options) if args.auto_tune else options
+        if args.auto_copy:
+            input_options = _auto_copy(args, config, input_file, input_options, args.format)
+        tasks.append(_task(build_video_command(input_file, output_file, input_options), output_file,
+                           input_file=input_file))
+    plan.add_stage(tasks)
+    return plan
+
+
+def _check_convert_modes(args):
+    """--rendition / --target-size / --chunked 各自生成不同的命令，不支持的选项组合直接报错，而不是静默忽略"""
+    unsupported = {
+        "--rendition": [("--auto-tune", args.auto_tune), ("--target-size", args.target_size),
+                        ("--chunked", args.chunked), ("--auto-copy", args.auto_copy)],
+        "--target-size": [("--auto-tune", args.auto_tune), ("--auto-copy", args.auto_copy)],
+        # 分段编码各片段独立控制码率，仅支持 CRF/CQ
+        "--chunked": [("--vbitrate", args.vbitrate), ("--target-size", args.target_size),
+                      ("--auto-copy", args.auto_copy)],
+    }
+    for mode, options in unsupported.items():
+        if not getattr(args, mode.lstrip("-").replace("-", "_")):
+            continue
+        conflicts = [name for name, value in options if value]
+        if conflicts:
+            raise CliError(f"{mode} 不能与 {', '.join(conflicts)} 同时使用")
+
+
+def _parse_rendition(value, default_codec):
+    """'720' / '720:2800k' / '720:2800k:libx265' -> {"height", "video_bitrate", "video_codec"}"""
+    parts = value.split(":")
+    if not parts[0].rstrip("pP").isdigit() or len(parts) > 3:
+        raise CliError(f"无效的 --rendition: {value} (格式: 高度[:比特率[:编码器]])")
+    return {"height": int(parts[0].rstrip("pP")),
+            "video_bitrate": parts[1] if len(parts) > 1 else "",
+            "video_codec": parts[2] if len(parts) > 2 and parts[2] else default_codec}
+
+
+def _plan_ladder(plan, args, inputs, options):
+    """每个输入一个 ffmpeg 进程，一次解码输出全部 --rendition 分辨率"""
+    from commands import build_ladder_command, ladder_output_path
+    if not inputs:
+        raise CliError("没有匹配的输入文件", EXIT_NO_INPUT)
+    if args.output:
+        raise CliError("--rendition 会生成多个输出文件，请使用 --output-dir 而不是 -o")
+    if args.output_dir and not os.path.isdir(args.output_dir):
+        raise CliError(f"输出目录不存在: {args.output_dir}")
+    specs = [_parse_rendition(value, options["video_codec"]) for value in args.rendition]
+    tasks = []
+    for input_file in inputs:
+        renditions = [dict(spec, output=ladder_output_path(input_file, f"{spec['height']}p", args.format,
+                                                           args.output_dir)) for spec in specs]
+        if args.skip_existing and all(os.path.exists(r["output"]) for r in renditions):
+            plan.skipped += 1
+            continue
+        tasks.append(_task(build_ladder_command(input_file, renditions, options), renditions[-1]["output"],
+                           input_file=input_file))
+    plan.add_stage(tasks)
+
+
+def _plan_two_pass(plan, args, config, pair, options):
+    """按目标大小两遍编码：第一阶段分析，第二阶段正式编码（同一任务组）"""
+    from commands import build_two_pass_commands, target_video_bitrate, bitrate_to_kbps, audio_stream_kbps
+    from probe_cache import probe_media
+    from utils import TWO_PASS_CODECS
+    input_file, output_file = pair
+    if options["video_codec"] not in TWO_PASS_CODECS:
+        raise CliError(f"--target-size 不支持编码器 {options['video_codec']} (支持: {', '.join(TWO_PASS_CODECS)})")
+    probe_data = probe_media(input_file, _ffprobe_path(args, config))
+    try:
+        duration = float(probe_data["format"]["duration"])
+    except (KeyError, TypeError, ValueError):
+        raise CliError(f"无法获取视频时长 (需要 FFprobe): {input_file}", EXIT_FAILED)
+    audio_kbps = audio_stream_kbps(probe_data)
+    if audio_kbps != 0 and options["audio_codec"] != "copy":
+        audio_kbps = bitrate_to_kbps(options["audio_bitrate"])
+    if audio_kbps is None:
+        raise CliError("无法确定音频码率，--target-size 需要有损音频编码并设置 --abitrate")
+    try:
+        video_kbps = target_video_bitrate(args.target_size, duration, audio_kbps)
+    except ValueError as e:
+        raise CliError(f"{input_file}: {e}")
+    passlog_dir = tempfile.mkdtemp(prefix="skydreambox_2pass_")
+    plan.cleanup_paths.append(passlog_dir)
+    first, second = build_two_pass_commands(input_file, output_file, options, video_kbps,
+                                            os.path.join(passlog_dir, "passlog"))
+    group = len(plan.stages[0]) if plan.stages else 0
+    pass_plan = Plan()
+    pass_plan.add_stage([_task(first, os.devnull, duration, input_file)])
+    pass_plan.add_stage([_task(second, output_file, duration, input_file)])
+    plan.merge(pass_plan, group)
+
+
+def _auto_tune(args, config, input_file, options):
+    """试编码样本片段，返回使用选中 CRF/预设的参数（调优表格输出到 stderr）"""
+    from autotune import autotune, format_result, AutoTuneError
+    workers = args.jobs or config.get("max_concurrent_jobs", 0) or _default_workers()
+    print(f"自动调优: {os.path.basename(input_file)}", file=sys.stderr)
+    try:
+        result = autotune(_ffmpeg_path(args, config), _ffprobe_path(args, config), input_file, options,
+                          args.tune_metric, args.tune_target, max_workers=workers)
+    except AutoTuneError as e:
+        raise CliError(f"无法自动调优 {input_file}: {e}", EXIT_FAILED)
+    print(format_result(result), file=sys.stderr)
+    if not result["met"]:
+        print(f"警告: 没有参数达到目标 {args.tune_metric.upper()}，已选择质量最高的一组", file=sys.stderr)
+    return dict(options, crf=result["crf"], preset=result["preset"])
+
+
+def _auto_copy(args, config, input_file, options, output_format=None):
+    """按 FFprobe 数据把无需重新编码的流改为 copy（决定输出到 stderr）；output_format 为 None 时按音频处理"""
+    from probe_cache import probe_media
+    from stream_copy import plan_video_copy, plan_audio_copy
+    probe_data = probe_media(input_file, _ffprobe_path(args, config))
+    if probe_data is None:
+        print(f"自动流复制: 无法读取 {os.path.basename(input_file)} 的媒体信息，按所选参数编码", file=sys.stderr)
+        return options
+    if output_format is None:
+        options, notes = plan_audio_copy(probe_data, options)
+    else:
+        options, notes = plan_video_copy(probe_data, output_format, options)
+    for note in notes:
+        print(f"自动流复制 [{os.path.basename(input_file)}] {note}", file=sys.stderr)
+    return options
+
+
+def _plan_chunked(plan, args, config, pair, options):
+    from chunked import prepare_chunked_encode, DEFAULT_CHUNK_SECONDS
+    input_file, output_file = pair
+    workers = args.jobs or config.get("max_concurrent_jobs", 0) or _default_workers()
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    chunk_plan = prepare_chunked_encode(_ffprobe_path(args, config), input_file, output_file, options,
+                                        config.get("chunk_seconds", DEFAULT_CHUNK_SECONDS), threads, True)
+    plan.cleanup_paths.append(chunk_plan["work_dir"])
+    plan.add_stage([_task(c["command"], c["path"], c["duration"], input_file) for c in chunk_plan["chunks"]])
+    final = chunk_plan["final"]
+    plan.add_stage([_task(final["command"], output_file, final["duration"], input_file)])
+
+
+def plan_audio(args, config):
+    from commands import build_audio_command
+    from utils import (AUDIO_FORMAT_CODECS, AUDIO_INPUT_EXTENSIONS, WAV_BIT_DEPTH_CODECS,
+                       AUDIO_SAMPLE_FORMATS)
+
+    bit_depth_labels = WAV_BIT_DEPTH_CODECS if args.format == 'wav' else AUDIO_SAMPLE_FORMATS
+    options = {
+        "format": args.format,
+        "codec": args.codec or AUDIO_FORMAT_CODECS[args.format][0],
+        "bitrate": args.bitrate,
+        "compression_level": args.compression_level,
+        "bit_depth": _label_for(args.bit_depth, bit_depth_labels),
+        "sample_rate": args.sample_rate,
+    }
+    plan = Plan()
+    pairs, plan.skipped = _plan_outputs(args, _expand_inputs(args.inputs, AUDIO_INPUT_EXTENSIONS), args.format)
+    plan.add_stage([_task(build_audio_command(i, o, _auto_copy(args, config, i, options) if args.auto_copy else options),
+                          o, input_file=i) for i, o in pairs])
+    return plan
+
+
+def plan_mux(args, config):
+    from commands import build_mux_command
+    _require_files(args.video, args.audio, args.subtitle)
+    plan = Plan()
+    plan.add_stage([_task(build_mux_command(args.video, args.audio, args.output, args.subtitle or ""),
+                          args.output, input_file=args.video)])
+    return plan
+
+
+def plan_demux(args, config):
+    from commands import build_demux_command, demux_output_path
+    from utils import VIDEO_INPUT_EXTENSIONS, AUDIO_INPUT_EXTENSIONS
+    inputs = _expand_inputs(args.inputs, VIDEO_INPUT_EXTENSIONS + AUDIO_INPUT_EXTENSIONS)
+    if not inputs:
+        raise CliError("没有匹配的输入文件", EXIT_NO_INPUT)
+    plan = Plan()
+    if args.stream == 'all':
+        plan.add_stage(_extract_all_tasks(args, config, inputs, plan))
+        return plan
+    stream_types = ['video', 'audio'] if args.stream == 'both' else [args.stream]
+    tasks = []
+    for input_file in inputs:
+        for stream_type in stream_types:
+            output_file = demux_output_path(input_file, stream_type)
+            if args.skip_existing and os.path.exists(output_file):
+                plan.skipped += 1
+                continue
+            tasks.append(_task(build_demux_command(input_file, stream_type, _overwrite(args, config)),
+                               output_file, input_file=input_file))
+    plan.add_stage(tasks)
+    return plan
+
+
+def _extract_all_tasks(args, config, inputs, plan):
+    """每个输入一个 ffmpeg 进程，一次读取写出全部流（需要 FFprobe 列出流）"""
+    from commands import plan_stream_extraction, build_extract_all_command
+    from probe_cache import probe_media
+    tasks = []
+    for input_file in inputs:
+        probe_data = probe_media(input_file, _ffprobe_path(args, config))
+        if probe_data is None:
+            raise CliError(f"无法读取媒体信息 (需要 FFprobe): {input_file}", EXIT_FAILED)
+        streams = plan_stream_extraction(input_file, probe_data)
+        if args.skip_existing and streams and all(os.path.exists(s["output"]) for s in streams):
+            plan.skipped += 1
+            continue
+        try:
+            command = build_extract_all_command(input_file, streams, _overwrite(args, config))
+        except ValueError as e:
+            raise CliError(f"{input_file}: {e}", EXIT_FAILED)
+        tasks.append(_task(command, command[-1], input_file=input_file))
+    return tasks
+
+
+def plan_trim(args, config):
+    from trim import build_fast_trim_command, prepare_smart_cut, check_av_sync, SmartCutError
+    _require_files(args.input)
+    start_sec = _time_arg(args.start) or 0.0
+    end_sec = _time_arg(args.end)
+    if end_sec is not None and end_sec <= start_sec:
+        raise CliError("结束时间必须晚于开始时间")
+    overwrite = _overwrite(args, config)
+    plan = Plan()
+    if args.smart:
+        try:
+            cut = prepare_smart_cut(_ffprobe_path(args, config), args.input, args.output,
+                                    start_sec, end_sec, overwrite)
+        except SmartCutError as e:
+            print(f"无法智能剪切: {e}，改用快速截取", file=sys.stderr)
+        else:
+            plan.cleanup_paths.append(cut["work_dir"])
+            plan.add_stage([_task(s["command"], s["path"], s["duration"], args.input) for s in cut["segments"]])
+            final = cut["final"]
+            plan.add_stage([_task(final["command"], args.output, final["duration"], args.input)])
+            plan.checks.append(lambda: check_av_sync(_ffprobe_path(args, config), args.output))
+            return plan
+    duration = (end_sec - start_sec) if end_sec is not None else 0.0
+    plan.add_stage([_task(build_fast_trim_command(args.input, args.output, start_sec, end_sec, overwrite),
+                          args.output, duration, args.input)])
+    return plan
+
+
+def plan_img_audio(args, config):
+    from commands import build_img_audio_command, album_output_path
+    from utils import AUDIO_INPUT_EXTENSIONS
+    _require_files(args.image)
+    if args.album:
+        if args.audio or args.output:
+            raise CliError("--album 不能与 --audio/-o 同时使用 (输出目录用 --output-dir)")
+        if args.output_dir and not os.path.isdir(args.output_dir):
+            raise CliError(f"输出目录不存在: {args.output_dir}")
+        tracks = _expand_inputs([args.album], AUDIO_INPUT_EXTENSIONS)
+        if not tracks:
+            raise CliError("专辑文件夹中没有音频文件", EXIT_NO_INPUT)
+        pairs = [(track, album_output_path(track, args.output_dir)) for track in tracks]
+    else:
+        if not args.audio or not args.output:
+            raise CliError("需要 --audio 和 -o，或使用 --album")
+        _require_files(args.audio)
+        pairs = [(args.audio, args.output)]
+    plan = Plan()
+    tasks = []
+    for audio_file, output_file in pairs:
+        if args.skip_existing and os.path.exists(output_file):
+            plan.skipped += 1
+            continue
+        codec, duration = _probe_audio(args, config, audio_file)
+        tasks.append(_task(build_img_audio_command(args.image, audio_file, output_file, _overwrite(args, config),
+                                                   codec, duration), output_file, duration, audio_file))
+    plan.add_stage(tasks)
+    return plan
+
+
+def _probe_audio(args, config, audio_file):
+    """返回 (第一个音频流的编码, 时长)；没有 FFprobe 时为 (None, 0.0)，音频按 AAC 重新编码"""
+    from probe_cache import probe_media
+    data = probe_media(audio_file, _ffprobe_path(args, config)) or {}
+    codec = next((s.get("codec_name") for s in data.get("streams", []) if s.get("codec_type") == "audio"), None)
+    try:
+        return codec, float(data["format"]["duration"])
+    except (KeyError, TypeError, ValueError):
+        return codec, 0.0
+
+
+def plan_manifest(args, config):
+    """按清单生成计划：每个任务按对应子命令解析参数，所有任务合并后一起并行执行"""
+    from manifest import load_manifest, job_argv, ManifestError
+    try:
+        manifest, digest = load_manifest(args.manifest)
+    except ManifestError as e:
+        raise CliError(str(e))
+    base_dir = os.path.dirname(os.path.abspath(args.manifest))
+    defaults = manifest.get("defaults", {})
+    if not args.jobs:
+        args.jobs = int(manifest.get("max_workers", 0))
+
+    parser = build_parser()
+    plan = Plan()
+    plan.manifest = {"path": os.path.abspath(args.manifest), "sha256": digest, "jobs": []}
+    for index, job in enumerate(manifest["jobs"]):
+        try:
+            argv = job_argv(job, defaults, base_dir)
+        except ManifestError as e:
+            raise CliError(f"任务 {index + 1}: {e}")
+        try:
+            job_args = parser.parse_args(argv)
+        except SystemExit:
+            raise CliError(f"任务 {index + 1} 的参数无效: {' '.join(argv)}")
+        # 执行相关的选项以 run 命令为准
+        for key in ("ffmpeg", "ffprobe", "jobs"):
+            setattr(job_args, key, getattr(args, key))
+        if job_args.overwrite is None:
+            job_args.overwrite = args.overwrite
+        try:
+            job_plan = job_args.planner(job_args, config)
+        except CliError as e:
+            if e.exit_code != EXIT_NO_INPUT:
+                raise CliError(f"任务 {index + 1}: {e}", e.exit_code)
+            print(f"任务 {index + 1}: {e}", file=sys.stderr)
+            job_plan = Plan()
+        plan.manifest["jobs"].append({"job": index, "operation": job["operation"], "argv": argv,
+                                      "tasks": job_plan.total, "skipped": job_plan.skipped})
+        plan.merge(job_plan, index)
+    return plan
+
+
+def write_report(plan, path):
+    """将执行结果写入 JSON 报告，便于比较多次运行的吞吐量"""
+    tasks = []
+    for stage_index, stage in enumerate(plan.stages):
+        for task in stage:
+            result = task.get("result")
+            tasks.append({"group": task["group"], "stage": stage_index, "input": task["input"],
+                          "output": task["output"], "command": task["command"],
+                          "status": result.status if result else "not_run",
+                          "exit_code": result.exit_code if result else None,
+                          "elapsed": round(result.elapsed, 3) if result else 0.0,
+                          "media_seconds": round(result.duration, 3) if result else 0.0})
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "manifest": plan.manifest,
+              "summary": plan.summary, "tasks": tasks}
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+# =============================================================================
+# 执行与输出
+# =============================================================================
+def _default_workers():
+    from runner import default_worker_count
+    return default_worker_count()
+
+
+def _overwrite(args, config):
+    return config.get("overwrite_files", True) if args.overwrite is None else args.overwrite
+
+
+def _ffmpeg_path(args, config):
+    return args.ffmpeg or config.get_ffmpeg_path()
+
+
+def _ffprobe_path(args, config):
+    return args.ffprobe or config.get_ffprobe_path()
+
+
+class Reporter:
+    """输出任务事件：--json 时每行一个 JSON 对象写到标准输出，否则把简要信息写到标准错误"""
+
+    def __init__(self, json_mode, tasks_by_index, total):
+        self.json_mode = json_mode
+        self.tasks = tasks_by_index
+        self.total = total
+        self.done = 0
+        self._tty = sys.stderr.isatty()
+
+    def emit(self, event):
+        task = self.tasks.get(event.get("job"))
+        if task is not None:
+            event.setdefault("output", task["output"])
+        if self.json_mode:
+            sys.stdout.write(json.dumps(event, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+            return
+        kind = event["event"]
+        if kind == "progress" and self._tty:
+            percent = f"{event['percent']:.1f}%" if event.get("percent") is not None else "--"
+            eta = f" 剩余 {int(event['eta']) // 60}:{int(event['eta']) % 60:02d}" if event.get("eta") is not None else ""
+            sys.stderr.write(f"\r[{event['job'] + 1}/{self.total}] {percent} 速度 {event['speed']:.2f}x{eta} "
+                             f"{os.path.basename(event['output'])}\033[K")
+        elif kind == "end":
+            self.done += 1
+            state = {"finished": "完成", "failed": "失败", "cancelled": "已取消"}.get(event["status"], event["status"])
+            line = f"[{self.done}/{self.total}] {state} ({event['elapsed']:.1f}s): {event['output']}"
+            sys.stderr.write(f"\r{line}\033[K\n" if self._tty else f"{line}\n")
+            if event["status"] == "failed":
+                for log_line in event.get("log_tail", [])[-5:]:
+                    sys.stderr.write(f"    {log_line}\n")
+        sys.stderr.flush()
+
+    def summary(self, summary):
+        if self.json_mode:
+            self.emit(summary)
+        else:
+            sys.stderr.write(f"完成 {summary['finished']}/{summary['total']}，失败 {summary['failed']}，"
+                             f"跳过 {summary['skipped']}，用时 {summary['elapsed']:.1f}s "
+                             f"({summary['throughput_per_min']:.1f} 个/分钟，合计速度 {summary['speed']:.2f}x)\n")
+
+
+def execute(plan, args, config):
+    """执行计划，返回退出码；各任务的 RunResult 保存在 task["result"]，汇总保存在 plan.summary"""
+    from runner import Runner, STATUS_FINISHED, STATUS_FAILED
+
+    tasks_by_index = {}
+    reporter = Reporter(args.json, tasks_by_index, plan.total)
+    runner = Runner(_ffmpeg_path(args, config),
+                    args.jobs or config.get("max_concurrent_jobs", 0),
+                    args.log_level, reporter.emit)
+
+    started = time.time()
+    results = []
+    failed_groups = set()
+    try:
+        for stage in plan.stages:
+            # 同组的前一阶段失败时，后续阶段不再执行
+            tasks = [t for t in stage if t["group"] not in failed_groups]
+            if not tasks:
+                continue
+            start_index = len(tasks_by_index)
+            for offset, task in enumerate(tasks):
+                tasks_by_index[start_index + offset] = task
+            stage_results = runner.run([t["command"] for t in tasks], start_index, [t["duration"] for t in tasks])
+            for task, result in zip(tasks, stage_results):
+                task["result"] = result
+                if result.status != STATUS_FINISHED:
+                    failed_groups.add(task["group"])
+            results.extend(stage_results)
+    except KeyboardInterrupt:
+        runner.cancel()
+        return EXIT_INTERRUPTED
+    finally:
+        for path in plan.cleanup_paths:
+            shutil.rmtree(path, ignore_errors=True)
+
+    elapsed = time.time() - started
+    finished = [r for r in results if r.status == STATUS_FINISHED]
+    failed = sum(1 for r in results if r.status == STATUS_FAILED)
+    media_seconds = sum(r.duration for r in finished)
+    plan.summary = {"event": "summary", "total": plan.total, "finished": len(finished), "failed": failed,
+                    "not_run": plan.total - len(results), "skipped": plan.skipped,
+                    "elapsed": round(elapsed, 3),
+                    "throughput_per_min": round(len(finished) * 60.0 / elapsed, 2) if elapsed > 0 else 0.0,
+                    "media_seconds": round(media_seconds, 3),
+                    "speed": round(media_seconds / elapsed, 2) if elapsed > 0 else 0.0}
+    reporter.summary(plan.summary)
+    return EXIT_OK if len(finished) == plan.total else EXIT_FAILED
+
+
+# =============================================================================
+# 基准测试
+# =============================================================================
+def _load_results(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise CliError(f"无法读取结果文件 {path}: {e}")
+
+
+def _print_comparison(baseline, current, threshold):
+    from benchmark import compare_results, format_comparison
+    rows = compare_results(baseline, current, threshold)
+    print(format_comparison(rows, baseline, current, threshold))
+    return EXIT_FAILED if any(row["regression"] for row in rows) else EXIT_OK
+
+
+def cmd_bench(args, config):
+    from benchmark import run_benchmark, BenchmarkError
+
+    def on_case(index, total, name, result):
+        if result["status"] != "finished":
+            print(f"[{index}/{total}] {name}: {result['status']} (退出码 {result['exit_code']})", file=sys.stderr)
+            return
+        speed = f"{result['speed']:.2f}x" if result["speed"] else "--"
+        cpu = f"{result['cpu_time']:.2f}s" if result["cpu_time"] is not None else "--"
+        rss = f"{result['peak_rss_mb']:.0f}MB" if result["peak_rss_mb"] is not None else "--"
+        print(f"[{index}/{total}] {name}: {result['wall_time']:.2f}s 速度 {speed} CPU {cpu} 内存 {rss}",
+              file=sys.stderr)
+
+    baseline = _load_results(args.baseline) if args.baseline else None
+    try:
+        results = run_benchmark(args.ffmpeg or config.get_ffmpeg_path(), args.media_dir, args.quick,
+                                args.repeat, args.filter, on_case)
+    except BenchmarkError as e:
+        raise CliError(str(e), EXIT_FAILED)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存: {args.output}", file=sys.stderr)
+
+    if baseline is not None:
+        return _print_comparison(baseline, results, args.threshold)
+    failed = sum(1 for r in results["cases"].values() if r["status"] != "finished")
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def cmd_bench_compare(args, config):
+    return _print_comparison(_load_results(args.baseline), _load_results(args.current), args.threshold)
+
+
+def cmd_bench_startup(args, config):
+    from benchmark import run_startup_benchmark, BenchmarkError
+    try:
+        results = run_startup_benchmark(args.repeat, args.offscreen)
+    except BenchmarkError as e:
+        raise CliError(str(e), EXIT_FAILED)
+    for index, run in enumerate(results["runs"], 1):
+        print(f"[{index}/{len(results['runs'])}] 可交互 {run['process_ms']:.0f}ms "
+              f"(main.py {run['tti_ms']:.0f}ms, 导入 {run['imports_ms']:.0f}ms)", file=sys.stderr)
+    median = results["median"]["process_ms"]
+    passed = median <= args.target_ms
+    print(f"中位数: {median:.0f}ms  目标: {args.target_ms:.0f}ms  {'达标' if passed else '未达标'}")
+    return EXIT_OK if passed else EXIT_FAILED
+
+
+# =============================================================================
+# 监视文件夹
+# =============================================================================
+def _watch_event_printer(json_mode):
+    """输出监视事件：--json 时为 JSON 行，否则在标准错误中逐行记录（带时间）"""
+    labels = {"queued": "已稳定，加入队列", "started": "开始处理", "done": "完成", "failed": "失败",
+              "error": "错误"}
+
+    def emit(event):
+        if json_mode:
+            sys.stdout.write(json.dumps(dict(event, time=time.strftime("%Y-%m-%dT%H:%M:%S")),
+                                        ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+            return
+        kind = event["event"]
+        if kind == "watching":
+            line = (f"监视 {event['directory']} ({event['mode']}，同时处理 {event['max_workers']} 个文件)")
+        else:
+            line = f"{labels.get(kind, kind)}: {event['path']}"
+            if kind == "queued":
+                line += f" (排队 {event['queued']} 个)"
+            elif kind == "done":
+                line += f" ({event['elapsed']:.1f}s) -> {', '.join(event['outputs']) or '无输出'}"
+            elif kind == "failed" and event.get("moved_to"):
+                line += f" (已移动到 {event['moved_to']})"
+            elif kind == "error":
+                line += f" ({event['message']})"
+        sys.stderr.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {line}\n")
+        sys.stderr.flush()
+    return emit
+
+
+def cmd_watch(args, config):
+    """监视文件夹，按预设处理写入完成的新文件，结果移动到完成文件夹；收到 SIGINT/SIGTERM 时停止"""
+    import signal
+    import threading
+    from manifest import job_argv, ManifestError
+    from presets import load_preset, PresetError
+    from runner import Runner, STATUS_FINISHED
+    from utils import VIDEO_INPUT_EXTENSIONS, AUDIO_INPUT_EXTENSIONS
+    from watch import WatchFolder
+
+    if not os.path.isdir(args.directory):
+        raise CliError(f"监视的文件夹不存在: {args.directory}")
+    try:
+        preset = load_preset(args.preset)
+        preset_argv = job_argv(preset, {}, os.getcwd())
+    except (PresetError, ManifestError) as e:
+        raise CliError(str(e))
+    extensions = VIDEO_INPUT_EXTENSIONS if preset["operation"] == "video" else AUDIO_INPUT_EXTENSIONS
+
+    parser = build_parser()
+    # 每个文件的各步骤依次执行，同时运行的 FFmpeg 进程数即同时处理的文件数
+    runner = Runner(_ffmpeg_path(args, config), 1, args.log_level)
+    lock = threading.Lock()
+    next_index = [0]
+
+    def process(input_file, work_dir):
+        try:
+            job_args = parser.parse_args(preset_argv[:1] + [input_file, "--output-dir", work_dir] + preset_argv[1:])
+        except SystemExit:
+            raise RuntimeError(f"预设参数无效: {' '.join(preset_argv)}")
+        job_args.ffmpeg, job_args.ffprobe, job_args.overwrite = args.ffmpeg, args.ffprobe, True
+        plan = job_args.planner(job_args, config)
+        try:
+            for stage in plan.stages:
+                with lock:
+                    start_index = next_index[0]
+                    next_index[0] += len(stage)
+                results = runner.run([t["command"] for t in stage], start_index, [t["duration"] for t in stage])
+                failed = [r for r in results if r.status != STATUS_FINISHED]
+                if failed:
+                    log_tail = " | ".join(list(failed[0].log_tail)[-3:])
+                    raise RuntimeError(f"FFmpeg 退出码 {failed[0].exit_code}: {log_tail}")
+        finally:
+            for path in plan.cleanup_paths:
+                shutil.rmtree(path, ignore_errors=True)
+        return True
+
+    watcher = WatchFolder(args.directory, args.done_dir, process, extensions,
+                          max_workers=args.jobs or config.get("max_concurrent_jobs", 0) or _default_workers(),
+                          settle_seconds=args.settle, originals_dir=args.originals_dir, failed_dir=args.failed_dir,
+                          recursive=args.recursive, use_inotify=not args.poll, scan_interval=args.scan_interval,
+                          on_event=_watch_event_printer(args.json))
+
+    def stop(signum, frame):
+        watcher.stop()
+        runner.cancel()  # 正在处理的文件保持原样，下次启动时重新处理
+
+    signal.signal(signal.SIGINT, stop)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, stop)
+    watcher.run(once=args.once)
+    print(f"监视结束：完成 {watcher.finished} 个，失败 {watcher.failed} 个", file=sys.stderr)
+    return EXIT_FAILED if args.once and watcher.failed else EXIT_OK
+
+
+# =============================================================================
+# 参数解析
+# =============================================================================
+def _add_common_options(parser):
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="并行任务数 (默认: 配置文件或按CPU核心数)")
+    parser.add_argument("--json", action="store_true", help="以 JSON 行输出任务事件和进度")
+    parser.add_argument("--dry-run", action="store_true", help="只打印将要执行的命令")
+    parser.add_argument("--ffmpeg", help="FFmpeg 可执行文件 (默认: 配置文件)")
+    parser.add_argument("--ffprobe", help="FFprobe 可执行文件 (默认: 配置文件)")
+    parser.add_argument("--log-level", default="info", help="FFmpeg 日志级别 (默认: info，用于读取输入时长)")
+    parser.add_argument("--overwrite", action=argparse.BooleanOptionalAction, default=None,
+                        help="覆盖已存在的输出 (默认: 配置文件)")
+
+
+def _add_batch_output_options(parser):
+    parser.add_argument("inputs", nargs="+", help="输入文件、文件夹或通配符")
+    parser.add_argument("-o", "--output", help="输出文件 (仅单个输入)")
+    parser.add_argument("--output-dir", help="批量输出目录 (默认: 源文件所在目录，文件名为 <原名>_output.<格式>)")
+    parser.add_argument("--skip-existing", action="store_true", help="跳过已存在的输出")
+
+
+def build_parser():
+    from utils import VIDEO_FORMATS, AUDIO_FORMATS, AUDIO_SAMPLE_RATES
+
+    parser = argparse.ArgumentParser(prog="skydreambox", description="天梦工具箱命令行模式")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p = subparsers.add_parser("convert", help="视频转换 (同“视频处理”页)")
+    _add_batch_output_options(p)
+    p.add_argument("--format", choices=VIDEO_FORMATS, default="mp4")
+    p.add_argument("--vcodec", help="视频编码器 (默认: 该格式的第一个编码器)")
+    p.add_argument("--acodec", help="音频编码器 (默认: 该格式的第一个编码器)")
+    p.add_argument("--abitrate", default="192k")
+    p.add_argument("--crf")
+    p.add_argument("--cq")
+    p.add_argument("--vbitrate")
+    p.add_argument("--fps")
+    p.add_argument("--resolution", help="宽:高 或 720p/1080p/2k/4k")
+    p.add_argument("--subtitle", help="内嵌字幕文件")
+    p.add_argument("--preset", help="编码预设 (libx264/libx265, 如 medium)")
+    p.add_argument("--chunked", action="store_true", help="分段并行编码 (单个输入，仅 CRF/CQ)")
+    p.add_argument("--auto-tune", action="store_true",
+                   help="试编码样本片段，自动选择达到目标质量的最快 CRF/预设 (libx264/libx265，需要 FFprobe)")
+    p.add_argument("--tune-metric", choices=["ssim", "psnr"], default="ssim", help="自动调优的质量指标")
+    p.add_argument("--tune-target", type=float, help="目标质量 (默认: SSIM 0.98 / PSNR 40)")
+    p.add_argument("--auto-copy", action="store_true",
+                   help="源编码与所选编码器相同且未修改参数时直接复制该流 (需要 FFprobe)")
+    p.add_argument("--rendition", action="append", metavar="HEIGHT[:BITRATE[:CODEC]]",
+                   help="一次解码输出多个分辨率，可重复 (如 --rendition 1080:5000k --rendition 720:2800k)，"
+                        "输出为 <原名>_<高度>p.<格式>")
+    p.add_argument("--target-size", type=float, metavar="MB",
+                   help="按目标文件大小两遍编码 (需要 FFprobe，忽略 --crf/--cq/--vbitrate)")
+    _add_common_options(p)
+    p.set_defaults(planner=plan_convert)
+
+    p = subparsers.add_parser("audio", help="音频转换 (同“音频处理”页)")
+    _add_batch_output_options(p)
+    p.add_argument("--format", choices=AUDIO_FORMATS, default="mp3")
+    p.add_argument("--codec", help="编码器 (默认: 该格式的第一个编码器)")
+    p.add_argument("--bitrate", default="192k")
+    p.add_argument("--compression-level", default="5")
+    p.add_argument("--auto-copy", action="store_true",
+                   help="源编码与目标相同且未修改采样率等参数时直接复制 (需要 FFprobe)")
+    p.add_argument("--bit-depth", choices=["8", "16", "24", "32"])
+    p.add_argument("--sample-rate", choices=[r for r in AUDIO_SAMPLE_RATES if r.isdigit()])
+    _add_common_options(p)
+    p.set_defaults(planner=plan_audio)
+
+    p = subparsers.add_parser("mux", help="音视频合并")
+    p.add_argument("--video", required=True)
+    p.add_argument("--audio", required=True)
+    p.add_argument("--subtitle")
+    p.add_argument("-o", "--output", required=True)
+    _add_common_options(p)
+    p.set_defaults(planner=plan_mux)
+
+    p = subparsers.add_parser("demux", help="音视频分离")
+    p.add_argument("inputs", nargs="+", help="输入文件、文件夹或通配符")
+    p.add_argument("--stream", choices=["video", "audio", "both", "all"], default="both",
+                   help="all: 一次读取提取全部视频/音频/字幕流和附件 (需要 FFprobe)")
+    p.add_argument("--skip-existing", action="store_true")
+    _add_common_options(p)
+    p.set_defaults(planner=plan_demux)
+
+    p = subparsers.add_parser("trim", help="视频截取")
+    p.add_argument("input")
+    p.add_argument("-o", "--output", required=True)
+    p.add_argument("--start", help="开始时间 HH:MM:SS[.ms]")
+    p.add_argument("--end", help="结束时间 HH:MM:SS[.ms] (默认: 结尾)")
+    p.add_argument("--smart", action="store_true", help="智能剪切 (逐帧精确，需要 FFprobe)")
+    _add_common_options(p)
+    p.set_defaults(planner=plan_trim)
+
+    p = subparsers.add_parser("img-audio", help="图片 + 音频合成视频")
+    p.add_argument("--image", required=True)
+    p.add_argument("--audio")
+    p.add_argument("-o", "--output")
+    p.add_argument("--album", help="专辑模式: 文件夹中的每首音轨都与 --image 合成，并行处理")
+    p.add_argument("--output-dir", help="专辑模式的输出目录 (默认: 音轨所在文件夹)")
+    p.add_argument("--skip-existing", action="store_true")
+    _add_common_options(p)
+    p.set_defaults(planner=plan_img_audio)
+
+    p = subparsers.add_parser("run", help="按任务清单 (JSON/TOML) 执行")
+    p.add_argument("manifest", help="清单文件 (.json 或 .toml)")
+    p.add_argument("--report", help="将执行结果和吞吐量写入 JSON 报告")
+    _add_common_options(p)
+    p.set_defaults(planner=plan_manifest)
+
+    p = subparsers.add_parser("bench", help="用 lavfi 生成的测试素材对各项操作进行基准测试")
+    p.add_argument("-o", "--output", default="benchmark_results.json", help="结果文件 (默认: benchmark_results.json)")
+    p.add_argument("--baseline", help="与该基线结果比较，发现性能下降时退出码为 1")
+    p.add_argument("--threshold", type=float, default=10.0, help="视为性能下降的增幅百分比 (默认: 10)")
+    p.add_argument("--quick", action="store_true", help="使用更短、更少的测试素材")
+    p.add_argument("--repeat", type=int, default=1, help="每个用例重复次数，取耗时居中的一次")
+    p.add_argument("--filter", default="", help="只运行名称包含该文本的用例 (如 video/720p)")
+    p.add_argument("--media-dir", default=os.path.join(tempfile.gettempdir(), "skydreambox_bench"),
+                   help="测试素材目录，已生成的素材会被复用")
+    p.add_argument("--ffmpeg", help="FFmpeg 可执行文件 (默认: 配置文件)")
+    p.set_defaults(handler=cmd_bench)
+
+    p = subparsers.add_parser("bench-compare", help="比较两次基准测试结果")
+    p.add_argument("baseline")
+    p.add_argument("current")
+    p.add_argument("--threshold", type=float, default=10.0)
+    p.set_defaults(handler=cmd_bench_compare)
+
+    p = subparsers.add_parser("bench-startup", help="测量图形界面的冷启动耗时，超过目标时退出码为 1")
+    p.add_argument("--repeat", type=int, default=5, help="启动次数，取中位数 (默认: 5)")
+    p.add_argument("--target-ms", type=float, default=2000, help="可交互时间目标，毫秒 (默认: 2000)")
+    p.add_argument("--offscreen", action="store_true", help="使用 Qt offscreen 平台 (无显示器环境)")
+    p.set_defaults(handler=cmd_bench_startup)
+
+    p = subparsers.add_parser("watch", help="监视文件夹，按预设自动处理新文件 (常驻运行)")
+    p.add_argument("directory", help="监视的文件夹")
+    p.add_argument("--preset", required=True,
+                   help="预设名称 (视频/音频处理页的“保存为预设”) 或预设 JSON 文件")
+    p.add_argument("--done-dir", required=True, help="完成文件夹，处理结果写完后移动到这里")
+    p.add_argument("--originals-dir", help="处理成功后把源文件移动到该文件夹 (默认: 保留，在完成文件夹中记录)")
+    p.add_argument("--failed-dir", help="处理失败的源文件移动到该文件夹 (默认: 保留，文件变化后重试)")
+    p.add_argument("--recursive", action="store_true", help="同时监视子文件夹")
+    p.add_argument("--settle", type=float, default=10.0,
+                   help="文件大小和修改时间保持不变多少秒后才处理 (默认: 10)")
+    p.add_argument("--poll", action="store_true", help="不使用 inotify，只定期扫描")
+    p.add_argument("--scan-interval", type=float,
+                   help="完整扫描的间隔秒数 (默认: 使用 inotify 时 30，否则 5；用于网络共享上其他机器写入的文件)")
+    p.add_argument("--once", action="store_true", help="处理完现有文件、队列为空时退出")
+    p.add_argument("-j", "--jobs", type=int, default=0, help="同时处理的文件数 (默认: 配置文件或按CPU核心数)")
+    p.add_argument("--json", action="store_true", help="以 JSON 行输出监视事件")
+    p.add_argument("--ffmpeg", help="FFmpeg 可执行文件 (默认: 配置文件)")
+    p.add_argument("--ffprobe", help="FFprobe 可执行文件 (默认: 配置文件)")
+    p.add_argument("--log-level", default="info", help="FFmpeg 日志级别 (默认: info)")
+    p.set_defaults(handler=cmd_watch)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    from config import get_config
+    config = get_config()
+    if hasattr(args, "handler"):
+        try:
+            return args.handler(args, config)
+        except CliError as e:
+            print(f"错误: {e}", file=sys.stderr)
+            return e.exit_code
+    try:
+        plan = args.planner(args, config)
+    except CliError as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return e.exit_code
+    except Exception as e:
+        # 智能剪切/分段编码的准备阶段出错
+        print(f"错误: {e}", file=sys.stderr)
+        return EXIT_FAILED
+
+    if plan.total == 0:
+        print(f"没有需要处理的文件 (跳过 {plan.skipped} 个已存在的输出)", file=sys.stderr)
+        return EXIT_OK if plan.skipped else EXIT_NO_INPUT
+    if args.dry_run:
+        for stage in plan.stages:
+            for task in stage:
+                print(" ".join(task["command"]))
+        for path in plan.cleanup_paths:
+            shutil.rmtree(path, ignore_errors=True)
+        return EXIT_OK
+    exit_code = execute(plan, args, config)
+    if exit_code == EXIT_OK:
+        for check in plan.checks:
+            passed, message = check()
+            print(message, file=sys.stderr)
+            if not passed:
+                exit_code = EXIT_FAILED
+    if getattr(args, "report", None) and plan.summary is not None:
+        write_report(plan, args.report)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
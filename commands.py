@@ -0,0 +1,443 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/commands.py
+# FFmpeg 命令构建模块（不依赖 PySide6，可供界面与批处理共用）
+
+import os
+import re
+import glob
+
+from utils import (
+    WAV_BIT_DEPTH_CODECS, AUDIO_SAMPLE_FORMATS, LOSSY_AUDIO_CODECS,
+    STREAM_EXTRACT_FORMATS, STREAM_TYPE_DEFAULT_EXTENSIONS, ATTACHED_PIC_EXTENSIONS
+)
+
+# 图声合成: 静态图片的帧率和关键帧间隔(帧)，即每 10 秒一个关键帧
+STILL_IMAGE_FPS = 1
+STILL_IMAGE_GOP = 10
+# MP4/MOV 中可以直接复制的音频编码
+IMG_AUDIO_COPY_CODECS = {
+    "mp4": ("aac", "mp3", "alac", "ac3", "eac3", "opus", "flac"),
+    "m4v": ("aac", "mp3", "alac", "ac3", "eac3"),
+    "mov": ("aac", "mp3", "alac", "ac3", "eac3", "pcm_s16le", "pcm_s24le"),
+}
+
+# 目标大小模式中预留给封装格式的比例，以及允许的最低视频码率(kbps)
+CONTAINER_OVERHEAD = 0.02
+MIN_TARGET_VIDEO_KBPS = 50
+
+
+def escape_ffmpeg_filter_path(file_path):
+    if not file_path:
+        return file_path
+    # 转义冒号（FFmpeg滤镜分隔符）
+    escaped = file_path.replace(':', '\\\\:')
+    # 如果路径包含空格，用单引号括起来
+    if ' ' in escaped:
+        escaped = f"'{escaped}'"
+    return escaped
+
+
+# =============================================================================
+# 命令构建
+# =============================================================================
+def build_video_command(input_file, output_file, options):
+    """根据视频选项构建转换命令
+
+    options 键: video_codec, audio_codec, audio_bitrate, crf, cq, preset,
+    video_bitrate, fps, resolution, subtitle（值为空表示不设置）
+    """
+    command = ["ffmpeg", "-i", input_file]
+    command.extend(video_encode_args(options))
+    command.extend(audio_encode_args(options))
+    command.extend(["-y", output_file])
+    return command
+
+
+def video_encode_args(options):
+    """视频编码器、滤镜和码率控制参数（分段编码的每个片段也使用这些参数）"""
+    args = []
+
+    # 将视频滤镜相关的命令存入一个列表
+    video_filters = []
+
+    subtitle_file = options.get("subtitle")
+    if subtitle_file:
+        video_filters.append(f"subtitles={escape_ffmpeg_filter_path(subtitle_file)}")
+
+    video_codec = options.get("video_codec", "libx264")
+    args.extend(["-c:v", video_codec])
+
+    if options.get("resolution"):
+        video_filters.append(f"scale={options['resolution']}")
+
+    # 如果有任何视频滤镜，将它们合并并添加到命令中
+    if video_filters:
+        args.extend(["-vf", ",".join(video_filters)])
+
+    if video_codec != 'copy':
+        if options.get("crf"):
+            if "qsv" in video_codec:
+                args.extend(["-global_quality", options["crf"]])
+            else:
+                args.extend(["-crf", options["crf"]])
+        if options.get("cq"):
+            args.extend(["-cq", options["cq"]])
+        if options.get("preset"):
+            args.extend(["-preset", options["preset"]])
+        if options.get("video_bitrate"):
+            args.extend(["-b:v", options["video_bitrate"]])
+        if options.get("fps"):
+            args.extend(["-r", options["fps"]])
+    return args
+
+
+def audio_encode_args(options):
+    audio_codec = options.get("audio_codec", "aac")
+    args = ["-c:a", audio_codec]
+    if audio_codec != 'copy' and options.get("audio_bitrate"):
+        args.extend(["-b:a", options["audio_bitrate"]])
+    return args
+
+
+# =============================================================================
+# 目标文件大小（两遍编码）
+# =============================================================================
+def bitrate_to_kbps(value):
+    """'192k' / '5M' / '128000' -> kbps，无法解析时返回 None"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([kKmM]?)\s*', str(value or ""))
+    if not match:
+        return None
+    number, unit = float(match.group(1)), match.group(2).lower()
+    if unit == 'm':
+        return number * 1000
+    return number if unit == 'k' else number / 1000
+
+
+def audio_stream_kbps(probe_data):
+    """ffprobe 数据中第一个音频流的码率(kbps)，没有音频流时为 0，码率未知时为 None"""
+    for stream in (probe_data or {}).get("streams", []):
+        if stream.get("codec_type") == "audio":
+            try:
+                return float(stream["bit_rate"]) / 1000
+            except (KeyError, TypeError, ValueError):
+                return None
+    return 0.0
+
+
+def target_video_bitrate(target_mb, duration, audio_kbps, overhead=CONTAINER_OVERHEAD):
+    """按目标大小(MB)和时长计算视频码率(kbps)，预留 overhead 比例给封装开销
+
+    目标过小（扣除音频后不足 MIN_TARGET_VIDEO_KBPS）时抛出 ValueError。
+    """
+    if duration <= 0:
+        raise ValueError("视频时长未知")
+    total_kbps = target_mb * 1024 * 1024 * 8 / 1000 / duration * (1 - overhead)
+    video_kbps = int(total_kbps - audio_kbps)
+    if video_kbps < MIN_TARGET_VIDEO_KBPS:
+        raise ValueError(f"目标大小过小: 扣除音频 {audio_kbps:g} kbps 后视频码率只有 {video_kbps} kbps")
+    return video_kbps
+
+
+def predicted_size_mb(video_kbps, audio_kbps, duration, overhead=CONTAINER_OVERHEAD):
+    """按码率估算输出文件大小(MB)"""
+    return (video_kbps + audio_kbps) * 1000 / 8 * duration / (1 - overhead) / (1024 * 1024)
+
+
+def _pass_args(video_codec, pass_number, passlog):
+    if video_codec == "libx265":
+        # FFmpeg 的 libx265 封装不读取 -pass，需要通过 x265-params 传给编码器；第一遍关闭 slow-firstpass
+        stats = passlog.replace("\\", "/").replace(":", "\\:") + ".log"
+        params = f"pass={pass_number}:stats={stats}"
+        if pass_number == 1:
+            params += ":slow-firstpass=0"
+        return ["-x265-params", params]
+    args = ["-pass", str(pass_number), "-passlogfile", passlog]
+    if pass_number == 1 and video_codec == "libvpx-vp9":
+        args.extend(["-speed", "4"])
+    # libx264 默认 fastfirstpass，第一遍自动使用快速设置
+    return args
+
+
+def build_two_pass_commands(input_file, output_file, options, video_kbps, passlog):
+    """按固定视频码率构建两遍编码的命令，返回 (第一遍, 第二遍)
+
+    第一遍只分析视频（不编码音频，输出到空设备），统计文件保存在 passlog 前缀下；
+    两遍使用相同的滤镜和编码参数，CRF/CQ 不参与。
+    """
+    options = dict(options, crf="", cq="", video_bitrate=f"{video_kbps}k")
+    video_args = video_encode_args(options)
+    codec = options.get("video_codec", "libx264")
+    first = (["ffmpeg", "-i", input_file] + video_args + _pass_args(codec, 1, passlog)
+             + ["-an", "-sn", "-f", "null", "-y", os.devnull])
+    second = (["ffmpeg", "-i", input_file] + video_args + _pass_args(codec, 2, passlog)
+              + audio_encode_args(options) + ["-y", output_file])
+    return first, second
+
+
+# =============================================================================
+# 多分辨率输出（一次解码）
+# =============================================================================
+def ladder_output_path(input_file, label, output_format, output_dir=None):
+    """多分辨率输出的路径: <原文件名>_<标签>.<格式>，如 movie_720p.mp4"""
+    base = os.path.splitext(os.path.basename(input_file))[0]
+    target_dir = output_dir or os.path.dirname(input_file)
+    return os.path.join(target_dir, f"{base}_{label}.{output_format}")
+
+
+def build_ladder_command(input_file, renditions, options):
+    """一个 ffmpeg 进程只解码一次输入，用 split/scale 滤镜同时输出多个分辨率
+
+    renditions: [{"height", "video_codec", "video_bitrate", "output"}]，video_bitrate 为空时使用 options 中的 CRF；
+    options 中的字幕、帧率、预设和音频设置对所有输出生效，分辨率由各输出的 height 决定（宽度按比例取偶数）。
+    """
+    count = len(renditions)
+    pre_filters = []
+    if options.get("subtitle"):
+        pre_filters.append(f"subtitles={escape_ffmpeg_filter_path(options['subtitle'])}")
+    pre_filters.append(f"split={count}" + "".join(f"[s{i}]" for i in range(count)))
+    graph = ["[0:v]" + ",".join(pre_filters)]
+    graph.extend(f"[s{i}]scale=-2:{r['height']}[v{i}]" for i, r in enumerate(renditions))
+
+    command = ["ffmpeg", "-i", input_file, "-filter_complex", ";".join(graph)]
+    for i, rendition in enumerate(renditions):
+        rendition_options = dict(options, video_codec=rendition["video_codec"], resolution="", subtitle="",
+                                 video_bitrate=rendition.get("video_bitrate", ""))
+        if rendition_options["video_bitrate"]:
+            rendition_options.update(crf="", cq="")
+        command.extend(["-map", f"[v{i}]", "-map", "0:a:0?"])
+        command.extend(video_encode_args(rendition_options))
+        command.extend(audio_encode_args(rendition_options))
+        command.extend(["-y", rendition["output"]])
+    return command
+
+
+def build_audio_command(input_file, output_file, options):
+    """根据音频选项构建转换命令
+
+    options 键: format, codec, bitrate, compression_level, bit_depth, sample_rate
+    （bit_depth 为界面中“位深/采样格式”下拉框的文本）
+    """
+    command = ["ffmpeg", "-i", input_file]
+
+    a_format = options.get("format")
+    codec = options.get("codec")
+    if not codec: raise ValueError("未选择任何有效的编码器")
+
+    if a_format == 'wav':
+        wav_codec = WAV_BIT_DEPTH_CODECS.get(options.get("bit_depth"), "pcm_s16le")
+        command.extend(["-c:a", wav_codec])
+    else:
+        command.extend(["-c:a", codec])
+
+        if codec != 'copy':
+            is_lossy = codec in LOSSY_AUDIO_CODECS
+
+            if is_lossy and options.get("bitrate"):
+                command.extend(["-b:a", options["bitrate"]])
+
+            if codec == 'flac' and options.get("compression_level"):
+                command.extend(["-compression_level", options["compression_level"]])
+
+            # 仅为无损编码设置采样格式
+            if not is_lossy:
+                sample_fmt = AUDIO_SAMPLE_FORMATS.get(options.get("bit_depth"))
+                if sample_fmt:
+                    command.extend(["-sample_fmt", sample_fmt])
+
+    if codec != 'copy':
+        sample_rate = options.get("sample_rate")
+        if sample_rate and sample_rate != "(默认)":
+            command.extend(["-ar", sample_rate])
+
+    command.extend(["-y", output_file])
+    return command
+
+
+def _output_args(output_file, overwrite=True):
+    return ["-y", output_file] if overwrite else [output_file]
+
+
+def build_mux_command(video_file, audio_file, output_file, subtitle_file=""):
+    """合并视频、音频（和字幕）流，均直接复制"""
+    command = ["ffmpeg", "-i", video_file, "-i", audio_file]
+    if subtitle_file:
+        command.extend(["-i", subtitle_file])
+    
+    command.extend(["-map", "0:v:0", "-map", "1:a:0"])
+    if subtitle_file:
+        command.extend(["-map", "2:s:0"])
+    
+    command.extend(["-c:v", "copy", "-c:a", "copy"])
+    if subtitle_file:
+        if output_file.endswith('.mp4'):
+            command.extend(["-c:s", "mov_text"])
+        else:
+            command.extend(["-c:s", "copy"])
+            
+    command.extend(["-y", output_file])
+    return command
+
+
+def demux_output_path(input_file, stream_type):
+    """分离出的视频保留原扩展名，音频使用 .mka"""
+    base, ext = os.path.splitext(input_file)
+    if stream_type == 'video':
+        return f"{base}_video_only{ext}"
+    return f"{base}_audio_only.mka"
+
+
+def build_demux_command(input_file, stream_type, overwrite=True):
+    """分离视频流或音频流（stream_type 为 'video' 或 'audio'）"""
+    output_file = demux_output_path(input_file, stream_type)
+    if stream_type == 'video':
+        command = ["ffmpeg", "-i", input_file, "-c:v", "copy", "-an"]
+    elif stream_type == 'audio':
+        command = ["ffmpeg", "-i", input_file, "-c:a", "copy", "-vn"]
+    else:
+        return None
+    return command + _output_args(output_file, overwrite)
+
+
+def _filename_part(text):
+    """用于文件名的标签：只保留字母、数字、'-' 和 '_'"""
+    return re.sub(r'[^\w\-]+', '_', text, flags=re.UNICODE).strip('_')
+
+
+def plan_stream_extraction(input_file, probe_data):
+    """根据 ffprobe 数据列出可提取的流，返回 [{"index", "type", "codec", "language", "output", "codec_args"}]
+
+    视频/音频/字幕按编码选择扩展名（见 STREAM_EXTRACT_FORMATS），封面图片按图片格式保存，附件保存为其原文件名；
+    数据流等无法单独保存的流不在列表中。
+    """
+    base = os.path.splitext(input_file)[0]
+    streams = []
+    for stream in (probe_data or {}).get("streams", []):
+        stream_type = stream.get("codec_type")
+        codec = stream.get("codec_name", "")
+        tags = stream.get("tags") or {}
+        language = tags.get("language", "")
+        language = "" if language == "und" else _filename_part(language)
+        index = stream.get("index")
+        if stream_type == "attachment":
+            filename = _filename_part(os.path.splitext(tags.get("filename", ""))[0])
+            ext = os.path.splitext(tags.get("filename", ""))[1] or ".bin"
+            output = f"{base}_{index}_{filename or 'attachment'}{ext}"
+            codec_args = None
+        elif stream_type in STREAM_TYPE_DEFAULT_EXTENSIONS:
+            ext, convert = STREAM_EXTRACT_FORMATS.get(codec, (STREAM_TYPE_DEFAULT_EXTENSIONS[stream_type], None))
+            if (stream.get("disposition") or {}).get("attached_pic") and codec in ATTACHED_PIC_EXTENSIONS:
+                ext, convert = ATTACHED_PIC_EXTENSIONS[codec], None
+            label = "_".join(part for part in (stream_type, language) if part)
+            output = f"{base}_{index}_{label}.{ext}"
+            codec_args = ["-c", convert or "copy"]
+        else:
+            continue
+        streams.append({"index": index, "type": stream_type, "codec": codec, "language": language,
+                        "output": output, "codec_args": codec_args})
+    return streams
+
+
+def build_extract_all_command(input_file, streams, overwrite=True):
+    """一次读取输入，把 plan_stream_extraction 列出的每个流写入各自的文件
+
+    附件通过输入选项 -dump_attachment 保存，其余每个流一个输出（-map 0:<index>）。
+    """
+    command = ["ffmpeg"]
+    outputs = []
+    for stream in streams:
+        if stream["type"] == "attachment":
+            command.extend([f"-dump_attachment:{stream['index']}", stream["output"]])
+        else:
+            outputs.extend(["-map", f"0:{stream['index']}"] + stream["codec_args"]
+                           + _output_args(stream["output"], overwrite))
+    if not outputs:
+        raise ValueError("没有可以提取的音视频或字幕流")
+    return command + ["-i", input_file] + outputs
+
+
+def img_audio_can_copy(audio_codec_name, output_file):
+    """音频能否直接复制到输出容器（Matroska 支持全部编码，MP4/MOV 只支持常见编码）"""
+    if not audio_codec_name:
+        return False
+    ext = os.path.splitext(output_file)[1].lower().lstrip('.')
+    if ext in ("mkv", "mka"):
+        return True
+    return audio_codec_name in IMG_AUDIO_COPY_CODECS.get(ext, ())
+
+
+def build_img_audio_command(img_file, audio_file, output_file, overwrite=True, audio_codec_name=None,
+                            duration=0):
+    """静态图片 + 音频合成视频
+
+    图片以 STILL_IMAGE_FPS 的低帧率循环编码，GOP 与之匹配（每 STILL_IMAGE_GOP 帧一个关键帧），
+    不必重复编码大量相同的帧；audio_codec_name 为探测到的音频编码，输出容器支持时直接复制音频。
+    duration 为探测到的音频时长：libx264 的前瞻会缓存数十帧，低帧率下 -shortest 要多编码几十秒才生效，
+    因此按音频时长用 -t 限制输出；时长未知时只依赖 -shortest。
+    """
+    command = [
+        "ffmpeg", "-loop", "1", "-framerate", str(STILL_IMAGE_FPS), "-i", img_file,
+        "-i", audio_file,
+        "-map", "0:v", "-map", "1:a:0",
+        # libx264 的 4:2:0 输出要求宽高为偶数；PNG 等 RGB 图片转换为兼容性最好的 yuv420p
+        "-vf", "scale=trunc(iw/2)*2:trunc(ih/2)*2,format=yuv420p",
+        "-c:v", "libx264", "-tune", "stillimage", "-g", str(STILL_IMAGE_GOP),
+    ]
+    if img_audio_can_copy(audio_codec_name, output_file):
+        command.extend(["-c:a", "copy"])
+    else:
+        command.extend(["-c:a", "aac", "-b:a", "192k"])
+    if duration > 0:
+        command.extend(["-t", f"{duration:.3f}"])
+    command.append("-shortest")
+    return command + _output_args(output_file, overwrite)
+
+
+def album_output_path(track_file, output_dir=None, output_format="mp4"):
+    """专辑模式下每首音轨的输出: <音轨文件名>.<格式>"""
+    base = os.path.splitext(os.path.basename(track_file))[0]
+    return os.path.join(output_dir or os.path.dirname(track_file), f"{base}.{output_format}")
+
+
+# =============================================================================
+# 批量处理
+# =============================================================================
+def expand_batch_inputs(pattern, extensions):
+    """将目录或通配符展开为待处理的文件列表
+
+    目录: 处理其中(不递归)扩展名匹配的文件；通配符: 支持 ** 递归匹配。
+    已是本程序输出的文件(文件名以 _output 结尾)会被跳过。
+    """
+    pattern = os.path.expanduser(pattern.strip())
+    if os.path.isdir(pattern):
+        candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+    else:
+        candidates = glob.glob(pattern, recursive=True)
+
+    files = []
+    for path in candidates:
+        stem, ext = os.path.splitext(path)
+        if not os.path.isfile(path) or stem.endswith("_output"):
+            continue
+        if extensions and ext.lower().lstrip('.') not in extensions:
+            continue
+        files.append(os.path.abspath(path))
+    return sorted(files)
+
+
+def batch_output_path(input_file, output_format, output_dir=None):
+    """批量模式下的输出路径: <原文件名>_output.<格式>"""
+    base = os.path.splitext(os.path.basename(input_file))[0]
+    target_dir = output_dir or os.path.dirname(input_file)
+    return os.path.join(target_dir, f"{base}_output.{output_format}")
+
+
+def plan_batch(inputs, output_format, output_dir=None, skip_existing=True):
+    """生成 (输入, 输出) 列表，返回 (计划, 跳过数量)"""
+    plan, skipped = [], 0
+    for input_file in inputs:
+        output_file = batch_output_path(input_file, output_format, output_dir)
+        if skip_existing and os.path.exists(output_file):
+            skipped += 1
+            continue
+        plan.append((input_file, output_file))
+    return plan, skipped
@@ -35,6 +35,18 @@ class Config:
             "ffmpeg_path": "ffmpeg",  # 默认使用系统PATH
             "ffprobe_path": "ffprobe",
             "overwrite_files": True,  # 是否覆盖已存在的文件
+            "max_concurrent_jobs": 0,  # 最大并行任务数，0 表示按CPU核心数自动选择
+            "ffmpeg_log_level": "info",  # 任务日志级别（进度信息不依赖日志）
+            "console_max_lines": 5000,  # 控制台及每个任务在内存中保留的最大日志行数
+            "job_history_max": 200,  # 任务列表中保留的已结束任务数，超出时移除最早的任务及其日志
+            "probe_cache_max_entries": 5000,  # 媒体信息缓存的最大条目数
+            "show_thumbnails": True,  # 在媒体信息中显示关键帧缩略图条
+            "thumbnail_cache_max_files": 2000,  # 缩略图缓存保留的最大文件数
+            "prewarm_tabs": True,  # 启动后在空闲时预加载其他选项卡的模块
+            "auto_stream_copy": True,  # 视频/音频处理页默认勾选“自动复制兼容的流”
+            "chunk_seconds": 60,  # 分段并行编码时每段的目标时长(秒)
+            "resume_interrupted_jobs": True,  # 启动时重新执行上次意外中断的任务
+            "job_journal_max_entries": 2000,  # 任务日志库保留的最大记录数
         }
     
     def load(self):
@@ -115,36 +127,13 @@ class Config:
     
     def _check_system_ffmpeg(self, command):
         """检查系统PATH中的FFmpeg/FFprobe"""
-        import subprocess
-        try:
-            result = subprocess.run(
-                [command, "-version"],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            return result.returncode == 0
-        except (subprocess.SubprocessError, FileNotFoundError):
-            return False
+        from capabilities import check_binary
+        return check_binary(command)["ok"]
     
     def _check_executable(self, path, is_ffprobe=False):
         """检查可执行文件是否有效"""
-        import subprocess
-        try:
-            if is_ffprobe:
-                cmd = [str(path), "-version"]
-            else:
-                cmd = [str(path), "-version"]
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            return result.returncode == 0
-        except (subprocess.SubprocessError, FileNotFoundError):
-            return False
+        from capabilities import check_binary
+        return check_binary(str(path), with_encoders=not is_ffprobe)["ok"]
     
     @property
     def ffmpeg_path(self):
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/job_journal.py
+# 任务日志库（SQLite）：记录每个任务的命令、状态、退出码、时间和输出路径，
+# 程序或系统意外退出后，下次启动时据此恢复未完成的任务
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+
+DEFAULT_MAX_ENTRIES = 2000
+
+# 与 job_queue 中的任务状态一致，另加已被新任务取代的 requeued
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_REQUEUED = "requeued"
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+# 这些输出不是文件，不需要清理
+_NON_FILE_OUTPUTS = ("-", os.devnull, "NUL", "/dev/null")
+
+
+def output_path_from_args(args):
+    """从 ffmpeg 参数中取出输出文件（最后一个参数），输出到管道或空设备时返回空字符串"""
+    if not args:
+        return ""
+    output = args[-1]
+    if output.startswith("-") or output in _NON_FILE_OUTPUTS:
+        return ""
+    # pipe:1、udp://... 等协议地址（Windows 盘符只有一个字母）
+    scheme = output.split(":", 1)[0]
+    if ":" in output and len(scheme) > 1 and scheme.isalpha():
+        return ""
+    return os.path.abspath(output)
+
+
+def _pid_alive(pid):
+    """判断进程是否仍在运行（用于区分其他正在运行的实例和已退出的会话）"""
+    if pid == os.getpid():
+        return True
+    if sys.platform == "win32":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+class JobJournal:
+    """任务日志库，每次状态变化立即提交，崩溃后数据库仍保持一致"""
+
+    def __init__(self, db_path, max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_path = str(db_path)
+        self.max_entries = max_entries
+        self.pid = os.getpid()
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # WAL 模式下写入为追加，断电时最多丢失最后一次提交，不会损坏数据库
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, pid INTEGER, args TEXT, description TEXT,"
+            " command_display TEXT, output_path TEXT, status TEXT, exit_code INTEGER,"
+            " priority INTEGER, duration REAL, track_progress INTEGER, depends_on TEXT,"
+            " cleanup_paths TEXT, submitted_at REAL, started_at REAL, finished_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+        # 任务运行期间的资源占用时间序列 (见 proc_stats.ResourceSampler)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_samples ("
+            " job_id INTEGER, time REAL, cpu_percent REAL, threads INTEGER, rss_mb REAL,"
+            " read_bytes INTEGER, write_bytes INTEGER)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS job_samples_job ON job_samples (job_id)")
+        self._conn.commit()
+
+    def record(self, job):
+        """记录新提交的任务，返回日志库中的编号（同时保存到 job.journal_id）"""
+        depends_on = [dep.journal_id for dep in job.depends_on if dep.journal_id is not None]
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (pid, args, description, command_display, output_path, status, exit_code,"
+                " priority, duration, track_progress, depends_on, cleanup_paths, submitted_at, started_at,"
+                " finished_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.pid, json.dumps(job.args, ensure_ascii=False), job.description, job.command_display,
+                 job.output_path, job.status, job.exit_code, job.priority, job.duration,
+                 int(job.progress_parser is not None), json.dumps(depends_on),
+                 json.dumps(job.cleanup_paths, ensure_ascii=False), job.submitted_at, job.started_at,
+                 job.finished_at)
+            )
+            self._conn.commit()
+        job.journal_id = cursor.lastrowid
+        return job.journal_id
+
+    def update(self, job):
+        """保存任务的当前状态、退出码和时间"""
+        if job.journal_id is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, exit_code = ?, started_at = ?, finished_at = ? WHERE id = ?",
+                (job.status, job.exit_code, job.started_at, job.finished_at, job.journal_id)
+            )
+            self._conn.commit()
+
+    def save_samples(self, job):
+        """保存任务的资源占用时间序列（任务结束时一次写入）"""
+        if job.journal_id is None or not job.resource_samples:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO job_samples (job_id, time, cpu_percent, threads, rss_mb, read_bytes, write_bytes)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(job.journal_id, s["time"], s["cpu_percent"], s["threads"], s["rss_mb"],
+                  s["read_bytes"], s["write_bytes"]) for s in job.resource_samples]
+            )
+            self._conn.commit()
+
+    def samples(self, journal_id):
+        """返回任务的资源占用时间序列 [{"time", "cpu_percent", "threads", "rss_mb", "read_bytes", "write_bytes"}]"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT time, cpu_percent, threads, rss_mb, read_bytes, write_bytes FROM job_samples"
+                " WHERE job_id = ? ORDER BY time", (journal_id,))
+            return [self._row_dict(cursor, row, json_columns=()) for row in cursor.fetchall()]
+
+    def set_status(self, journal_id, status):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET status = ?, finished_at = ? WHERE id = ?",
+                               (status, time.time(), journal_id))
+            self._conn.commit()
+
+    def get(self, journal_id):
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (journal_id,))
+            row = cursor.fetchone()
+            return self._row_dict(cursor, row) if row else None
+
+    def interrupted(self):
+        """返回已退出的会话中未完成（排队中/运行中）的任务，按提交顺序排列"""
+        with self._lock:
+            cursor = self._conn.execute(
+                f"SELECT * FROM jobs WHERE status IN ({','.join('?' * len(ACTIVE_STATUSES))}) ORDER BY id",
+                ACTIVE_STATUSES
+            )
+            rows = [self._row_dict(cursor, row) for row in cursor.fetchall()]
+        alive = {}
+        result = []
+        for row in rows:
+            pid = row["pid"]
+            if pid not in alive:
+                alive[pid] = _pid_alive(pid)
+            if not alive[pid]:
+                result.append(row)
+        return result
+
+    def prune(self):
+        """删除超出 max_entries 的已结束任务记录（从最早的开始）"""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    f"DELETE FROM jobs WHERE id IN (SELECT id FROM jobs WHERE status NOT IN "
+                    f"({','.join('?' * len(ACTIVE_STATUSES))}) ORDER BY id ASC LIMIT ?)",
+                    ACTIVE_STATUSES + (excess,)
+                )
+                self._conn.execute("DELETE FROM job_samples WHERE job_id NOT IN (SELECT id FROM jobs)")
+                self._conn.commit()
+
+    @staticmethod
+    def _row_dict(cursor, row, json_columns=("args", "depends_on", "cleanup_paths")):
+        data = {column[0]: value for column, value in zip(cursor.description, row)}
+        for key in json_columns:
+            data[key] = json.loads(data[key] or "[]")
+        return data
+
+
+# 全局日志库实例
+_journal_instance = None
+
+def get_job_journal():
+    """获取全局任务日志库实例"""
+    global _journal_instance
+    if _journal_instance is None:
+        from config import get_config
+        config = get_config()
+        _journal_instance = JobJournal(config.config_dir / "job_journal.sqlite3",
+                                       config.get("job_journal_max_entries", DEFAULT_MAX_ENTRIES))
+    return _journal_instance
@@ -0,0 +1,434 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/job_queue.py
+# 任务队列模块：以可配置数量的 QProcess 并行执行 FFmpeg 任务
+
+import os
+import heapq
+import shutil
+import itertools
+import time
+from collections import deque
+
+from PySide6.QtCore import QObject, QProcess, QTimer, Signal
+
+from progress import ProgressParser, ProgressEstimator, input_file_from_args, merge_progress
+import proc_stats
+import profiler
+from log_buffer import LogBuffer, DEFAULT_MAX_LINES, spool_dir
+from runner import default_worker_count
+
+# 任务状态
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_FINISHED = "finished"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+RESOURCE_SAMPLE_INTERVAL_MS = 1000
+DEFAULT_HISTORY_MAX = 200  # 队列中保留的已结束任务数
+
+JOB_STATUS_TEXT = {
+    JOB_QUEUED: "排队中",
+    JOB_RUNNING: "运行中",
+    JOB_FINISHED: "已完成",
+    JOB_FAILED: "失败",
+    JOB_CANCELLED: "已取消",
+}
+
+
+class Job:
+    """队列中的单个FFmpeg任务"""
+
+    def __init__(self, job_id, args, description="", priority=0, duration=0, group=None,
+                 track_progress=False, log_max_lines=DEFAULT_MAX_LINES, depends_on=None,
+                 cleanup_paths=None, total_frames=0):
+        self.id = job_id
+        self.args = args
+        self.description = description
+        self.command_display = ""  # 显示给用户的完整命令
+        self.priority = priority
+        self.duration = duration  # 输入时长(秒)，用于计算进度
+        self.total_frames = total_frames  # 输入帧数，时长未知时用于计算进度
+        self.group = group
+        self.depends_on = list(depends_on or [])  # 这些任务成功完成后才会开始
+        self.cleanup_paths = list(cleanup_paths or [])  # 任务结束后删除的临时文件/目录
+        self.output_path = ""  # 输出文件，意外中断后恢复任务时删除不完整的输出
+        self.journal_id = None  # 在任务日志库中的编号
+        self.resource_sampler = None
+        self.resource_samples = []  # 运行期间子进程资源占用的时间序列 (见 proc_stats.ResourceSampler)
+        self.status = JOB_QUEUED
+        self.progress = 0
+        self.status_text = ""
+        self.exit_code = None
+        self.log = LogBuffer(log_max_lines, os.path.join(spool_dir(), f"job_{job_id}.log"))
+        # 标准输出为 -progress 进度流时的解析器
+        self.progress_parser = ProgressParser() if track_progress else None
+        self.out_time_sec = 0.0
+        self.frame = 0
+        self.fps = 0.0
+        self.speed = 0.0
+        self.total_size = 0
+        # 进度依据: "duration" / "frames" / "bytes"（输入文件的读取位置），无法计算时为 None
+        self.progress_source = None
+        self.eta = None  # 平滑后的剩余秒数
+        self.estimator = ProgressEstimator()
+        self.input_path = input_file_from_args(args)
+        self.input_size = 0
+        self._input_fd = None
+        self.process = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def apply_progress(self, snapshot):
+        """应用一个 -progress 进度块（为 N/A 的字段沿用之前的值）"""
+        # 按时长或帧数计算进度时，对应字段为 N/A（编码器清空缓冲）则进度和剩余时间保持不变
+        basis = 'out_time_sec' if self.duration > 0 else 'frame' if self.total_frames > 0 else None
+        advanced = basis is None or snapshot[basis] is not None
+        snapshot = merge_progress({'out_time_sec': self.out_time_sec, 'frame': self.frame, 'fps': self.fps,
+                                   'speed': self.speed, 'total_size': self.total_size}, snapshot)
+        self.out_time_sec = snapshot['out_time_sec']
+        self.frame = snapshot['frame']
+        self.fps = snapshot['fps']
+        if not self.fps and self.frame and self.started_at:
+            # 部分版本在开始阶段报告 fps=0，按已用时间估算
+            elapsed = time.time() - self.started_at
+            self.fps = self.frame / elapsed if elapsed > 0 else 0.0
+        self.speed = snapshot['speed']
+        self.total_size = snapshot['total_size']
+        if not advanced:
+            return
+        fraction, self.progress_source = self._completed_fraction()
+        if fraction is not None:
+            fraction = min(1.0, max(0.0, fraction))
+            self.progress = int(fraction * 100)
+            self.eta = self.estimator.update(fraction)
+
+    def _completed_fraction(self):
+        """返回 (完成比例, 依据)：优先按输出时长，其次按帧数，最后按输入文件的读取位置"""
+        if self.duration > 0:
+            return self.out_time_sec / self.duration, "duration"
+        if self.total_frames > 0:
+            return self.frame / self.total_frames, "frames"
+        position = self._input_position()
+        if position is not None:
+            return position / self.input_size, "bytes"
+        return None, None
+
+    def _input_position(self):
+        if not self.input_path or not self.process or not proc_stats.supported():
+            return None
+        pid = self.process.processId()
+        if self._input_fd is None:
+            self._input_fd = proc_stats.find_open_file(pid, self.input_path)
+            if self._input_fd is None:
+                return None
+        try:
+            self.input_size = os.path.getsize(self.input_path)
+        except OSError:
+            return None
+        if self.input_size <= 0:
+            return None
+        return proc_stats.read_file_position(pid, self._input_fd)
+
+    def release(self):
+        """释放已结束任务占用的日志、临时文件和资源采样"""
+        self.log.discard()
+        self.resource_samples = []
+        self.progress_parser = None
+        self.depends_on = []
+
+    @property
+    def resources(self):
+        """最近一次资源采样，未采样时为 None"""
+        return self.resource_samples[-1] if self.resource_samples else None
+
+    @property
+    def is_active(self):
+        return self.status in (JOB_QUEUED, JOB_RUNNING)
+
+    @property
+    def status_display(self):
+        return JOB_STATUS_TEXT.get(self.status, self.status)
+
+
+class JobGroup:
+    """一组相关任务（如一次批量处理），用于统计整体吞吐量和剩余时间"""
+
+    def __init__(self, name):
+        self.name = name
+        self.jobs = []
+        self.skipped = 0
+        self.created_at = time.time()
+        # 已从队列中移除的任务只保留计数
+        self._removed = 0
+        self._removed_failed = 0
+
+    def forget(self, job):
+        """移除一个已结束的任务，统计中仍计入"""
+        self.jobs.remove(job)
+        self._removed += 1
+        if job.status == JOB_FAILED:
+            self._removed_failed += 1
+
+    @property
+    def total(self):
+        return len(self.jobs) + self._removed
+
+    @property
+    def done_count(self):
+        return self._removed + sum(1 for job in self.jobs if not job.is_active)
+
+    @property
+    def failed_count(self):
+        return self._removed_failed + sum(1 for job in self.jobs if job.status == JOB_FAILED)
+
+    @property
+    def is_active(self):
+        return any(job.is_active for job in self.jobs)
+
+    def _completed_units(self):
+        # 已完成任务计为1，运行中的任务按进度折算
+        return self._removed + sum(1.0 if not job.is_active else job.progress / 100.0 for job in self.jobs)
+
+    def speed(self):
+        """正在运行的任务的合计处理速度（相对实时播放的倍数）"""
+        return sum(job.speed for job in self.jobs if job.status == JOB_RUNNING)
+
+    def throughput(self):
+        """每分钟完成的任务数"""
+        elapsed = time.time() - self.created_at
+        if elapsed <= 0:
+            return 0.0
+        return self.done_count * 60.0 / elapsed
+
+    def eta_seconds(self):
+        """根据已完成的工作量估算剩余秒数，无法估算时返回 None"""
+        units = self._completed_units()
+        if units <= 0:
+            return None
+        elapsed = time.time() - self.created_at
+        return elapsed / units * (self.total - units)
+
+
+class JobQueue(QObject):
+    """FFmpeg任务队列：按优先级/先进先出调度，最多同时运行 max_workers 个进程
+
+    已结束的任务最多保留 history_max 个，超出时移除最早结束的任务并释放其日志（发出 job_removed）。
+    """
+
+    job_added = Signal(object)
+    job_started = Signal(object)
+    job_output = Signal(object, str)
+    job_progress = Signal(object)
+    job_resources = Signal(object)
+    job_updated = Signal(object)
+    job_finished = Signal(object)
+    job_removed = Signal(object)
+
+    def __init__(self, program_getter, max_workers=0, parent=None, log_max_lines=DEFAULT_MAX_LINES,
+                 history_max=DEFAULT_HISTORY_MAX):
+        super().__init__(parent)
+        self._program_getter = program_getter
+        self._log_max_lines = log_max_lines
+        self._max_workers = max_workers if max_workers > 0 else default_worker_count()
+        self._ids = itertools.count(1)
+        self._pending = []  # 堆: (-priority, 序号, job)
+        self._running = {}
+        self.jobs = []
+        self._history_max = max(0, history_max)
+        self._finished = deque()  # 按结束顺序排列的已结束任务
+        # 定时读取运行中子进程的资源占用（仅 Linux）
+        self._sample_timer = QTimer(self)
+        self._sample_timer.setInterval(RESOURCE_SAMPLE_INTERVAL_MS)
+        self._sample_timer.timeout.connect(self._sample_resources)
+        self._sampling_supported = proc_stats.supported()
+
+    @property
+    def max_workers(self):
+        return self._max_workers
+
+    def set_max_workers(self, count):
+        self._max_workers = count if count > 0 else default_worker_count()
+        self._schedule()
+
+    def running_jobs(self):
+        return list(self._running.values())
+
+    def pending_count(self):
+        return sum(1 for *_, job in self._pending if job.status == JOB_QUEUED)
+
+    def submit(self, args, description="", priority=0, duration=0, group=None, track_progress=False,
+               depends_on=None, cleanup_paths=None, total_frames=0):
+        """加入一个任务，返回 Job 对象
+
+        track_progress 为 True 时，标准输出按 `-progress` 进度流解析，不计入日志。
+        depends_on 中的任务全部成功后才会开始；其中任一失败或取消时本任务随之取消。
+        """
+        job = Job(next(self._ids), args, description, priority, duration, group, track_progress,
+                  self._log_max_lines, depends_on, cleanup_paths, total_frames)
+        if group is not None:
+            group.jobs.append(job)
+        self.jobs.append(job)
+        heapq.heappush(self._pending, (-priority, job.id, job))
+        self.job_added.emit(job)
+        self._schedule()
+        return job
+
+    def promote(self, job):
+        """将排队中的任务提到队首"""
+        if job.status != JOB_QUEUED:
+            return False
+        top = max((j.priority for *_, j in self._pending), default=job.priority)
+        job.priority = top + 1
+        self._pending = [entry for entry in self._pending if entry[2] is not job]
+        heapq.heapify(self._pending)
+        heapq.heappush(self._pending, (-job.priority, job.id, job))
+        self.job_updated.emit(job)
+        return True
+
+    def cancel(self, job):
+        """取消排队中或运行中的任务"""
+        if job.status == JOB_QUEUED:
+            self._finish(job, JOB_CANCELLED, None)
+            self._schedule()
+            return True
+        if job.status == JOB_RUNNING and job.process:
+            job.status = JOB_CANCELLED
+            job.process.kill()
+            return True
+        return False
+
+    def cancel_all(self):
+        for job in list(self.jobs):
+            self.cancel(job)
+
+    def remove(self, job):
+        """从队列中移除一个已结束的任务并释放其日志"""
+        if job.is_active or job not in self.jobs:
+            return False
+        self.jobs.remove(job)
+        if job.group is not None:
+            job.group.forget(job)
+        job.release()
+        self.job_removed.emit(job)
+        return True
+
+    def _trim_history(self):
+        while len(self._finished) > self._history_max:
+            self.remove(self._finished.popleft())
+
+    def _schedule(self):
+        waiting = []
+        while len(self._running) < self._max_workers and self._pending:
+            entry = heapq.heappop(self._pending)
+            job = entry[2]
+            if job.status != JOB_QUEUED:
+                continue
+            if any(dep.is_active for dep in job.depends_on):
+                waiting.append(entry)
+                continue
+            self._start(job)
+        for entry in waiting:
+            heapq.heappush(self._pending, entry)
+
+    def _start(self, job):
+        process = QProcess(self)
+        job.process = process
+        job.status = JOB_RUNNING
+        job.started_at = time.time()
+        self._running[job.id] = job
+
+        process.readyReadStandardOutput.connect(lambda: self._read_output(job, stderr=False))
+        process.readyReadStandardError.connect(lambda: self._read_output(job, stderr=True))
+        process.finished.connect(lambda code, status: self._on_process_finished(job, code, status))
+        process.errorOccurred.connect(lambda error: self._on_process_error(job, error))
+
+        self.job_started.emit(job)
+        process.start(self._program_getter(), job.args)
+        if self._sampling_supported and not self._sample_timer.isActive():
+            self._sample_timer.start()
+
+    def _sample_resources(self):
+        for job in list(self._running.values()):
+            if job.resource_sampler is None:
+                pid = job.process.processId() if job.process else 0
+                if not pid:
+                    continue
+                job.resource_sampler = proc_stats.ResourceSampler(pid)
+            sample = job.resource_sampler.sample()
+            if sample is not None:
+                job.resource_samples.append(sample)
+                self.job_resources.emit(job)
+        if not self._running:
+            self._sample_timer.stop()
+
+    @profiler.traced(cat="output")
+    def _read_output(self, job, stderr):
+        process = job.process
+        if not process:
+            return
+        if stderr:
+            data = process.readAllStandardError()
+        else:
+            data = process.readAllStandardOutput()
+        text = data.data().decode('utf-8', 'ignore')
+        if not text:
+            return
+        if not stderr and job.progress_parser:
+            snapshots = job.progress_parser.feed(text)
+            if snapshots:
+                # 只需最新的进度
+                job.apply_progress(snapshots[-1])
+                self.job_progress.emit(job)
+            return
+        job.log.append(text)
+        self.job_output.emit(job, text)
+
+    def _on_process_finished(self, job, exit_code, exit_status):
+        # 读取缓冲区中剩余的输出
+        self._read_output(job, stderr=False)
+        self._read_output(job, stderr=True)
+        if job.status == JOB_CANCELLED:
+            self._finish(job, JOB_CANCELLED, exit_code)
+        elif exit_status == QProcess.ExitStatus.NormalExit and exit_code == 0:
+            job.progress = 100
+            self._finish(job, JOB_FINISHED, exit_code)
+        else:
+            self._finish(job, JOB_FAILED, exit_code)
+        self._schedule()
+
+    def _on_process_error(self, job, error):
+        # 只有启动失败时不会收到 finished 信号
+        if error == QProcess.ProcessError.FailedToStart and job.status == JOB_RUNNING:
+            job.log.append(f"无法启动进程: {job.process.errorString()}\n")
+            self._finish(job, JOB_FAILED, -1)
+            self._schedule()
+
+    def _finish(self, job, status, exit_code):
+        job.status = status
+        job.exit_code = exit_code
+        job.finished_at = time.time()
+        job.log.flush()
+        self._running.pop(job.id, None)
+        job.resource_sampler = None
+        if job.process:
+            job.process.deleteLater()
+            job.process = None
+        for path in job.cleanup_paths:
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        self.job_finished.emit(job)
+        if status != JOB_FINISHED:
+            # 依赖本任务的后续任务无法执行
+            for dependent in list(self.jobs):
+                if dependent.status == JOB_QUEUED and job in dependent.depends_on:
+                    dependent.log.append(f"前置任务 #{job.id} 未成功完成，已取消\n")
+                    self._finish(dependent, JOB_CANCELLED, None)
+        self._finished.append(job)
+        self._trim_history()
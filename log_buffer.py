@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/log_buffer.py
+# 有界日志缓冲：内存中只保留最近的若干行，完整日志写入磁盘临时文件
+
+import os
+import shutil
+import atexit
+import tempfile
+from collections import deque
+
+DEFAULT_MAX_LINES = 5000
+_FLUSH_THRESHOLD = 64 * 1024  # 未写入磁盘的数据超过该大小时立即写入
+
+_spool_dir = None
+
+
+def spool_dir():
+    """本次运行的日志临时目录（退出时删除）"""
+    global _spool_dir
+    if _spool_dir is None:
+        _spool_dir = tempfile.mkdtemp(prefix="skydreambox_logs_")
+        atexit.register(shutil.rmtree, _spool_dir, ignore_errors=True)
+    return _spool_dir
+
+
+class LogBuffer:
+    """环形日志缓冲区
+
+    内存中最多保留 max_lines 行；若指定 spool_path，所有内容会分批追加到该文件，
+    可通过 save() 导出完整日志。
+    """
+
+    def __init__(self, max_lines=DEFAULT_MAX_LINES, spool_path=None):
+        self._lines = deque(maxlen=max(1, max_lines))
+        self._partial = ""
+        self._spool_path = spool_path
+        self._unflushed = []
+        self._unflushed_size = 0
+        self.total_lines = 0
+
+    @property
+    def dropped_lines(self):
+        """已被移出内存的行数"""
+        return self.total_lines - len(self._lines)
+
+    def append(self, text):
+        if not text:
+            return
+        if self._spool_path:
+            self._unflushed.append(text)
+            self._unflushed_size += len(text)
+            if self._unflushed_size >= _FLUSH_THRESHOLD:
+                self.flush()
+        parts = (self._partial + text).split('\n')
+        self._partial = parts[-1]
+        self._lines.extend(parts[:-1])
+        self.total_lines += len(parts) - 1
+
+    def text(self):
+        """内存中保留的日志文本"""
+        lines = list(self._lines)
+        if self._partial:
+            lines.append(self._partial)
+        return "\n".join(lines)
+
+    def flush(self):
+        if not self._spool_path or not self._unflushed:
+            return
+        try:
+            with open(self._spool_path, 'a', encoding='utf-8') as f:
+                f.write("".join(self._unflushed))
+        except OSError as e:
+            print(f"写入日志文件失败: {e}")
+        self._unflushed = []
+        self._unflushed_size = 0
+
+    def discard(self):
+        """丢弃内存中的日志并删除磁盘临时文件（任务从列表中移除时调用）"""
+        self._lines.clear()
+        self._partial = ""
+        self._unflushed = []
+        self._unflushed_size = 0
+        if self._spool_path:
+            try:
+                os.remove(self._spool_path)
+            except OSError:
+                pass
+            self._spool_path = None
+
+    def save(self, path):
+        """导出完整日志，返回是否成功"""
+        try:
+            if self._spool_path:
+                self.flush()
+                if os.path.exists(self._spool_path):
+                    shutil.copyfile(self._spool_path, path)
+                    return True
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.text())
+            return True
+        except OSError as e:
+            print(f"保存日志失败: {e}")
+            return False
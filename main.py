@@ -6,25 +6,38 @@ import os
 import json
 import datetime
 import time
+import argparse
+
+# 进程启动（导入 Qt 之前）的时间，用于 --startup-benchmark
+_STARTED_AT = time.perf_counter()
 
 from PySide6.QtWidgets import (
-    QApplication, QMainWindow, QFileDialog, QMessageBox, QWidget
+    QApplication, QMainWindow, QFileDialog, QMessageBox, QWidget, QTableWidgetItem
 )
-from PySide6.QtCore import QProcess, Qt, QTimer
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QIcon, QPixmap
 
 # --- UI 和逻辑分离 ---
 from constants import APP_NAME
+from config import get_config
 from ui.main_window_ui import Ui_MainWindow
 from ui.splash_screen_ui import CustomSplashScreen
 from process_handler import ProcessHandler
-from ui_tabs import (
-    VideoTab, AudioTab, MuxingTab, DemuxingTab, CommonOperationsTab, ProfessionalTab, SettingsTab, AboutTab
-)
+from probe_cache import get_probe_cache, video_frame_count, count_video_packets
+from thumbnails import get_thumbnail_cache, has_video
+from background import run_in_background
+from job_queue import JOB_FINISHED, JOB_RUNNING
+from proc_stats import format_sample, summarize
+import profiler
+from ui_tabs import TAB_CLASSES, load_tab_class
 from utils import (
-    STYLESHEET, PROGRESS_RE, time_str_to_seconds, resource_path, format_media_info
+    STYLESHEET, resource_path, format_media_info
 )
 
+_IMPORTED_AT = time.perf_counter()
+# 窗口显示后多久开始预加载其他选项卡的模块
+PREWARM_DELAY_MS = 500
+
 
 class MainWindow(QMainWindow, Ui_MainWindow):
     def __init__(self, splash=None):
@@ -35,15 +48,12 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
         # 设置UI
         self.setupUi(self)
+        self.console.set_max_lines(get_config().get("console_max_lines", 5000))
         self.process_handler = ProcessHandler(self)
 
+        # FFmpeg/FFprobe 检测在后台线程中进行，与界面构建同时完成
         self.update_splash("正在检查 FFmpeg 引擎...", 30)
-        is_ffmpeg_ready, message = self.process_handler.check_ffmpeg()
-        if not is_ffmpeg_ready:
-            self.setWindowTitle("核心组件错误")
-            self._show_ffmpeg_error_and_exit(message)
-            QTimer.singleShot(100, self.close)
-            return
+        self.process_handler.start_ffmpeg_check()
 
         self.update_splash("正在加载视觉元素...", 50)
         logo_path = resource_path("assets/logo.png")
@@ -54,30 +64,48 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.setGeometry(50, 50, 750, 850) # 设置主窗口初始大小
 
         self.initialized_tabs = {}
-        self.tab_constructors = {
-            "视频处理": VideoTab, "音频处理": AudioTab, "音视频合并": MuxingTab,
-            "音视频分离": DemuxingTab, "常用工具": CommonOperationsTab, "专业命令": ProfessionalTab,
-            "设置": SettingsTab, "关于": AboutTab
-        }
         
         self.total_duration_sec = 0
-        self.last_progress_text = ""
+        self.total_frames = 0  # 视频帧数，时长未知时用于计算进度
+        self.probe_data = None  # 最近一次选择的媒体文件的 ffprobe 数据
+        self.probe_path = ""
+        self.displayed_job = None  # 控制台和进度条当前显示的任务
+        self.current_group = None  # 最近一次提交的任务组（批量处理）
+        self.job_rows = {}  # 任务编号 -> 任务列表中该行的第一个单元格
 
         self.update_splash("正在构建用户界面...", 70)
         self._setup_tabs()
 
+        self.update_splash("正在确认 FFmpeg 引擎...", 80)
+        is_ffmpeg_ready, message = self.process_handler.check_ffmpeg()
+        if not is_ffmpeg_ready:
+            self.setWindowTitle("核心组件错误")
+            self._show_ffmpeg_error_and_exit(message)
+            QTimer.singleShot(100, self.close)
+            return
+
         self.update_splash("正在连接功能模块...", 90)
         self._connect_signals()
+        self.process_handler.start_video_encoder_detection(self._on_video_encoders_detected)
+        # 首次检测可能需要数十秒，退出时停止检测，不必等待其完成
+        QApplication.instance().aboutToQuit.connect(self.process_handler.stop_video_encoder_detection)
+        if get_config().get("resume_interrupted_jobs", True):
+            self._resume_interrupted_jobs()
+
+        if get_config().get("prewarm_tabs", True):
+            # 窗口显示后在空闲时依次导入其他选项卡的模块，切换时只需构建界面
+            self._prewarm_queue = list(TAB_CLASSES)[1:]
+            QTimer.singleShot(PREWARM_DELAY_MS, self._prewarm_next_tab)
 
         self.update_splash("初始化完成，即将启动!", 100)
 
 
     def update_splash(self, message, progress):
+        # --profile: 每条启动信息为一个阶段，到下一条信息时结束
+        profiler.phase("startup", message if progress < 100 else None)
         if self.splash:
             self.splash.showMessage(message)
             self.splash.setProgress(progress)
-            if progress == 100:
-                time.sleep(0.3)
 
     def _show_ffmpeg_error_and_exit(self, message):
         error_box = QMessageBox(self)
@@ -88,7 +116,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         error_box.exec()
 
     def _setup_tabs(self):
-        for name in self.tab_constructors.keys():
+        for name in TAB_CLASSES:
             placeholder_widget = QWidget()
             self.tabs.addTab(placeholder_widget, name)
             
@@ -97,9 +125,9 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             return
 
         tab_name = self.tabs.tabText(index)
-        if tab_name in self.tab_constructors:
-            constructor = self.tab_constructors[tab_name]
-            tab_widget = constructor(self)
+        if tab_name in TAB_CLASSES:
+            with profiler.span("_initialize_tab", "tab", tab=tab_name):
+                tab_widget = load_tab_class(tab_name)(self)
             
             self.initialized_tabs[index] = tab_widget
             
@@ -107,14 +135,52 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             self.tabs.insertTab(index, tab_widget, tab_name)
             self.tabs.setCurrentIndex(index)
 
+    def _prewarm_next_tab(self):
+        # 每次只导入一个模块，之间让出事件循环，不影响界面响应
+        if not self._prewarm_queue:
+            return
+        load_tab_class(self._prewarm_queue.pop(0))
+        QTimer.singleShot(0, self._prewarm_next_tab)
+
+    def report_startup(self):
+        """--startup-benchmark: 首个选项卡构建完成、事件循环空闲后输出启动耗时并退出"""
+        print("STARTUP " + json.dumps({
+            "imports_ms": round((_IMPORTED_AT - _STARTED_AT) * 1000, 1),
+            "tti_ms": round((time.perf_counter() - _STARTED_AT) * 1000, 1),
+        }), flush=True)
+        QApplication.instance().quit()
+
     def _connect_signals(self):
-        self.process_handler.ffmpeg_process.readyReadStandardOutput.connect(self._handle_stdout)
-        self.process_handler.ffmpeg_process.readyReadStandardError.connect(self._handle_stderr)
-        self.process_handler.ffmpeg_process.finished.connect(self._on_process_finished)
+        job_queue = self.process_handler.job_queue
+        job_queue.job_added.connect(self._on_job_added)
+        job_queue.job_started.connect(self._update_job_row)
+        job_queue.job_updated.connect(self._update_job_row)
+        job_queue.job_output.connect(self._handle_job_output)
+        job_queue.job_progress.connect(self._on_job_progress)
+        job_queue.job_resources.connect(self._on_job_resources)
+        job_queue.job_finished.connect(self._on_process_finished)
+        job_queue.job_removed.connect(self._on_job_removed)
+        self.job_table.itemSelectionChanged.connect(self._on_job_selection_changed)
+        self.promote_job_button.clicked.connect(self._promote_selected_job)
+        self.cancel_job_button.clicked.connect(self._cancel_selected_job)
+        self.save_log_button.clicked.connect(self._save_log)
         self.process_handler.ffprobe_process.finished.connect(self._on_probe_finished)
         self.tabs.currentChanged.connect(self._initialize_tab)
         QTimer.singleShot(0, lambda: self._initialize_tab(0))
 
+    def _resume_interrupted_jobs(self):
+        jobs, abandoned = self.process_handler.recover_interrupted_jobs()
+        if jobs:
+            self.console.append(f"<font color='#f1c40f'>已重新加入上次中断的 {len(jobs)} 个任务</font>")
+        if abandoned:
+            self.console.append(f"<font color='#f1c40f'>{abandoned} 个中断的任务因临时文件或前置任务结果已不存在而无法恢复</font>")
+
+    def _on_video_encoders_detected(self, results):
+        """编码器检测完成后刷新已打开的视频处理页的编码器列表"""
+        for tab in self.initialized_tabs.values():
+            if hasattr(tab, 'refresh_video_codecs'):
+                tab.refresh_video_codecs()
+
     def switch_to_console_tab(self):
         self.info_console_tabs.setCurrentIndex(1)
 
@@ -125,7 +191,13 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.reset_media_info()
         self.reset_progress_display()
         target_line_edit.setText(file_name)
-        self.process_handler.run_ffprobe(file_name)
+        self.probe_path = file_name
+        cached = get_probe_cache().get(file_name)
+        if cached is not None:
+            # 文件未变化，直接使用缓存
+            self._show_probe_data(cached)
+        else:
+            self.process_handler.run_ffprobe(file_name)
 
         current_tab_index = self.tabs.currentIndex()
         if current_tab_index in self.initialized_tabs:
@@ -136,106 +208,275 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     def reset_progress_display(self):
         self.progress_bar.setValue(0)
         self.progress_status_label.setText("待机")
-        self.last_progress_text = ""
 
     def reset_media_info(self):
         self.info_label.setText("正在读取媒体信息...")
+        self.thumbnail_label.clear()
+        self.thumbnail_label.hide()
         self.total_duration_sec = 0
-
-    def set_buttons_enabled(self, enabled):
-        for tab in self.initialized_tabs.values():
-            if hasattr(tab, 'set_buttons_enabled'):
-                tab.set_buttons_enabled(enabled)
+        self.total_frames = 0
+        self.probe_data = None
 
     def _on_probe_finished(self):
         output = self.process_handler.ffprobe_process.readAllStandardOutput().data().decode('utf-8', 'ignore')
+        probed_path = self.process_handler.ffprobe_target
         try:
             data = json.loads(output)
+        except json.JSONDecodeError as e:
+            if probed_path == self.probe_path:
+                self.info_label.setText(f"<font color='#f1c40f'>无法解析媒体信息: {e}</font>")
+                self.total_duration_sec = 0
+            return
+        if isinstance(data, dict) and 'format' in data:
+            get_probe_cache().put(probed_path, data)
+        if probed_path == self.probe_path:
+            self._show_probe_data(data)
+
+    def _show_probe_data(self, data):
+        try:
             self.info_label.setText(format_media_info(data))
+            self.probe_data = data
             if 'format' in data and 'duration' in data['format']:
                 self.total_duration_sec = float(data['format']['duration'])
-        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            self.total_frames = video_frame_count(data)
+        except (KeyError, TypeError, ValueError) as e:
             self.info_label.setText(f"<font color='#f1c40f'>无法解析媒体信息: {e}</font>")
             self.total_duration_sec = 0
+            return
+        if self.total_duration_sec <= 0 and not self.total_frames and has_video(data):
+            # 时长未知且容器未记录帧数（如部分 TS 文件）：在后台统计视频包数，用于按帧数计算进度
+            path = self.probe_path
+            run_in_background(count_video_packets, path, self.process_handler._get_ffprobe_path(),
+                              on_finished=lambda frames: self._set_total_frames(path, frames))
+        self._request_thumbnails(self.probe_path, data)
+
+    def _set_total_frames(self, path, frames):
+        if path == self.probe_path:
+            self.total_frames = frames
+
+    def _request_thumbnails(self, path, data):
+        """显示缩略图条：已缓存时直接显示，否则在后台只解码关键帧生成"""
+        if not get_config().get("show_thumbnails", True) or not has_video(data) or self.total_duration_sec <= 0:
+            return
+        cache = get_thumbnail_cache()
+        cached = cache.get(path)
+        if cached is not None:
+            self._show_thumbnails(path, cached)
+            return
+        run_in_background(cache.create, path, self.total_duration_sec, self.process_handler._get_ffmpeg_path(),
+                          on_finished=lambda strip: self._show_thumbnails(path, strip))
 
-    def _on_process_finished(self, exit_code, exit_status):
-        self.set_buttons_enabled(True)
-        if exit_status == QProcess.ExitStatus.NormalExit and exit_code == 0:
+    def _show_thumbnails(self, path, strip):
+        # 生成期间已选择了其他文件时丢弃结果
+        if strip is None or path != self.probe_path:
+            return
+        pixmap = QPixmap(strip)
+        if not pixmap.isNull():
+            self.thumbnail_label.setPixmap(pixmap)
+            self.thumbnail_label.show()
+
+    # --- 任务队列 ---
+    def _on_job_added(self, job):
+        row = self.job_table.rowCount()
+        self.job_table.insertRow(row)
+        self.job_rows[job.id] = QTableWidgetItem(str(job.id))
+        self.job_table.setItem(row, 0, self.job_rows[job.id])
+        self.job_table.setItem(row, 1, QTableWidgetItem(job.description))
+        self.job_table.setItem(row, 2, QTableWidgetItem(job.status_display))
+        self.job_table.setItem(row, 3, QTableWidgetItem(f"{job.progress}%"))
+        if job.group is not None:
+            self.current_group = job.group
+        self._update_queue_status()
+        # 新提交的任务成为当前显示的任务（批量任务只显示第一个）
+        if job.group is None or job.group.total == 1:
+            self.displayed_job = job
+            self.reset_progress_display()
+
+    def _update_job_row(self, job):
+        item = self.job_rows.get(job.id)
+        if item is None: return
+        row = item.row()
+        self.job_table.item(row, 2).setText(job.status_display)
+        self.job_table.item(row, 3).setText(f"{job.progress}%")
+        self._update_queue_status()
+
+    def _on_job_removed(self, job):
+        item = self.job_rows.pop(job.id, None)
+        if item is not None:
+            self.job_table.removeRow(item.row())
+        if job is self.displayed_job:
+            self.displayed_job = None
+
+    def _update_queue_status(self):
+        job_queue = self.process_handler.job_queue
+        status = (f"运行中: {len(job_queue.running_jobs())} | 排队: {job_queue.pending_count()} "
+                  f"| 并行上限: {job_queue.max_workers}")
+        if self.current_group is not None:
+            status += " | " + self._format_group_status(self.current_group)
+        self.job_status_label.setText(status)
+
+    def _format_group_status(self, group):
+        text = f"{group.name}: {group.done_count}/{group.total}"
+        if group.failed_count:
+            text += f" (失败 {group.failed_count})"
+        if group.is_active:
+            eta = group.eta_seconds()
+            eta_str = str(datetime.timedelta(seconds=int(eta))) if eta is not None else "未知"
+            text += f" | {group.throughput():.1f} 个/分钟 | 剩余: {eta_str}"
+            speed = group.speed()
+            if speed > 0:
+                text += f" | 合计速度: {speed:.2f}x"
+        return text
+
+    def _selected_job(self):
+        rows = self.job_table.selectionModel().selectedRows()
+        if not rows: return None
+        job_id = int(self.job_table.item(rows[0].row(), 0).text())
+        return next((job for job in self.process_handler.job_queue.jobs if job.id == job_id), None)
+
+    def _on_job_selection_changed(self):
+        job = self._selected_job()
+        if job and job is not self.displayed_job:
+            self._show_job(job)
+
+    def _show_job(self, job):
+        self.displayed_job = job
+        self.console.clear()
+        if job.log.dropped_lines:
+            self.console.append(f"<font color='#f1c40f'>(已省略前 {job.log.dropped_lines} 行，"
+                                f"可通过“保存日志”导出完整日志)</font>")
+        self.console.append_output(job.log.text())
+        self.console.flush()
+        self.progress_bar.setValue(job.progress)
+        self.progress_status_label.setText(self._job_status_line(job))
+
+    def _save_log(self):
+        file_name, _ = QFileDialog.getSaveFileName(self, "保存日志", "ffmpeg_log.txt", "Log Files (*.txt *.log);;All Files (*)")
+        if not file_name: return
+        if self.displayed_job is not None:
+            saved = self.displayed_job.log.save(file_name)
+        else:
+            try:
+                with open(file_name, 'w', encoding='utf-8') as f:
+                    f.write(self.console.toPlainText())
+                saved = True
+            except OSError:
+                saved = False
+        if saved:
+            self.console.append(f"<font color='#2ecc71'>日志已保存: {file_name}</font>")
+        else:
+            self.console.append(f"<font color='#e74c3c'>日志保存失败: {file_name}</font>")
+
+    def _promote_selected_job(self):
+        job = self._selected_job()
+        if job: self.process_handler.job_queue.promote(job)
+
+    def _cancel_selected_job(self):
+        job = self._selected_job()
+        if job: self.process_handler.job_queue.cancel(job)
+
+    def _on_process_finished(self, job):
+        self._update_job_row(job)
+        group = job.group
+        if job is self.displayed_job:
+            self._report_job_result(job)
+        if group is not None and not group.is_active:
+            self.console.append(f"<b>{self._format_group_status(group)}，跳过 {group.skipped} 个</b>")
+
+    def _report_job_result(self, job):
+        if job.group is not None and job.group.is_active:
+            # 批量处理时自动切换到同组中正在运行的下一个任务
+            next_job = next((j for j in job.group.jobs if j.process is not None), None)
+            if next_job is not None:
+                self._show_job(next_job)
+                return
+        if job.status == JOB_FINISHED:
             if self.progress_bar.value() < 100: self.progress_bar.setValue(100)
-            self.console.append("\n<hr><b><font color='#2ecc71'>任务已成功完成！</font></b>")
+            self.console.append(f"\n<hr><b><font color='#2ecc71'>任务 #{job.id} 已成功完成！</font></b>")
             self.progress_status_label.setText("任务完成")
         else:
-            self.console.append(f"\n<hr><b><font color='#e74c3c'>任务失败 (退出码: {exit_code})</font></b>")
-            self.progress_status_label.setText("任务失败")
-        self.last_progress_text = ""
-
-    def _handle_stdout(self):
-        process = self.process_handler.ffmpeg_process
-        if not process: return
-        message = process.readAllStandardOutput().data().decode('utf-8', 'ignore')
-        self.console.insertPlainText(message)
-        self.console.ensureCursorVisible()
-
-    def _handle_stderr(self):
-        process = self.process_handler.ffmpeg_process
-        if not process: return
-        error_output = process.readAllStandardError().data().decode('utf-8', 'ignore')
-        self.console.insertPlainText(error_output)
-        self.console.ensureCursorVisible()
-        self._parse_and_update_progress(error_output)
-
-    def _parse_and_update_progress(self, output):
-        text = self.last_progress_text + output
-        lines = text.split('\r')
-        self.last_progress_text = lines[-1]
-        if not lines[:-1]: return
-        latest_line = ""
-        for line in reversed(lines[:-1]):
-            if 'frame=' in line and 'time=' in line:
-                latest_line = line
-                break
-        if not latest_line: return
-        match = PROGRESS_RE.search(latest_line)
-        if not match: return
-        if self.total_duration_sec <= 0:
-            self.progress_status_label.setText("处理中 (时长未知)...")
-            return
-        data = match.groupdict()
-        current_time_sec = time_str_to_seconds(data.get('time', '0'))
-        percentage = min(100, int((current_time_sec / self.total_duration_sec) * 100))
-        self.progress_bar.setValue(percentage)
-        speed_str = data.get('speed', '0').replace('x', '')
-        try: speed = float(speed_str)
-        except (ValueError, TypeError): speed = 0
-        eta_str = "未知"
-        if speed > 0:
-            remaining_sec = (self.total_duration_sec - current_time_sec) / speed
-            if remaining_sec > 0:
-                eta_str = str(datetime.timedelta(seconds=int(remaining_sec)))
-        fps_str = data.get('fps', '0.0')
-        try: fps = float(fps_str)
-        except (ValueError, TypeError): fps = 0.0
-        status_text = (f"{percentage}% | 帧率: {fps:.1f} | 速度: {speed:.2f}x | 剩余: {eta_str}")
-        self.progress_status_label.setText(status_text)
-
+            self.console.append(f"\n<hr><b><font color='#e74c3c'>任务 #{job.id} {job.status_display} (退出码: {job.exit_code})</font></b>")
+            self.progress_status_label.setText(f"任务{job.status_display}")
+        summary = summarize(job.resource_samples)
+        if summary is not None:
+            cpu = f"{summary['cpu_avg']:.0f}% (峰值 {summary['cpu_peak']:.0f}%)" if summary["cpu_avg"] is not None else "--"
+            io = ""
+            if summary["read_bytes"] is not None:
+                io = (f" | 读取: {summary['read_bytes'] / (1024 * 1024):.1f}MB"
+                      f" | 写入: {summary['write_bytes'] / (1024 * 1024):.1f}MB")
+            self.console.append(f"<font color='#95a5a6'>资源占用: 平均CPU {cpu} | 峰值内存: {summary['rss_peak_mb']:.0f}MB"
+                                f" | 线程: {summary['threads_peak']}{io}</font>")
+
+    @profiler.traced(cat="output")
+    def _handle_job_output(self, job, output):
+        if job is self.displayed_job:
+            self.console.append_output(output)
+
+    @profiler.traced(cat="output")
+    def _on_job_progress(self, job):
+        if job.progress_source is None:
+            job.status_text = f"处理中 (时长未知) | 帧: {job.frame} | 速度: {job.speed:.2f}x"
+        else:
+            eta_str = str(datetime.timedelta(seconds=int(job.eta))) if job.eta is not None else "未知"
+            basis = {"frames": " (按帧数)", "bytes": " (按读取位置)"}.get(job.progress_source, "")
+            job.status_text = (f"{job.progress}%{basis} | 帧率: {job.fps:.1f} | 速度: {job.speed:.2f}x"
+                               f" | 剩余: {eta_str}")
+        self._update_job_row(job)
+        if job is self.displayed_job:
+            self.progress_bar.setValue(job.progress)
+            self.progress_status_label.setText(self._job_status_line(job))
+
+    def _on_job_resources(self, job):
+        if job is self.displayed_job:
+            self.progress_status_label.setText(self._job_status_line(job))
+
+    def _job_status_line(self, job):
+        """进度信息，运行中时附加子进程的资源占用"""
+        text = job.status_text or job.status_display
+        if job.status == JOB_RUNNING and job.resources is not None:
+            text += " | " + format_sample(job.resources)
+        return text
+
+
+def _parse_args(argv):
+    """程序自身的选项，其余参数交给 Qt"""
+    parser = argparse.ArgumentParser(prog="SkyDreamBox", add_help=False)
+    parser.add_argument("--profile", nargs="?", const="skydreambox_trace.json",
+                        help="记录启动和界面处理的耗时，退出时写出 Chrome 跟踪格式的 JSON")
+    parser.add_argument("--cprofile", help="同时写出 cProfile 结果 (可用 pstats/snakeviz 查看)")
+    parser.add_argument("--startup-benchmark", action="store_true", help="启动完成后输出耗时并退出")
+    return parser.parse_known_args(argv[1:])
 
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
-    app.setStyleSheet(STYLESHEET)
-    
-    logo_path = resource_path("assets/logo.png")
-    icon_pixmap = QPixmap(logo_path)
-    
-    splash = CustomSplashScreen(icon_pixmap, app_name=APP_NAME, version="2.2")
-    splash.show()
+    options, qt_args = _parse_args(sys.argv)
+    if options.profile or options.cprofile:
+        profiler.enable(options.profile or "skydreambox_trace.json", options.cprofile, origin=_STARTED_AT)
+        profiler.record("imports", "startup", _STARTED_AT, _IMPORTED_AT)
+    with profiler.span("QApplication", "startup"):
+        app = QApplication(sys.argv[:1] + qt_args)
+        app.setStyleSheet(STYLESHEET)
+
+    with profiler.span("splash", "startup"):
+        logo_path = resource_path("assets/logo.png")
+        icon_pixmap = QPixmap(logo_path)
+
+        splash = CustomSplashScreen(icon_pixmap, app_name=APP_NAME, version="2.2")
+        splash.show()
 
     main_win = MainWindow(splash)
 
     if not main_win.centralWidget():
+        profiler.finish()
         sys.exit(1)
 
-    main_win.show()
-    splash.finish(main_win)
+    with profiler.span("show", "startup"):
+        main_win.show()
+        splash.finish(main_win)
+    if options.startup_benchmark:
+        # 排在首个选项卡的构建之后执行
+        QTimer.singleShot(0, main_win.report_startup)
 
-    sys.exit(app.exec())
\ No newline at end of file
+    exit_code = app.exec()
+    profiler.finish()
+    sys.exit(exit_code)
\ No newline at end of file
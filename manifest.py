@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/manifest.py
+# 任务清单：用 JSON/TOML 文件描述一批任务，由命令行模式按清单执行
+#
+# 清单示例 (TOML):
+#
+#   max_workers = 4                    # 可选，命令行 -j 优先
+#
+#   [defaults.video]                   # 可选，按操作类型设置默认参数
+#   format = "mp4"
+#   crf = "23"
+#
+#   [[jobs]]
+#   operation = "video"                # video / audio / mux / demux / trim / img_audio
+#   inputs = ["raw/*.mkv"]
+#   output_dir = "out"
+#
+#   [[jobs]]
+#   operation = "trim"
+#   input = "raw/talk.mp4"
+#   output = "out/talk_clip.mp4"
+#   start = "00:01:00"
+#   end = "00:02:30"
+#   smart = true
+#
+# 参数名与对应子命令的选项相同（如 vcodec、output_dir、bit_depth），相对路径以清单所在目录为准。
+
+import os
+import json
+import hashlib
+
+# 操作名 -> 命令行子命令
+OPERATIONS = {
+    "video": "convert",
+    "audio": "audio",
+    "mux": "mux",
+    "demux": "demux",
+    "trim": "trim",
+    "img_audio": "img-audio",
+}
+# 作为位置参数传递的键
+_POSITIONAL_KEYS = ("inputs", "input")
+# 值为路径的键，相对路径以清单所在目录为准
+_PATH_KEYS = ("inputs", "input", "output", "output_dir", "video", "audio", "image", "subtitle", "album")
+# 只能在命令行中指定的选项
+_RUN_ONLY_KEYS = ("jobs", "json", "dry_run", "ffmpeg", "ffprobe", "log_level")
+
+
+class ManifestError(Exception):
+    """清单文件无法读取或内容无效"""
+
+
+def _load_toml(data):
+    try:
+        import tomllib
+    except ImportError:  # Python 3.10 及以下
+        try:
+            import tomli as tomllib
+        except ImportError:
+            raise ManifestError("读取 TOML 清单需要 Python 3.11+ 或安装 tomli，也可以改用 JSON 清单")
+    try:
+        return tomllib.loads(data.decode('utf-8'))
+    except (tomllib.TOMLDecodeError, UnicodeDecodeError) as e:
+        raise ManifestError(f"TOML 格式错误: {e}")
+
+
+def load_manifest(path):
+    """读取清单文件，返回 (清单字典, 文件内容的 sha256)"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        raise ManifestError(f"无法读取清单: {e}")
+
+    if path.lower().endswith('.toml'):
+        manifest = _load_toml(data)
+    else:
+        try:
+            manifest = json.loads(data.decode('utf-8'))
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise ManifestError(f"JSON 格式错误: {e}")
+
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("jobs"), list) or not manifest["jobs"]:
+        raise ManifestError("清单中没有任务 (需要非空的 jobs 列表)")
+    return manifest, hashlib.sha256(data).hexdigest()
+
+
+def _resolve(value, base_dir):
+    if isinstance(value, list):
+        return [_resolve(v, base_dir) for v in value]
+    value = os.path.expanduser(str(value))
+    return value if os.path.isabs(value) else os.path.normpath(os.path.join(base_dir, value))
+
+
+def job_argv(job, defaults, base_dir):
+    """将清单中的一个任务转换为命令行参数列表 (子命令 + 选项)"""
+    if not isinstance(job, dict):
+        raise ManifestError("任务必须是键值表")
+    operation = job.get("operation")
+    if operation not in OPERATIONS:
+        raise ManifestError(f"未知的操作: {operation} (可选: {', '.join(OPERATIONS)})")
+
+    params = dict(defaults.get(operation, {}))
+    params.update((k, v) for k, v in job.items() if k != "operation")
+    argv = [OPERATIONS[operation]]
+    for key in _POSITIONAL_KEYS:
+        if key in params:
+            value = params.pop(key)
+            if key in _PATH_KEYS:
+                value = _resolve(value, base_dir)
+            argv.extend(value if isinstance(value, list) else [value])
+
+    for key, value in params.items():
+        if key in _RUN_ONLY_KEYS:
+            raise ManifestError(f"选项 {key} 只能在命令行中指定")
+        if key in _PATH_KEYS:
+            value = _resolve(value, base_dir)
+        flag = "--" + key.replace("_", "-")
+        if value is True:
+            argv.append(flag)
+        elif value is False:
+            if key == "overwrite":
+                argv.append("--no-overwrite")
+        elif isinstance(value, list):
+            # 可重复的选项，如 rendition = ["1080:5000k", "720:2800k"]
+            for item in value:
+                argv.extend([flag, str(item)])
+        elif value is not None:
+            argv.extend([flag, str(value)])
+    return argv
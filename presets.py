@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/presets.py
+# 选项卡预设：视频/音频处理页的参数保存为 config/presets/<名称>.json，
+# 内容与任务清单中的一个任务相同（operation + 命令行选项名），供监视文件夹 (watch) 模式使用（不依赖 PySide6）
+
+import os
+import json
+
+# 可保存为预设的操作（与任务清单的 operation 相同）
+PRESET_OPERATIONS = ("video", "audio")
+# 预设只描述参数，输入/输出由使用预设的地方决定
+_IO_KEYS = ("inputs", "input", "output", "output_dir", "skip_existing")
+
+
+class PresetError(Exception):
+    """预设不存在或内容无效"""
+
+
+def preset_dir():
+    from config import get_config
+    return os.path.join(str(get_config().config_dir), "presets")
+
+
+def list_presets():
+    """已保存的预设名称"""
+    try:
+        names = os.listdir(preset_dir())
+    except OSError:
+        return []
+    return sorted(os.path.splitext(name)[0] for name in names if name.endswith(".json"))
+
+
+def _check_name(name):
+    name = name.strip()
+    if not name or any(c in name for c in '/\\:*?"<>|') or name.startswith("."):
+        raise PresetError(f"预设名称无效: {name!r}")
+    return name
+
+
+def save_preset(name, params):
+    """保存预设，返回文件路径"""
+    name = _check_name(name)
+    _validate(params)
+    directory = preset_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name + ".json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(params, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load_preset(name_or_path):
+    """按名称或 JSON 文件路径读取预设"""
+    path = name_or_path if os.path.isfile(name_or_path) else os.path.join(preset_dir(), name_or_path + ".json")
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            params = json.load(f)
+    except FileNotFoundError:
+        available = "、".join(list_presets()) or "无"
+        raise PresetError(f"预设不存在: {name_or_path} (已保存的预设: {available})")
+    except (OSError, json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise PresetError(f"无法读取预设 {path}: {e}")
+    _validate(params)
+    return params
+
+
+def _validate(params):
+    if not isinstance(params, dict) or params.get("operation") not in PRESET_OPERATIONS:
+        raise PresetError(f"预设的 operation 必须是 {' / '.join(PRESET_OPERATIONS)}")
+    io_keys = [key for key in _IO_KEYS if key in params]
+    if io_keys:
+        raise PresetError(f"预设中不能指定输入/输出: {', '.join(io_keys)}")
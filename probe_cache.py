@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/probe_cache.py
+# ffprobe 结果的持久化缓存（SQLite），以 绝对路径 + 文件大小 + 修改时间 为键
+
+import os
+import json
+import time
+import sqlite3
+import threading
+import subprocess
+
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def file_identity(path):
+    """返回 (绝对路径, 大小, 修改时间ns)，文件不存在时返回 None"""
+    try:
+        abs_path = os.path.abspath(path)
+        st = os.stat(abs_path)
+    except OSError:
+        return None
+    return abs_path, st.st_size, st.st_mtime_ns
+
+
+class ProbeCache:
+    """媒体信息缓存，超过 max_entries 条时按最近访问时间淘汰"""
+
+    def __init__(self, db_path, max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_path = str(db_path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # 后台线程（如截取前的分析）也会读写缓存，连接由锁保护
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS probes ("
+            " path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER,"
+            " data TEXT, accessed REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, path):
+        """返回缓存的 ffprobe 数据；未缓存或文件已变化时返回 None"""
+        with self._lock:
+            return self._get(path)
+
+    def _get(self, path):
+        identity = file_identity(path)
+        if identity is None:
+            self.misses += 1
+            return None
+        abs_path, size, mtime_ns = identity
+        row = self._conn.execute(
+            "SELECT data FROM probes WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (abs_path, size, mtime_ns)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        try:
+            data = json.loads(row[0])
+        except json.JSONDecodeError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._conn.execute("UPDATE probes SET accessed = ? WHERE path = ?", (time.time(), abs_path))
+        self._conn.commit()
+        return data
+
+    def put(self, path, data):
+        with self._lock:
+            self._put(path, data)
+
+    def _put(self, path, data):
+        identity = file_identity(path)
+        if identity is None:
+            return
+        abs_path, size, mtime_ns = identity
+        self._conn.execute(
+            "INSERT OR REPLACE INTO probes (path, size, mtime_ns, data, accessed) VALUES (?, ?, ?, ?, ?)",
+            (abs_path, size, mtime_ns, json.dumps(data, ensure_ascii=False), time.time())
+        )
+        self._evict()
+        self._conn.commit()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM probes").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM probes WHERE path IN "
+                "(SELECT path FROM probes ORDER BY accessed ASC LIMIT ?)", (excess,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM probes")
+            self._conn.commit()
+        self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM probes").fetchone()[0]
+        return {"entries": count, "max_entries": self.max_entries,
+                "hits": self.hits, "misses": self.misses}
+
+
+# 全局缓存实例
+_cache_instance = None
+
+def get_probe_cache():
+    """获取全局媒体信息缓存实例"""
+    global _cache_instance
+    if _cache_instance is None:
+        from config import get_config
+        config = get_config()
+        _cache_instance = ProbeCache(config.config_dir / "probe_cache.sqlite3",
+                                     config.get("probe_cache_max_entries", DEFAULT_MAX_ENTRIES))
+    return _cache_instance
+
+
+def probe_media(path, ffprobe_path="ffprobe", timeout=30):
+    """返回文件的 ffprobe 数据（-show_format -show_streams），优先读取缓存
+
+    可在后台线程中调用；失败时返回 None。
+    """
+    cache = get_probe_cache()
+    data = cache.get(path)
+    if data is not None:
+        return data
+    try:
+        result = subprocess.run(
+            [ffprobe_path, "-v", "quiet", "-print_format", "json", "-show_format", "-show_streams", path],
+            capture_output=True, text=True, encoding='utf-8', errors='ignore', timeout=timeout)
+        data = json.loads(result.stdout)
+    except (OSError, subprocess.TimeoutExpired, json.JSONDecodeError):
+        return None
+    if not data.get("streams"):
+        return None
+    cache.put(path, data)
+    return data
+
+
+def video_frame_count(probe_data):
+    """第一个视频流（不包括封面图片）在容器中记录的帧数 nb_frames，未记录时返回 0"""
+    for stream in (probe_data or {}).get("streams", []):
+        if stream.get("codec_type") != "video" or (stream.get("disposition") or {}).get("attached_pic"):
+            continue
+        try:
+            return int(stream.get("nb_frames") or 0)
+        except ValueError:
+            return 0
+    return 0
+
+
+def count_video_packets(path, ffprobe_path="ffprobe", timeout=120):
+    """统计第一个视频流的包数（只解复用、不解码，用于估算帧数），失败时返回 0（在后台线程中调用）"""
+    try:
+        result = subprocess.run(
+            [ffprobe_path, "-v", "error", "-select_streams", "v:0", "-count_packets",
+             "-show_entries", "stream=nb_read_packets", "-of", "csv=p=0", path],
+            capture_output=True, text=True, encoding='utf-8', errors='ignore', timeout=timeout)
+        return int(result.stdout.strip().split(",")[0] or 0)
+    except (OSError, subprocess.TimeoutExpired, ValueError):
+        return 0
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/proc_stats.py
+# 读取 /proc/<pid> 中子进程的资源占用（CPU、线程数、内存、读写量），仅支持 Linux
+
+import os
+import time
+
+_PROC = "/proc"
+
+
+def supported():
+    """当前系统是否提供 /proc/<pid> 进程信息"""
+    return os.path.exists(os.path.join(_PROC, "self", "stat"))
+
+
+def read_process(pid):
+    """读取进程的累计资源占用，进程不存在或无法读取时返回 None
+
+    返回 {"cpu_seconds", "threads", "rss_bytes", "read_bytes", "write_bytes"}；
+    读写量为 rchar/wchar（包括命中页缓存的读写），无权限读取 io 时为 None。
+    """
+    try:
+        with open(os.path.join(_PROC, str(pid), "stat"), 'r') as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # 进程名可能包含空格和括号，从最后一个 ')' 之后开始解析（第3个字段起）
+    fields = stat[stat.rfind(')') + 2:].split()
+    try:
+        ticks = int(fields[11]) + int(fields[12])  # utime + stime
+        threads = int(fields[17])
+        rss_pages = int(fields[21])
+    except (IndexError, ValueError):
+        return None
+    sample = {
+        "cpu_seconds": ticks / os.sysconf("SC_CLK_TCK"),
+        "threads": threads,
+        "rss_bytes": rss_pages * os.sysconf("SC_PAGE_SIZE"),
+        "read_bytes": None,
+        "write_bytes": None,
+    }
+    try:
+        with open(os.path.join(_PROC, str(pid), "io"), 'r') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key == "rchar":
+                    sample["read_bytes"] = int(value)
+                elif key == "wchar":
+                    sample["write_bytes"] = int(value)
+    except (OSError, ValueError):
+        pass
+    return sample
+
+
+def find_open_file(pid, path):
+    """进程打开 path 所用的文件描述符，未打开或无法读取时返回 None"""
+    target = os.path.realpath(path)
+    fd_dir = os.path.join(_PROC, str(pid), "fd")
+    try:
+        fds = os.listdir(fd_dir)
+    except OSError:
+        return None
+    for fd in fds:
+        try:
+            if os.readlink(os.path.join(fd_dir, fd)) == target:
+                return int(fd)
+        except (OSError, ValueError):
+            continue
+    return None
+
+
+def read_file_position(pid, fd):
+    """读取文件描述符的当前读写位置（字节），无法读取时返回 None"""
+    try:
+        with open(os.path.join(_PROC, str(pid), "fdinfo", str(fd)), 'r') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key == "pos":
+                    return int(value)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _rate(current, previous, elapsed):
+    if current is None or previous is None or elapsed <= 0:
+        return None
+    return max(0.0, (current - previous) / elapsed)
+
+
+class ResourceSampler:
+    """定时采样一个进程，根据相邻两次采样计算 CPU 占用率和读写速度"""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self._previous = None
+        self._previous_time = None
+
+    def sample(self):
+        """返回 {"time", "cpu_percent", "threads", "rss_mb", "read_bytes", "write_bytes",
+        "read_rate", "write_rate"}；进程已结束时返回 None
+
+        cpu_percent 以单个核心为 100%，多线程编码时可超过 100%；首次采样时为 None。
+        """
+        current = read_process(self.pid)
+        if current is None:
+            return None
+        now = time.monotonic()
+        elapsed = now - self._previous_time if self._previous_time is not None else 0
+        previous = self._previous or {}
+        cpu_rate = _rate(current["cpu_seconds"], previous.get("cpu_seconds"), elapsed)
+        self._previous, self._previous_time = current, now
+        return {
+            "time": time.time(),
+            "cpu_percent": round(cpu_rate * 100, 1) if cpu_rate is not None else None,
+            "threads": current["threads"],
+            "rss_mb": round(current["rss_bytes"] / (1024 * 1024), 1),
+            "read_bytes": current["read_bytes"],
+            "write_bytes": current["write_bytes"],
+            "read_rate": _rate(current["read_bytes"], previous.get("read_bytes"), elapsed),
+            "write_rate": _rate(current["write_bytes"], previous.get("write_bytes"), elapsed),
+        }
+
+
+def _format_rate(value):
+    if value is None:
+        return "--"
+    if value >= 1024 * 1024:
+        return f"{value / (1024 * 1024):.1f}MB/s"
+    return f"{value / 1024:.0f}KB/s"
+
+
+def format_sample(sample):
+    """格式化为状态栏文本，如 'CPU: 350% | 线程: 12 | 内存: 210MB | 读: 5.1MB/s | 写: 1.2MB/s'"""
+    cpu = f"{sample['cpu_percent']:.0f}%" if sample.get("cpu_percent") is not None else "--"
+    return (f"CPU: {cpu} | 线程: {sample['threads']} | 内存: {sample['rss_mb']:.0f}MB"
+            f" | 读: {_format_rate(sample.get('read_rate'))} | 写: {_format_rate(sample.get('write_rate'))}")
+
+
+def summarize(samples):
+    """汇总一个任务的采样序列: {"cpu_avg", "cpu_peak", "rss_peak_mb", "threads_peak", "read_bytes", "write_bytes"}"""
+    if not samples:
+        return None
+    cpu = [s["cpu_percent"] for s in samples if s.get("cpu_percent") is not None]
+    last = samples[-1]
+    return {
+        "cpu_avg": round(sum(cpu) / len(cpu), 1) if cpu else None,
+        "cpu_peak": max(cpu) if cpu else None,
+        "rss_peak_mb": max(s["rss_mb"] for s in samples),
+        "threads_peak": max(s["threads"] for s in samples),
+        "read_bytes": last.get("read_bytes"),
+        "write_bytes": last.get("write_bytes"),
+    }
@@ -1,6 +1,16 @@
 # -*- coding: utf-8 -*-
 from PySide6.QtCore import QProcess
 import os
+import shutil
+import sqlite3
+
+from job_queue import JobQueue, JobGroup, JOB_QUEUED, JOB_RUNNING, JOB_FINISHED, JOB_CANCELLED
+from job_journal import get_job_journal, output_path_from_args, STATUS_REQUEUED
+from runner import prepare_ffmpeg_args
+from capabilities import start_check, describe_check, detect_video_encoders, DetectionStop
+from background import run_in_background
+import profiler
+from utils import VIDEO_FORMAT_CODECS
 
 # =============================================================================
 # Process Handler Module (进程处理模块)
@@ -15,8 +25,24 @@ except ImportError:
 
 class ProcessHandler:
     def __init__(self, parent=None):
-        self.ffmpeg_process = QProcess(parent)
+        max_jobs = CONFIG.get("max_concurrent_jobs", 0) if CONFIG else 0
+        log_max_lines = CONFIG.get("console_max_lines", 5000) if CONFIG else 5000
+        history_max = CONFIG.get("job_history_max", 200) if CONFIG else 200
+        self.job_queue = JobQueue(self._get_ffmpeg_path, max_jobs, parent, log_max_lines, history_max)
         self.ffprobe_process = QProcess(parent)
+        self.ffprobe_target = ""  # 当前 ffprobe 进程正在分析的文件
+        self._ffmpeg_check = None
+        self.ffmpeg_info = None  # 检测结果: {"ffmpeg": {...}, "ffprobe": {...}}
+        self.video_encoders = None  # 视频编码器实测结果: {编码器: {"ok", "fps", "error"}}，检测完成前为 None
+        self._encoder_detection_stop = DetectionStop()
+        try:
+            self.journal = get_job_journal()
+        except sqlite3.Error as e:
+            print(f"无法打开任务日志库: {e}")
+            self.journal = None
+        if self.journal:
+            self.job_queue.job_started.connect(self.journal.update)
+            self.job_queue.job_finished.connect(self._journal_finished)
     
     def _get_ffmpeg_path(self):
         """获取FFmpeg可执行文件路径"""
@@ -30,64 +56,52 @@ class ProcessHandler:
             return CONFIG.get_ffprobe_path()
         return "ffprobe"
 
+    def start_ffmpeg_check(self):
+        """在后台同时检测 ffmpeg 和 ffprobe（命中缓存时不启动进程）"""
+        self._ffmpeg_check = start_check(self._get_ffmpeg_path(), self._get_ffprobe_path())
+
+    @profiler.traced(cat="startup")
     def check_ffmpeg(self):
-        """检查ffmpeg是否可用。"""
-        ffmpeg_path = self._get_ffmpeg_path()
-        ffprobe_path = self._get_ffprobe_path()
-        
-        # 检查FFmpeg
-        process = QProcess()
-        process.start(ffmpeg_path, ['-version'])
-        
-        if not process.waitForStarted():
-            if ffmpeg_path != "ffmpeg":
-                return False, f"错误: FFmpeg在指定路径未找到: {ffmpeg_path}\n\n请检查FFmpeg路径设置，或使用系统PATH中的FFmpeg。"
-            else:
-                return False, "错误: FFmpeg未在系统PATH中找到。\n\n请确保您已正确安装FFmpeg，并将其路径添加至系统环境变量中。"
-
-        if not process.waitForFinished(5000):  # 5秒超时
-            process.kill()
-            return False, "错误: FFmpeg响应超时，无法获取版本信息。"
-
-        if process.exitCode() != 0:
-            return False, f"错误: FFmpeg执行出错 (退出码: {process.exitCode()})。\n\n请检查您的FFmpeg安装是否完整。"
-
-        # 检查FFprobe（可选，但建议）
-        process2 = QProcess()
-        process2.start(ffprobe_path, ['-version'])
-        
-        if not process2.waitForStarted():
-            if ffprobe_path != "ffprobe":
-                return True, f"FFmpeg 已找到，但FFprobe在指定路径未找到: {ffprobe_path}\n\n部分功能可能受限。"
-            else:
-                return True, "FFmpeg 已找到，但FFprobe未在系统PATH中找到。\n\n媒体信息预览功能可能受限。"
-        
-        if not process2.waitForFinished(5000):
-            process2.kill()
-            return True, "FFmpeg 已找到，但FFprobe响应超时。\n\n媒体信息预览功能可能受限。"
-        
-        return True, "FFmpeg 和 FFprobe 均已找到。"
+        """检查ffmpeg是否可用（等待 start_ffmpeg_check 启动的检测完成）。"""
+        if self._ffmpeg_check is None:
+            self.start_ffmpeg_check()
+        self.ffmpeg_info = self._ffmpeg_check.result()
+        self._ffmpeg_check = None
+        return describe_check(self.ffmpeg_info)
 
-    def run_ffmpeg(self, command_list):
-        if self.ffmpeg_process.state() == QProcess.ProcessState.Running:
-            return False, "错误: 当前已有任务在运行中。"
-        
-        ffmpeg_path = self._get_ffmpeg_path()
-        
-        # 如果命令列表以'ffmpeg'开头，移除它
-        if command_list and command_list[0].lower() == 'ffmpeg':
-            args = command_list[1:].copy()
-        else:
-            args = command_list.copy()
+    def start_video_encoder_detection(self, on_finished=None):
+        """在后台检测 VIDEO_FORMAT_CODECS 中的编码器（首次对每个编码器做测试编码，之后读取缓存）"""
+        candidates = [codec for codecs in VIDEO_FORMAT_CODECS.values() for codec in codecs]
 
-        has_loglevel_flag = any(arg in ['-loglevel', '-v'] for arg in args)
+        def finished(results):
+            self.video_encoders = results or None
+            if on_finished:
+                on_finished(self.video_encoders)
 
-        if not has_loglevel_flag:
-            args.insert(0, 'verbose')
-            args.insert(0, '-loglevel')
+        run_in_background(detect_video_encoders, self._get_ffmpeg_path(), candidates,
+                          stop=self._encoder_detection_stop,
+                          on_finished=finished, on_failed=lambda e: print(f"编码器检测失败: {e}"))
+
+    def stop_video_encoder_detection(self):
+        """停止编码器检测并终止正在运行的测试进程（退出程序时调用，已测完的结果保留在缓存中）"""
+        self._encoder_detection_stop.stop()
+
+    def run_ffmpeg(self, command_list, description="", priority=0, duration=0, group=None, total_frames=0):
+        """将命令加入任务队列，返回 (是否成功, 提示信息)"""
+        if not command_list:
+            return False, "错误: 命令为空。"
+        job = self.submit_ffmpeg(command_list, description, priority, duration, group,
+                                 total_frames=total_frames)
+        state = "已加入队列" if job.status == JOB_QUEUED else "执行"
+        return True, f"[任务 #{job.id}] {state}: {job.command_display}"
+
+    def submit_ffmpeg(self, command_list, description="", priority=0, duration=0, group=None,
+                      depends_on=None, cleanup_paths=None, total_frames=0):
+        """将命令加入任务队列并返回 Job（用于需要设置任务依赖的多步处理）"""
+        ffmpeg_path = self._get_ffmpeg_path()
+        log_level = CONFIG.get("ffmpeg_log_level", "info") if CONFIG else "info"
+        args, track_progress = prepare_ffmpeg_args(command_list, log_level)
 
-        self.ffmpeg_process.start(ffmpeg_path, ["-nostdin"] + args)
-        
         # 显示给用户的命令（使用实际路径）
         if ffmpeg_path != "ffmpeg":
             display_path = f'"{ffmpeg_path}"'
@@ -95,12 +109,87 @@ class ProcessHandler:
             display_path = "ffmpeg"
         
         original_command_to_display = f"{display_path} {' '.join(args)}"
-        return True, f"执行: {original_command_to_display}"
+        job = self.job_queue.submit(args, description or original_command_to_display,
+                                    priority, duration, group, track_progress, depends_on, cleanup_paths,
+                                    total_frames)
+        job.command_display = original_command_to_display
+        job.output_path = output_path_from_args(args)
+        job.log.append(f"执行: {original_command_to_display}\n")
+        if self.journal:
+            self.journal.record(job)
+        return job
+
+    def _journal_finished(self, job):
+        self.journal.update(job)
+        self.journal.save_samples(job)
+
+    def recover_interrupted_jobs(self):
+        """重新加入上次程序退出或崩溃时未完成的任务，返回 (恢复的任务列表, 无法恢复的数量)
+
+        运行中被中断的任务会先删除其不完整的输出；已完成的任务不会重复执行，
+        多步处理中前置任务的结果仍在时只重新执行未完成的步骤。
+        """
+        if not self.journal:
+            return [], 0
+        self.journal.prune()
+        rows = self.journal.interrupted()
+        if not rows:
+            return [], 0
+
+        group = JobGroup("恢复的任务")
+        recovered = {}  # 日志库中的旧编号 -> 新任务
+        abandoned = 0
+        for row in rows:
+            depends_on = []
+            recoverable = True
+            for dep_id in row["depends_on"]:
+                if dep_id in recovered:
+                    depends_on.append(recovered[dep_id])
+                    continue
+                dep = self.journal.get(dep_id)
+                # 前置任务已完成且输出仍在时视为满足
+                if (dep is None or dep["status"] != JOB_FINISHED
+                        or (dep["output_path"] and not os.path.exists(dep["output_path"]))):
+                    recoverable = False
+            output_path = row["output_path"]
+            if output_path and not os.path.isdir(os.path.dirname(output_path)):
+                # 临时目录已被清理（如系统重启）
+                recoverable = False
+            if not recoverable:
+                self.journal.set_status(row["id"], JOB_CANCELLED)
+                self._remove_paths(row["cleanup_paths"])
+                abandoned += 1
+                continue
+
+            if row["status"] == JOB_RUNNING and output_path and os.path.isfile(output_path):
+                self._remove_paths([output_path])
+            job = self.job_queue.submit(row["args"], row["description"], row["priority"], row["duration"],
+                                        group, bool(row["track_progress"]), depends_on, row["cleanup_paths"])
+            job.command_display = row["command_display"]
+            job.output_path = output_path
+            job.log.append(f"恢复上次中断的任务\n执行: {job.command_display}\n")
+            self.journal.record(job)
+            self.journal.set_status(row["id"], STATUS_REQUEUED)
+            recovered[row["id"]] = job
+        return list(recovered.values()), abandoned
+
+    @staticmethod
+    def _remove_paths(paths):
+        for path in paths:
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
 
     def run_ffprobe(self, file_path):
         if self.ffprobe_process.state() == QProcess.ProcessState.Running:
             self.ffprobe_process.kill()
+            self.ffprobe_process.waitForFinished(1000)
             
+        self.ffprobe_target = file_path
         ffprobe_path = self._get_ffprobe_path()
         command = [
             "-v", "quiet", 
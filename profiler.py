@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/profiler.py
+# 内置性能分析 (--profile)：记录启动各阶段、选项卡构建、命令构建和日志/进度处理的耗时，
+# 写出 Chrome 跟踪格式的 JSON (chrome://tracing 或 Perfetto 可打开)，可选同时写出 cProfile 结果
+
+import os
+import sys
+import json
+import time
+import cProfile
+import functools
+import threading
+
+# 当前的分析器，未启用时为 None（被跟踪的函数只多一次判断）
+_profiler = None
+
+
+class Profiler:
+    """收集耗时区间，结束时写出跟踪文件"""
+
+    def __init__(self, trace_path, cprofile_path=None, origin=None):
+        self.trace_path = trace_path
+        self.cprofile_path = cprofile_path
+        self.events = []
+        self._origin = time.perf_counter() if origin is None else origin
+        self._lock = threading.Lock()
+        self._phases = {}  # 类别 -> (名称, 开始时间)
+        self._cprofile = None
+        if cprofile_path:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def _us(self, seconds):
+        return round((seconds - self._origin) * 1e6, 1)
+
+    def add(self, name, cat, start, end, args=None):
+        """记录一个区间（start/end 为 time.perf_counter() 的值）"""
+        event = {"name": name, "cat": cat, "ph": "X", "ts": self._us(start),
+                 "dur": round((end - start) * 1e6, 1), "pid": os.getpid(), "tid": threading.get_ident()}
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+
+    def phase(self, cat, name):
+        """结束 cat 类别中正在进行的阶段并开始新的阶段，name 为 None 时只结束"""
+        now = time.perf_counter()
+        previous = self._phases.pop(cat, None)
+        if previous is not None:
+            self.add(previous[0], cat, previous[1], now)
+        if name is not None:
+            self._phases[cat] = (name, now)
+
+    def summary(self, limit=15):
+        """按总耗时排列的各区间统计，返回文本"""
+        totals = {}
+        for event in self.events:
+            total, count, longest = totals.get(event["name"], (0.0, 0, 0.0))
+            totals[event["name"]] = (total + event["dur"], count + 1, max(longest, event["dur"]))
+        lines = [f"{'名称':<40}{'次数':>8}{'总计ms':>12}{'最长ms':>10}"]
+        for name, (total, count, longest) in sorted(totals.items(), key=lambda item: -item[1][0])[:limit]:
+            lines.append(f"{name:<40}{count:>8}{total / 1000:>12.1f}{longest / 1000:>10.1f}")
+        return "\n".join(lines)
+
+    def save(self):
+        """结束未完成的阶段，写出跟踪文件和 cProfile 结果"""
+        for cat in list(self._phases):
+            self.phase(cat, None)
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.cprofile_path)
+        with self._lock:
+            events = sorted(self.events, key=lambda e: e["ts"])
+        with open(self.trace_path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+
+
+def enable(trace_path, cprofile_path=None, origin=None):
+    """启用性能分析，返回分析器；origin 为时间零点（time.perf_counter() 的值，默认为现在）"""
+    global _profiler
+    _profiler = Profiler(trace_path, cprofile_path, origin)
+    return _profiler
+
+
+def finish():
+    """写出结果并停用性能分析，返回分析器（未启用时返回 None）"""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.save()
+        print(f"性能分析结果已保存: {profiler.trace_path}"
+              + (f", {profiler.cprofile_path}" if profiler.cprofile_path else ""), file=sys.stderr)
+        print(profiler.summary(), file=sys.stderr)
+    return profiler
+
+
+def is_enabled():
+    return _profiler is not None
+
+
+def record(name, cat, start, end, **args):
+    """记录一个已经结束的区间，未启用时不做任何事"""
+    if _profiler is not None:
+        _profiler.add(name, cat, start, end, args)
+
+
+def phase(cat, name):
+    """见 Profiler.phase，未启用时不做任何事"""
+    if _profiler is not None:
+        _profiler.phase(cat, name)
+
+
+class span:
+    """with span("名称", "类别", 参数=值): 记录代码块的耗时"""
+
+    def __init__(self, name, cat="ui", **args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if _profiler is not None:
+            _profiler.add(self.name, self.cat, self.start, time.perf_counter(), self.args)
+        return False
+
+
+def traced(name=None, cat="ui"):
+    """装饰器：记录每次调用的耗时，名称默认为函数的限定名"""
+    def decorator(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _profiler is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _profiler.add(label, cat, start, time.perf_counter())
+        return wrapper
+    return decorator
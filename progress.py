@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/progress.py
+# 解析 FFmpeg `-progress` 输出的 key=value 进度流，并据此平滑估算剩余时间
+
+import os
+import time
+
+PROGRESS_ARGS = ["-progress", "pipe:1", "-nostats"]
+
+
+def _to_float(value):
+    try:
+        return float(value.rstrip('x'))
+    except (ValueError, AttributeError):
+        return None
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+class ProgressParser:
+    """增量解析 `-progress` 输出
+
+    FFmpeg 每隔约0.5秒输出一组 key=value 行，以 progress=continue/end 结束。
+    feed() 返回本次数据中完整的进度块（字典列表）。值为 N/A 的字段为 None
+    （如编码器清空缓冲时的 out_time_us=N/A），可用 merge_progress() 沿用上一块的值。
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._block = {}
+
+    def feed(self, text):
+        self._buffer += text
+        lines = self._buffer.split('\n')
+        self._buffer = lines[-1]
+        snapshots = []
+        for line in lines[:-1]:
+            key, sep, value = line.strip().partition('=')
+            if not sep:
+                continue
+            self._block[key] = value.strip()
+            if key == 'progress':
+                snapshots.append(self._convert(self._block))
+                self._block = {}
+        return snapshots
+
+    @staticmethod
+    def _convert(block):
+        out_time_us = _to_int(block.get('out_time_us'))
+        if out_time_us is None:
+            # 旧版本FFmpeg中 out_time_ms 实际单位也是微秒
+            out_time_us = _to_int(block.get('out_time_ms'))
+        if out_time_us is not None:
+            out_time_us = max(out_time_us, 0)
+        return {
+            'out_time_sec': out_time_us / 1_000_000 if out_time_us is not None else None,
+            'frame': _to_int(block.get('frame')),
+            'fps': _to_float(block.get('fps')),
+            'speed': _to_float(block.get('speed')),
+            'total_size': _to_int(block.get('total_size')),
+            'finished': block.get('progress') == 'end',
+        }
+
+
+_PROGRESS_DEFAULTS = {'frame': 0, 'fps': 0.0, 'speed': 0.0, 'total_size': 0}
+
+
+def merge_progress(previous, snapshot):
+    """用上一个进度块补全本块中为 None 的字段；之前也没有时数值字段取 0，out_time_sec 保持 None"""
+    merged = dict(snapshot)
+    for key, value in snapshot.items():
+        if value is None:
+            merged[key] = (previous or {}).get(key, _PROGRESS_DEFAULTS.get(key))
+    return merged
+
+
+def writes_to_stdout(args):
+    """命令是否把输出写到标准输出（此时不能用 pipe:1 传递进度）"""
+    return any(arg in ('-', 'pipe:', 'pipe:1') for arg in args)
+
+
+def input_file_from_args(args):
+    """命令的第一个输入文件（-i 之后的普通文件），没有时返回空字符串"""
+    for i, arg in enumerate(args[:-1]):
+        if arg == '-i' and os.path.isfile(args[i + 1]):
+            return args[i + 1]
+    return ""
+
+
+# 剩余时间估算：用最近 ETA_WINDOW 秒内的 (时间, 完成比例) 做线性回归得到处理速率，
+# 再做指数加权平均，避免按瞬时 speed= 计算时剩余时间来回跳动
+ETA_WINDOW = 20.0
+ETA_SMOOTHING = 0.3
+
+
+class ProgressEstimator:
+    """根据完成比例 (0~1) 的时间序列估算剩余秒数"""
+
+    def __init__(self, window=ETA_WINDOW, smoothing=ETA_SMOOTHING):
+        self.window = window
+        self.smoothing = smoothing
+        self.samples = []  # [(时间, 完成比例)]
+        self.rate = None  # 平滑后的速率（每秒完成的比例）
+
+    def update(self, fraction, now=None):
+        """加入一个进度点，返回剩余秒数（样本不足时为 None）"""
+        now = time.monotonic() if now is None else now
+        self.samples.append((now, fraction))
+        while len(self.samples) > 2 and now - self.samples[0][0] > self.window:
+            self.samples.pop(0)
+        rate = self._regression_rate()
+        if rate is not None and rate > 0:
+            self.rate = rate if self.rate is None else self.smoothing * rate + (1 - self.smoothing) * self.rate
+        return self.eta()
+
+    def _regression_rate(self):
+        if len(self.samples) < 2:
+            return None
+        n = len(self.samples)
+        mean_t = sum(t for t, _ in self.samples) / n
+        mean_f = sum(f for _, f in self.samples) / n
+        variance = sum((t - mean_t) ** 2 for t, _ in self.samples)
+        if variance <= 0:
+            return None
+        return sum((t - mean_t) * (f - mean_f) for t, f in self.samples) / variance
+
+    def eta(self):
+        """剩余秒数，尚无法估算时返回 None"""
+        if not self.samples or not self.rate:
+            return None
+        return max(0.0, (1.0 - self.samples[-1][1]) / self.rate)
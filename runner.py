@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/runner.py
+# 无界面的 FFmpeg 执行器：以子进程并行运行命令，解析 -progress 进度（不依赖 PySide6）
+
+import os
+import re
+import sys
+import time
+import threading
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from progress import PROGRESS_ARGS, ProgressParser, ProgressEstimator, writes_to_stdout, merge_progress
+
+_DURATION_RE = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+
+STATUS_FINISHED = "finished"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+
+def default_worker_count():
+    """根据CPU核心数估算默认并行任务数"""
+    return max(2, (os.cpu_count() or 2) // 4)
+
+
+def prepare_ffmpeg_args(command_list, log_level="info"):
+    """将界面/命令行构建的命令转换为实际参数，返回 (参数列表, 是否通过 -progress 读取进度)
+
+    去掉开头的 'ffmpeg'，未指定日志级别时添加 -loglevel，并在可能时加上 -progress pipe:1。
+    """
+    if command_list[0].lower() == 'ffmpeg':
+        args = command_list[1:].copy()
+    else:
+        args = command_list.copy()
+
+    if not any(arg in ['-loglevel', '-v'] for arg in args):
+        args = ['-loglevel', log_level] + args
+
+    # 进度通过 -progress 的 key=value 流从标准输出读取，stderr 只保留日志
+    track_progress = '-progress' not in args and not writes_to_stdout(args)
+    if track_progress:
+        args = PROGRESS_ARGS + args
+    return ["-nostdin"] + args, track_progress
+
+
+class RunResult:
+    """一条命令的执行结果"""
+
+    def __init__(self, index, command, duration=0.0):
+        self.index = index
+        self.command = command
+        self.status = None
+        self.exit_code = None
+        self.duration = duration  # 输出时长(秒)；未知时从 ffmpeg 日志中读取输入时长
+        self.started_at = None
+        self.finished_at = None
+        self.log_tail = deque(maxlen=20)
+        self.last_progress = None  # 最后一个 -progress 进度块
+        self.estimator = ProgressEstimator()  # 平滑估算剩余时间
+        self.cpu_time = None  # 子进程的用户态+内核态CPU时间(秒)，平台不支持时为 None
+        self.peak_rss_mb = None  # 子进程的峰值常驻内存(MB)
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class Runner:
+    """并行执行 FFmpeg 命令
+
+    on_event(事件字典) 在工作线程中调用，事件: start / progress / end。
+    """
+
+    def __init__(self, ffmpeg_path="ffmpeg", max_workers=0, log_level="info", on_event=None):
+        self.ffmpeg_path = ffmpeg_path
+        self.max_workers = max_workers if max_workers > 0 else default_worker_count()
+        self.log_level = log_level
+        self.on_event = on_event
+        self._lock = threading.Lock()
+        self._processes = set()
+        self._cancelled = False
+
+    def _emit(self, event):
+        if self.on_event:
+            with self._lock:
+                self.on_event(event)
+
+    def cancel(self):
+        """终止所有正在运行的进程，未开始的命令不再执行"""
+        self._cancelled = True
+        for process in list(self._processes):
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+    def run(self, commands, start_index=0, durations=None):
+        """执行一组互不依赖的命令，返回与之对应的 RunResult 列表
+
+        事件中的任务编号从 start_index 开始，分多步执行时可保持编号唯一。
+        durations 为各命令的输出时长(秒)，用于计算进度百分比。
+        """
+        durations = durations or [0.0] * len(commands)
+        results = [RunResult(start_index + i, command, duration)
+                   for i, (command, duration) in enumerate(zip(commands, durations))]
+        if not results:
+            return results
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(results))) as executor:
+            list(executor.map(self._run_one, results))
+        return results
+
+    def _run_one(self, result):
+        if self._cancelled:
+            result.status = STATUS_CANCELLED
+            return result
+        args, track_progress = prepare_ffmpeg_args(result.command, self.log_level)
+        result.started_at = time.time()
+        self._emit({"event": "start", "job": result.index, "command": [self.ffmpeg_path] + args})
+        try:
+            process = subprocess.Popen([self.ffmpeg_path] + args, stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE, stdin=subprocess.DEVNULL)
+        except OSError as e:
+            result.log_tail.append(str(e))
+            result.exit_code = 127
+            return self._finish(result, STATUS_FAILED)
+        self._processes.add(process)
+
+        stderr_thread = threading.Thread(target=self._read_stderr, args=(process, result), daemon=True)
+        stderr_thread.start()
+        parser = ProgressParser() if track_progress else None
+        for raw in iter(process.stdout.readline, b''):
+            if parser is None:
+                continue
+            for snapshot in parser.feed(raw.decode('utf-8', 'ignore')):
+                advanced = snapshot['out_time_sec'] is not None
+                result.last_progress = merge_progress(result.last_progress, snapshot)
+                self._emit_progress(result, result.last_progress, advanced)
+        self._wait(process, result)
+        stderr_thread.join()
+        self._processes.discard(process)
+
+        result.exit_code = process.returncode
+        if self._cancelled:
+            return self._finish(result, STATUS_CANCELLED)
+        return self._finish(result, STATUS_FINISHED if process.returncode == 0 else STATUS_FAILED)
+
+    @staticmethod
+    def _wait(process, result):
+        """等待进程结束；支持 wait4 的平台同时读取子进程的资源占用"""
+        if not hasattr(os, "wait4"):
+            process.wait()
+            return
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        except ChildProcessError:
+            process.wait()
+            return
+        process.returncode = os.waitstatus_to_exitcode(status)
+        result.cpu_time = round(usage.ru_utime + usage.ru_stime, 3)
+        # ru_maxrss 在 Linux 上以 KB 为单位，在 macOS 上以字节为单位
+        divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+        result.peak_rss_mb = round(usage.ru_maxrss / divisor, 1)
+
+    def _read_stderr(self, process, result):
+        for raw in iter(process.stderr.readline, b''):
+            line = raw.decode('utf-8', 'ignore').rstrip()
+            if not line:
+                continue
+            result.log_tail.append(line)
+            if not result.duration:
+                match = _DURATION_RE.search(line)
+                if match:
+                    h, m, s = match.groups()
+                    result.duration = int(h) * 3600 + int(m) * 60 + float(s)
+
+    def _emit_progress(self, result, snapshot, advanced=True):
+        """advanced 为 False 时本块的输出时长为 N/A（已沿用上一块的值），不更新剩余时间估算"""
+        out_time = snapshot['out_time_sec']
+        percent = None
+        if result.duration > 0 and out_time is not None:
+            percent = round(min(100.0, out_time / result.duration * 100), 1)
+        if percent is None:
+            eta = None
+        elif advanced:
+            eta = result.estimator.update(percent / 100)
+        else:
+            eta = result.estimator.eta()
+        self._emit({"event": "progress", "job": result.index,
+                    "out_time": round(out_time, 3) if out_time is not None else None,
+                    "duration": result.duration or None, "percent": percent, "frame": snapshot['frame'],
+                    "fps": snapshot['fps'], "speed": snapshot['speed'], "total_size": snapshot['total_size'],
+                    "eta": round(eta, 1) if eta is not None else None})
+
+    def _finish(self, result, status):
+        result.status = status
+        result.finished_at = time.time()
+        event = {"event": "end", "job": result.index, "status": status, "exit_code": result.exit_code,
+                 "elapsed": round(result.elapsed, 3)}
+        if result.cpu_time is not None:
+            event.update(cpu_time=result.cpu_time, peak_rss_mb=result.peak_rss_mb)
+        if status == STATUS_FAILED:
+            event["log_tail"] = list(result.log_tail)
+        self._emit(event)
+        return result
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/stream_copy.py
+# 自动流复制：根据 ffprobe 数据判断输入的视频/音频流能否原样复制到目标容器，
+# 没有要求改变分辨率、帧率、码率等参数时改用 copy，避免不必要的重新编码（不依赖 PySide6）
+
+from commands import IMG_AUDIO_COPY_CODECS, bitrate_to_kbps
+from utils import AUDIO_SAMPLE_FORMATS, DEFAULT_COMPRESSION_LEVEL, LOSSY_AUDIO_CODECS
+
+# 编码器 -> 输出的编码（ffprobe 中的 codec_name）
+ENCODER_CODECS = {
+    "libx264": "h264", "h264_nvenc": "h264", "h264_amf": "h264", "h264_qsv": "h264",
+    "libx265": "hevc", "hevc_nvenc": "hevc", "hevc_amf": "hevc", "hevc_qsv": "hevc",
+    "vp9": "vp9", "libvpx-vp9": "vp9", "libaom-av1": "av1", "mpeg4": "mpeg4",
+    "aac": "aac", "mp3": "mp3", "libmp3lame": "mp3", "alac": "alac", "flac": "flac",
+    "opus": "opus", "libopus": "opus", "vorbis": "vorbis",
+}
+
+# 有损音频编码（按码率决定是否复制）
+LOSSY_CODECS = ("aac", "mp3", "opus", "vorbis")
+
+# 各输出格式可直接复制的编码，None 表示不限（Matroska）
+CONTAINER_COPY_CODECS = {
+    "mp4": {"video": ("h264", "hevc", "av1", "vp9", "mpeg4"), "audio": IMG_AUDIO_COPY_CODECS["mp4"]},
+    "mov": {"video": ("h264", "hevc", "mpeg4", "prores", "mjpeg"), "audio": IMG_AUDIO_COPY_CODECS["mov"]},
+    "mkv": None,
+    "webm": {"video": ("vp8", "vp9", "av1"), "audio": ("opus", "vorbis")},
+    "avi": {"video": ("h264", "mpeg4", "mjpeg"), "audio": ("mp3", "ac3", "pcm_s16le")},
+    "mp3": {"audio": ("mp3",)},
+    "flac": {"audio": ("flac",)},
+    "aac": {"audio": ("aac",)},
+    "opus": {"audio": ("opus",)},
+    "alac": {"audio": ("alac",)},
+    "m4a": {"audio": ("aac", "alac")},
+}
+
+
+def first_stream(probe_data, codec_type):
+    """第一个指定类型的流（视频不包括封面图片），没有时返回 None"""
+    for stream in (probe_data or {}).get("streams", []):
+        if stream.get("codec_type") != codec_type:
+            continue
+        if codec_type == "video" and (stream.get("disposition") or {}).get("attached_pic"):
+            continue
+        return stream
+    return None
+
+
+def container_accepts(output_format, codec_type, codec_name):
+    allowed = CONTAINER_COPY_CODECS.get(output_format, {})
+    if allowed is None:
+        return True
+    return codec_name in allowed.get(codec_type, ())
+
+
+def _stream_kbps(stream):
+    try:
+        return float(stream["bit_rate"]) / 1000
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _audio_decision(stream, encoder, bitrate, output_format, changes):
+    """返回 (是否复制, 说明)"""
+    source = stream.get("codec_name")
+    target = ENCODER_CODECS.get(encoder, encoder)
+    if changes:
+        return False, f"音频: 设置了{'、'.join(changes)}，重新编码为 {target}"
+    if source != target:
+        return False, f"音频: 源编码 {source} 与所选 {target} 不同，重新编码"
+    if not container_accepts(output_format, "audio", source):
+        return False, f"音频: {output_format} 不支持直接复制 {source}，重新编码"
+    if target in LOSSY_CODECS and bitrate:
+        # 有损编码：源码率不高于目标码率时重新编码不会提高音质，只会再损失一次
+        source_kbps, target_kbps = _stream_kbps(stream), bitrate_to_kbps(bitrate)
+        if source_kbps is None or target_kbps is None:
+            return False, f"音频: 源码率未知，按 {bitrate} 重新编码"
+        if source_kbps > target_kbps * 1.05:
+            return False, f"音频: 源码率 {source_kbps:.0f}k 高于目标 {bitrate}，重新编码"
+        return True, f"音频: 源编码 {source} ({source_kbps:.0f}k) 不高于目标 {bitrate}，直接复制"
+    return True, f"音频: 源编码 {source} 与所选编码器一致，直接复制"
+
+
+def plan_video_copy(probe_data, output_format, options):
+    """视频处理页：返回 (调整后的 options, [说明])
+
+    视频流在编码与所选编码器相同、容器支持且未设置分辨率/帧率/码率/CRF/CQ/预设/字幕时复制；
+    音频流在编码相同、容器支持且源码率不高于目标码率时复制。没有媒体信息时不做调整。
+    """
+    options = dict(options)
+    notes = []
+    video = first_stream(probe_data, "video")
+    if video is not None and options.get("video_codec") != "copy":
+        source = video.get("codec_name")
+        target = ENCODER_CODECS.get(options.get("video_codec"), options.get("video_codec"))
+        changes = [label for key, label in (("resolution", "分辨率"), ("fps", "帧率"), ("video_bitrate", "码率"),
+                                            ("crf", "CRF"), ("cq", "CQ"), ("preset", "预设"),
+                                            ("subtitle", "字幕")) if options.get(key)]
+        if changes:
+            notes.append(f"视频: 设置了{'、'.join(changes)}，重新编码为 {target}")
+        elif source != target:
+            notes.append(f"视频: 源编码 {source} 与所选 {target} 不同，重新编码")
+        elif not container_accepts(output_format, "video", source):
+            notes.append(f"视频: {output_format} 不支持直接复制 {source}，重新编码")
+        else:
+            options["video_codec"] = "copy"
+            notes.append(f"视频: 源编码 {source} 与所选编码器一致且未修改参数，直接复制")
+    audio = first_stream(probe_data, "audio")
+    if audio is not None and options.get("audio_codec") != "copy":
+        copy, note = _audio_decision(audio, options.get("audio_codec"), options.get("audio_bitrate"),
+                                     output_format, [])
+        if copy:
+            options["audio_codec"] = "copy"
+        notes.append(note)
+    return options, notes
+
+
+def plan_audio_copy(probe_data, options):
+    """音频处理页：返回 (调整后的 options, [说明])
+
+    采样率、采样格式和 FLAC 压缩等级保持默认，且源编码与目标相同时复制；WAV 总是按所选位深输出。
+    """
+    options = dict(options)
+    audio = first_stream(probe_data, "audio")
+    output_format = options.get("format")
+    if audio is None or output_format == "wav" or options.get("codec") == "copy":
+        return options, []
+    changes = []
+    if options.get("sample_rate") and options["sample_rate"] != "(默认)":
+        changes.append("采样率")
+    if options.get("codec") not in LOSSY_AUDIO_CODECS and AUDIO_SAMPLE_FORMATS.get(options.get("bit_depth")):
+        changes.append("采样格式")
+    if options.get("compression_level") and options["compression_level"] != DEFAULT_COMPRESSION_LEVEL:
+        changes.append("压缩等级")
+    copy, note = _audio_decision(audio, options.get("codec"), options.get("bitrate"), output_format, changes)
+    if copy:
+        options["codec"] = "copy"
+    return options, [note]
@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/tabs/__init__.py
+# 各选项卡的实现，由 ui_tabs.load_tab_class 按需导入
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/tabs/about_tab.py
+# 关于选项卡
+
+from ui.about_tab_ui import Ui_AboutTab
+from ui_tabs import BaseTab
+
+
+class AboutTab(BaseTab, Ui_AboutTab):
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.setupUi(self)
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/tabs/audio_tab.py
+# 音频处理选项卡
+
+import os
+from PySide6.QtWidgets import QFileDialog
+
+from ui.audio_tab_ui import Ui_AudioTab
+from ui_tabs import display_error, BaseTab
+from utils import (
+    AUDIO_BITRATES, AUDIO_FORMATS, AUDIO_FORMAT_CODECS, AUDIO_SAMPLE_RATES, WAV_BIT_DEPTH_CODECS,
+    AUDIO_SAMPLE_FORMATS, LOSSY_AUDIO_CODECS, AUDIO_INPUT_EXTENSIONS, DEFAULT_COMPRESSION_LEVEL
+)
+from commands import build_audio_command
+from probe_cache import get_probe_cache
+from stream_copy import plan_audio_copy
+
+
+class AudioTab(BaseTab, Ui_AudioTab):
+    job_label = "音频处理"
+    batch_extensions = AUDIO_INPUT_EXTENSIONS
+
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.setupUi(self)
+        self._connect_signals()
+        self._initialize_ui_state()
+
+    def _connect_signals(self):
+        self.select_input_button.clicked.connect(lambda: self.main_window.select_file(self.input_edit))
+        self.select_output_button.clicked.connect(self.select_output_path)
+        self.run_button.clicked.connect(self._run_command)
+        self.format_combo.currentTextChanged.connect(self._on_audio_format_changed)
+        self.codec_combo.currentTextChanged.connect(self._update_dynamic_options)
+        self.bitrate_combo.currentTextChanged.connect(self._update_dynamic_options)
+        self._connect_batch_signals()
+
+    def _initialize_ui_state(self):
+        self.format_combo.addItems(AUDIO_FORMATS)
+        self.sample_rate_combo.addItems(AUDIO_SAMPLE_RATES)
+        self.bitrate_combo.addItems(AUDIO_BITRATES)
+        self.bitrate_combo.setCurrentText("192k")
+        self.compression_combo.addItems(map(str, range(13)))
+        self.compression_combo.setCurrentText(DEFAULT_COMPRESSION_LEVEL)
+        from config import get_config
+        self.auto_copy_check.setChecked(get_config().get("auto_stream_copy", True))
+        self._on_audio_format_changed(self.format_combo.currentText())
+
+    def _on_audio_format_changed(self, a_format):
+        self.codec_combo.clear()
+        codecs = AUDIO_FORMAT_CODECS.get(a_format, [])
+        self.codec_combo.addItems(codecs)
+
+        self.bit_depth_combo.clear()
+        if a_format == 'wav':
+            self.bit_depth_combo.addItems(WAV_BIT_DEPTH_CODECS.keys())
+        else:
+            self.bit_depth_combo.addItems(AUDIO_SAMPLE_FORMATS.keys())
+        
+        self.auto_set_output_path(self.input_edit.text())
+        self._update_dynamic_options()
+
+    def _update_dynamic_options(self):
+        a_format = self.format_combo.currentText()
+        codec = self.codec_combo.currentText()
+        if not codec: return
+        
+        is_copy = codec == 'copy'
+        is_lossy = codec in LOSSY_AUDIO_CODECS
+        is_flac = codec == 'flac'
+        is_wav = a_format == 'wav'
+
+        self.sample_rate_combo.setEnabled(not is_copy)
+        self.bitrate_combo.setEnabled(not is_copy)
+        self.compression_combo.setEnabled(not is_copy)
+
+        self.bitrate_label.setVisible(is_lossy)
+        self.bitrate_combo.setVisible(is_lossy)
+
+        self.compression_label.setVisible(is_flac)
+        self.compression_combo.setVisible(is_flac)
+        
+        # MODIFIED: For lossy codecs, bit depth is not applicable. Also hide for 'copy'
+        is_bit_depth_visible = not is_copy and not is_lossy
+        self.bit_depth_label.setVisible(is_bit_depth_visible)
+        self.bit_depth_combo.setVisible(is_bit_depth_visible)
+        self.bit_depth_combo.setEnabled(is_bit_depth_visible)
+
+        if is_bit_depth_visible:
+            self.bit_depth_label.setText("位深:" if is_wav else "采样格式:")
+
+    def auto_set_output_path(self, input_path):
+        if not input_path: return
+        base_path, _ = os.path.splitext(input_path)
+        selected_format = self.format_combo.currentText()
+        self.output_edit.setText(f"{base_path}_output.{selected_format}")
+
+    def select_output_path(self):
+        filter_str = f"{self.format_combo.currentText().upper()} (*.{self.format_combo.currentText()});;All Files (*)"
+        default_path = self.output_edit.text() or os.path.dirname(self.input_edit.text())
+        file_name, _ = QFileDialog.getSaveFileName(self, "选择输出路径", default_path, filter_str)
+        if file_name: self.output_edit.setText(file_name)
+        
+    def _validate_inputs(self):
+        if not self.input_edit.text() or not os.path.exists(self.input_edit.text()):
+            display_error(self.console, "输入音频文件不存在或未指定。"); return False
+        if not self.output_edit.text():
+            display_error(self.console, "输出文件路径不能为空。"); return False
+        return self._validate_options()
+
+    def _validate_options(self):
+        if not self.codec_combo.currentText():
+            display_error(self.console, "未选择任何有效的编码器。"); return False
+        return True
+
+    def _collect_options(self):
+        """收集界面上的音频参数（隐藏的控件不参与）"""
+        return {
+            "format": self.format_combo.currentText(),
+            "codec": self.codec_combo.currentText(),
+            "bitrate": self.bitrate_combo.currentText() if self.bitrate_label.isVisible() else "",
+            "compression_level": self.compression_combo.currentText() if self.compression_label.isVisible() else "",
+            "bit_depth": self.bit_depth_combo.currentText(),
+            "sample_rate": self.sample_rate_combo.currentText(),
+        }
+
+    def _preset_params(self):
+        """当前参数对应的命令行选项（保存为预设）"""
+        options = self._collect_options()
+        params = {"operation": "audio", "format": options["format"], "codec": options["codec"]}
+        for key in ("bitrate", "compression_level"):
+            if options[key]:
+                params[key] = options[key]
+        if options["bit_depth"] and options["bit_depth"] != "(默认)":
+            params["bit_depth"] = options["bit_depth"].split("-")[0]
+        if options["sample_rate"].isdigit():
+            params["sample_rate"] = options["sample_rate"]
+        if self.auto_copy_check.isChecked():
+            params["auto_copy"] = True
+        return params
+
+    def _get_command(self):
+        options = self._stream_copy_options(self.input_edit.text(), self._collect_options(), notes=True)
+        return build_audio_command(self.input_edit.text(), self.output_edit.text(), options)
+
+    def _stream_copy_options(self, input_file, options, notes=False):
+        """勾选“自动复制兼容的流”时，根据缓存的媒体信息在无需重新编码时改为 copy"""
+        if not self.auto_copy_check.isChecked():
+            return options
+        probe_data = get_probe_cache().get(input_file)
+        if probe_data is None:
+            if notes:
+                self.command_notes.append("自动流复制: 没有该文件的媒体信息，按所选参数编码")
+            return options
+        options, reasons = plan_audio_copy(probe_data, options)
+        if notes:
+            self.command_notes.extend(f"自动流复制 - {reason}" for reason in reasons)
+        return options
+
+    def _batch_output_format(self):
+        return self.format_combo.currentText()
+
+    def _build_batch_command(self, input_file, output_file):
+        return build_audio_command(input_file, output_file,
+                                   self._stream_copy_options(input_file, self._collect_options()))
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/tabs/common_ops_tab.py
+# 常用工具选项卡
+
+import os
+from PySide6.QtWidgets import QFileDialog
+
+from ui.common_ops_tab_ui import Ui_CommonOpsTab
+from ui_tabs import validate_time_format, display_error, BaseTab
+from utils import AUDIO_INPUT_EXTENSIONS, time_str_to_seconds
+from commands import build_img_audio_command, expand_batch_inputs, album_output_path
+from job_queue import JobGroup, JOB_FINISHED
+from trim import build_fast_trim_command, prepare_smart_cut, check_av_sync, SmartCutError
+from probe_cache import probe_media
+from background import run_in_background
+
+
+def _probe_audio_tracks(ffprobe_path, tracks):
+    """读取每首音轨第一个音频流的编码和时长，返回 [(文件, (编码或None, 时长))]（在后台线程中调用）"""
+    result = []
+    for track in tracks:
+        data = probe_media(track, ffprobe_path) or {}
+        codec = next((s.get("codec_name") for s in data.get("streams", []) if s.get("codec_type") == "audio"), None)
+        try:
+            duration = float(data["format"]["duration"])
+        except (KeyError, TypeError, ValueError):
+            duration = 0
+        result.append((track, (codec, duration)))
+    return result
+
+
+class CommonOperationsTab(BaseTab, Ui_CommonOpsTab):
+    job_label = "常用工具"
+
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.setupUi(self)
+        self._sync_checks = {}  # 智能剪切合并任务的编号 -> 输出文件，完成后检查音视频同步
+        self._connect_signals()
+        self.current_command_type = None
+
+    def _connect_signals(self):
+        self.select_trim_input_button.clicked.connect(lambda: self.main_window.select_file(self.trim_input_edit))
+        self.select_trim_output_button.clicked.connect(self.select_trim_output_path)
+        self.trim_button.clicked.connect(lambda: self._run_specific_command('trim'))
+        
+        self.select_img_button.clicked.connect(self.select_image_file)
+        self.select_audio_button.clicked.connect(lambda: self.main_window.select_file(self.audio_input_edit))
+        self.select_img_audio_output_button.clicked.connect(self.select_img_audio_output_path)
+        self.img_audio_button.clicked.connect(lambda: self._run_specific_command('img_audio'))
+        self.select_album_dir_button.clicked.connect(
+            lambda: self._select_directory(self.album_dir_edit, "选择专辑文件夹"))
+        self.select_album_output_button.clicked.connect(
+            lambda: self._select_directory(self.album_output_dir_edit, "选择输出文件夹"))
+        self.album_button.clicked.connect(self._run_album)
+        self.process_handler.job_queue.job_finished.connect(self._on_job_finished)
+
+    def _run_specific_command(self, command_type):
+        self.current_command_type = command_type
+        if command_type == 'trim' and self.trim_mode_combo.currentIndex() == 1:
+            self._run_smart_cut()
+        elif command_type == 'img_audio':
+            self._run_img_audio()
+        else:
+            self._run_command()
+
+    # --- 图声合成 ---
+    # 先在后台读取音频编码（有缓存），输出容器支持时直接复制音频
+
+    def _run_img_audio(self):
+        self.main_window.reset_progress_display()
+        self.main_window.switch_to_console_tab()
+        if not self._validate_inputs():
+            return
+        self.img_audio_button.setEnabled(False)
+        run_in_background(_probe_audio_tracks, self.process_handler._get_ffprobe_path(),
+                          [self.audio_input_edit.text()],
+                          on_finished=self._on_img_audio_probed, on_failed=self._on_img_audio_probe_failed)
+
+    def _on_img_audio_probed(self, tracks):
+        self.img_audio_button.setEnabled(True)
+        self.album_button.setEnabled(True)
+        audio_file, (codec, duration) = tracks[0]
+        command = build_img_audio_command(self.img_input_edit.text(), audio_file,
+                                          self.img_audio_output_edit.text(), self._overwrite_enabled(), codec,
+                                          duration)
+        is_started, message = self.process_handler.run_ffmpeg(command, self._job_description(command),
+                                                              duration=duration)
+        if not is_started:
+            self.console.append(f"<font color='#e67e22'>{message}</font>"); return
+        self.console.clear()
+        self.console.append(f"<b>{message}</b>\n<hr>")
+
+    def _on_img_audio_probe_failed(self, error):
+        self.img_audio_button.setEnabled(True)
+        self.album_button.setEnabled(True)
+        display_error(self.console, f"读取音频信息失败: {error}")
+
+    def _run_album(self):
+        self.main_window.switch_to_console_tab()
+        image = self.img_input_edit.text()
+        if not image or not os.path.exists(image):
+            display_error(self.console, "请先选择封面图片。"); return
+        album_dir = self.album_dir_edit.text().strip()
+        if not album_dir or not os.path.isdir(album_dir):
+            display_error(self.console, "专辑文件夹不存在或未指定。"); return
+        output_dir = self.album_output_dir_edit.text().strip()
+        if output_dir and not os.path.isdir(output_dir):
+            display_error(self.console, "输出文件夹不存在。"); return
+        tracks = expand_batch_inputs(album_dir, AUDIO_INPUT_EXTENSIONS)
+        if not tracks:
+            display_error(self.console, "专辑文件夹中没有音频文件。"); return
+        self.album_button.setEnabled(False)
+        self.console.append(f"<b>专辑合成: 正在读取 {len(tracks)} 首音轨的信息...</b>")
+        run_in_background(_probe_audio_tracks, self.process_handler._get_ffprobe_path(), tracks,
+                          on_finished=lambda result: self._on_album_probed(image, output_dir or None, result),
+                          on_failed=self._on_img_audio_probe_failed)
+
+    def _on_album_probed(self, image, output_dir, tracks):
+        self.album_button.setEnabled(True)
+        group = JobGroup("专辑合成")
+        overwrite = self._overwrite_enabled()
+        copied = 0
+        for track, (codec, duration) in tracks:
+            command = build_img_audio_command(image, track, album_output_path(track, output_dir), overwrite, codec,
+                                              duration)
+            copied += "copy" in command
+            self.process_handler.run_ffmpeg(command, self._job_description(command), duration=duration, group=group)
+        self.console.clear()
+        self.console.append(f"<b>专辑合成: 已加入 {len(tracks)} 个任务，其中 {copied} 首直接复制音频 "
+                            f"(并行上限 {self.process_handler.job_queue.max_workers})</b>\n<hr>")
+
+    def _job_duration(self):
+        if self.current_command_type != 'trim':
+            return super()._job_duration()
+        # 截取的进度按截取长度计算
+        start_sec, end_sec = self._trim_range()
+        if end_sec is None:
+            if self.main_window.total_duration_sec <= 0:
+                return 0
+            end_sec = self.main_window.total_duration_sec
+        return max(end_sec - start_sec, 0)
+
+    def _trim_range(self):
+        """返回 (开始秒数, 结束秒数或None)"""
+        start_time = self.start_time_edit.text()
+        end_time = self.end_time_edit.text()
+        start_sec = time_str_to_seconds(start_time) if start_time else 0.0
+        end_sec = time_str_to_seconds(end_time) if end_time else None
+        return start_sec, end_sec
+
+    def _run_smart_cut(self):
+        self.main_window.reset_progress_display()
+        self.main_window.switch_to_console_tab()
+        if not self._validate_inputs():
+            return
+        start_sec, end_sec = self._trim_range()
+        self.trim_button.setEnabled(False)
+        self.console.append("<b>智能剪切: 正在分析关键帧...</b>")
+        # 读取媒体信息和关键帧可能需要数秒，放到后台线程
+        run_in_background(prepare_smart_cut, self.process_handler._get_ffprobe_path(),
+                          self.trim_input_edit.text(), self.trim_output_edit.text(),
+                          start_sec, end_sec, self._overwrite_enabled(),
+                          on_finished=self._on_smart_cut_ready, on_failed=self._on_smart_cut_failed)
+
+    def _on_smart_cut_ready(self, plan):
+        self.trim_button.setEnabled(True)
+        group = JobGroup("智能剪切")
+        # 各片段互不依赖，可并行；合并任务等待所有片段完成，结束后删除临时目录
+        segment_jobs = [self.process_handler.submit_ffmpeg(segment["command"], segment["description"],
+                                                           duration=segment["duration"], group=group)
+                        for segment in plan["segments"]]
+        final = plan["final"]
+        final_job = self.process_handler.submit_ffmpeg(final["command"], final["description"],
+                                                       duration=final["duration"], group=group,
+                                                       depends_on=segment_jobs, cleanup_paths=[plan["work_dir"]])
+        self._sync_checks[final_job.id] = final["command"][-1]
+        encoded = sum(s["duration"] for s in plan["segments"] if s["mode"] == "encode")
+        copied = sum(s["duration"] for s in plan["segments"] if s["mode"] == "copy")
+        self.console.clear()
+        self.console.append(f"<b>智能剪切: 重新编码 {encoded:.2f} 秒, 直接复制 {copied:.2f} 秒 "
+                            f"(共 {len(segment_jobs) + 1} 个任务)</b>\n<hr>")
+
+    def _on_job_finished(self, job):
+        output_file = self._sync_checks.pop(job.id, None)
+        if output_file is None or job.status != JOB_FINISHED:
+            return
+        run_in_background(check_av_sync, self.process_handler._get_ffprobe_path(), output_file,
+                          on_finished=self._on_sync_checked)
+
+    def _on_sync_checked(self, result):
+        passed, message = result
+        color = '#2ecc71' if passed else '#e67e22'
+        self.console.append(f"<font color='{color}'>智能剪切检查: {message}</font>")
+
+    def _on_smart_cut_failed(self, error):
+        self.trim_button.setEnabled(True)
+        if not isinstance(error, SmartCutError):
+            display_error(self.console, f"智能剪切失败: {error}")
+            return
+        self._run_command()
+        self.console.append(f"<font color='#e67e22'>无法智能剪切: {error}，已改用快速截取。</font>")
+
+    def _overwrite_enabled(self):
+        try:
+            from config import get_config
+            return get_config().get("overwrite_files", True)
+        except ImportError:
+            return True
+
+    def select_trim_output_path(self):
+        default_dir = os.path.dirname(self.trim_input_edit.text())
+        file_name, _ = QFileDialog.getSaveFileName(self, "选择输出文件", default_dir)
+        if file_name: self.trim_output_edit.setText(file_name)
+
+    def select_image_file(self):
+        file_name, _ = QFileDialog.getOpenFileName(self, "选择图片文件", "", "Image Files (*.png *.jpg *.jpeg *.bmp)")
+        if file_name: self.img_input_edit.setText(file_name)
+
+    def select_img_audio_output_path(self):
+        default_dir = os.path.dirname(self.img_input_edit.text())
+        file_name, _ = QFileDialog.getSaveFileName(self, "选择输出视频", default_dir, "Video Files (*.mp4)")
+        if file_name: self.img_audio_output_edit.setText(file_name)
+
+    def _validate_inputs(self):
+        if self.current_command_type == 'trim':
+            if not self.trim_input_edit.text() or not os.path.exists(self.trim_input_edit.text()):
+                display_error(self.console, "截取输入的视频文件不存在或未指定。"); return False
+            if not self.trim_output_edit.text():
+                display_error(self.console, "截取输出的文件路径不能为空。"); return False
+            if not validate_time_format(self.start_time_edit.text()):
+                display_error(self.console, f"无效的开始时间格式: {self.start_time_edit.text()}"); return False
+            if not validate_time_format(self.end_time_edit.text()):
+                display_error(self.console, f"无效的结束时间格式: {self.end_time_edit.text()}"); return False
+            start_sec, end_sec = self._trim_range()
+            if end_sec is not None and end_sec <= start_sec:
+                display_error(self.console, "结束时间必须晚于开始时间。"); return False
+        elif self.current_command_type == 'img_audio':
+            if not self.img_input_edit.text() or not os.path.exists(self.img_input_edit.text()):
+                display_error(self.console, "输入的图片文件不存在或未指定。"); return False
+            if not self.audio_input_edit.text() or not os.path.exists(self.audio_input_edit.text()):
+                display_error(self.console, "图声合成的输出路径不能为空。"); return False
+            if not self.img_audio_output_edit.text():
+                display_error(self.console, "图声合成的输出路径不能为空。"); return False
+        return True
+
+    def _get_command(self):
+        # 获取覆盖设置
+        try:
+            from config import get_config
+            config = get_config()
+            overwrite = config.get("overwrite_files", True)
+        except ImportError:
+            overwrite = True
+        
+        if self.current_command_type == 'trim':
+            # -ss 放在 -i 之前：直接定位到关键帧，不必从文件开头读取
+            start_sec, end_sec = self._trim_range()
+            return build_fast_trim_command(self.trim_input_edit.text(), self.trim_output_edit.text(),
+                                           start_sec, end_sec, overwrite)
+
+        elif self.current_command_type == 'img_audio':
+            return build_img_audio_command(self.img_input_edit.text(), self.audio_input_edit.text(),
+                                           self.img_audio_output_edit.text(), overwrite)
+        return None
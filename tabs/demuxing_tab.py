@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/tabs/demuxing_tab.py
+# 音视频分离选项卡
+
+import os
+
+from ui.demuxing_tab_ui import Ui_DemuxingTab
+from ui_tabs import display_error, BaseTab
+from commands import build_demux_command, plan_stream_extraction, build_extract_all_command
+from probe_cache import probe_media
+from background import run_in_background
+
+
+class DemuxingTab(BaseTab, Ui_DemuxingTab):
+    job_label = "音视频分离"
+
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.setupUi(self)
+        self._connect_signals()
+        self.current_stream_type = None
+
+    def _connect_signals(self):
+        self.select_input_button.clicked.connect(lambda: self.main_window.select_file(self.input_edit))
+        self.extract_video_button.clicked.connect(lambda: self._run_demux_command('video'))
+        self.extract_audio_button.clicked.connect(lambda: self._run_demux_command('audio'))
+        self.extract_all_button.clicked.connect(self._run_extract_all)
+
+    def _run_demux_command(self, stream_type):
+        self.current_stream_type = stream_type
+        self._run_command()
+
+    def _run_extract_all(self):
+        self.main_window.reset_progress_display()
+        self.main_window.switch_to_console_tab()
+        if not self._validate_inputs():
+            return
+        self.extract_all_button.setEnabled(False)
+        input_file = self.input_edit.text()
+        run_in_background(probe_media, input_file, self.process_handler._get_ffprobe_path(),
+                          on_finished=lambda data: self._on_streams_probed(input_file, data),
+                          on_failed=self._on_extract_all_failed)
+
+    def _on_streams_probed(self, input_file, probe_data):
+        self.extract_all_button.setEnabled(True)
+        if probe_data is None:
+            display_error(self.console, "无法读取媒体信息 (需要 FFprobe)。"); return
+        streams = plan_stream_extraction(input_file, probe_data)
+        from config import get_config
+        try:
+            command = build_extract_all_command(input_file, streams, get_config().get("overwrite_files", True))
+        except ValueError as e:
+            display_error(self.console, str(e)); return
+        is_started, message = self.process_handler.run_ffmpeg(
+            command, f"{self.job_label}: {os.path.basename(input_file)} (全部 {len(streams)} 个流)",
+            duration=self.main_window.total_duration_sec,
+            total_frames=self.main_window.total_frames)
+        if not is_started:
+            self.console.append(f"<font color='#e67e22'>{message}</font>"); return
+        type_names = {"video": "视频", "audio": "音频", "subtitle": "字幕", "attachment": "附件"}
+        self.console.clear()
+        self.console.append(f"<b>提取全部流: 共 {len(streams)} 个，只读取一次文件</b>")
+        for stream in streams:
+            language = f" ({stream['language']})" if stream["language"] else ""
+            self.console.append(f"#{stream['index']} {type_names[stream['type']]} {stream['codec']}{language}"
+                                f" → {os.path.basename(stream['output'])}")
+        self.console.append(f"<b>{message}</b>\n<hr>")
+
+    def _on_extract_all_failed(self, error):
+        self.extract_all_button.setEnabled(True)
+        display_error(self.console, f"读取媒体信息失败: {error}")
+
+    def _validate_inputs(self):
+        if not self.input_edit.text() or not os.path.exists(self.input_edit.text()):
+            display_error(self.console, "输入文件不存在或未指定。"); return False
+        return True
+
+    def _get_command(self):
+        try:
+            from config import get_config
+            config = get_config()
+            overwrite = config.get("overwrite_files", True)
+        except ImportError:
+            overwrite = True
+        return build_demux_command(self.input_edit.text(), self.current_stream_type, overwrite)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/tabs/muxing_tab.py
+# 音视频合并选项卡
+
+import os
+from PySide6.QtWidgets import QFileDialog
+
+from ui.muxing_tab_ui import Ui_MuxingTab
+from ui_tabs import display_error, BaseTab
+from utils import SUBTITLE_FORMATS
+from commands import build_mux_command
+
+
+class MuxingTab(BaseTab, Ui_MuxingTab):
+    job_label = "音视频合并"
+
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.setupUi(self)
+        self._connect_signals()
+
+    def _connect_signals(self):
+        self.select_video_button.clicked.connect(lambda: self.main_window.select_file(self.video_input_edit))
+        self.select_audio_button.clicked.connect(lambda: self.main_window.select_file(self.audio_input_edit))
+        self.select_subtitle_button.clicked.connect(self.select_subtitle_file)
+        self.select_output_button.clicked.connect(self.select_output_path)
+        self.run_button.clicked.connect(self._run_command)
+    
+    def select_subtitle_file(self):
+        file_name, _ = QFileDialog.getOpenFileName(self, "选择字幕文件", "", SUBTITLE_FORMATS)
+        if file_name: self.subtitle_input_edit.setText(file_name)
+
+    def select_output_path(self):
+        default_dir = os.path.dirname(self.video_input_edit.text())
+        file_name, _ = QFileDialog.getSaveFileName(self, "选择输出文件", default_dir, "Media Files (*.mp4 *.mkv)")
+        if file_name: self.output_edit.setText(file_name)
+        
+    def _validate_inputs(self):
+        if not self.video_input_edit.text() or not os.path.exists(self.video_input_edit.text()):
+            display_error(self.console, "输入的视频文件不存在或未指定。"); return False
+        if not self.audio_input_edit.text() or not os.path.exists(self.audio_input_edit.text()):
+            display_error(self.console, "输入的音频文件不存在或未指定。"); return False
+        if self.subtitle_input_edit.text() and not os.path.exists(self.subtitle_input_edit.text()):
+            display_error(self.console, "指定的字幕文件不存在。"); return False
+        if not self.output_edit.text():
+            display_error(self.console, "输出文件路径不能为空。"); return False
+        return True
+
+    def _get_command(self):
+        return build_mux_command(self.video_input_edit.text(), self.audio_input_edit.text(),
+                                 self.output_edit.text(), self.subtitle_input_edit.text())
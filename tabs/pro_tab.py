@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/tabs/pro_tab.py
+# 专业命令选项卡
+
+from ui.pro_tab_ui import Ui_ProfessionalTab
+from ui_tabs import display_error, BaseTab
+
+
+class ProfessionalTab(BaseTab, Ui_ProfessionalTab):
+    job_label = "专业命令"
+
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.setupUi(self)
+        self._connect_signals()
+
+    def _connect_signals(self):
+        self.run_button.clicked.connect(self._run_command)
+    
+    def _validate_inputs(self):
+        if not self.command_input.toPlainText().strip():
+            display_error(self.console, "命令不能为空。")
+            return False
+        return True
+
+    def _get_command(self):
+        command_text = self.command_input.toPlainText().strip()
+        try:
+            import shlex
+            return shlex.split(command_text)
+        except ImportError:
+            return command_text.split()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/tabs/settings_tab.py
+# 设置选项卡
+
+from PySide6.QtWidgets import QFileDialog, QMessageBox
+
+from ui.settings_tab_ui import Ui_SettingsTab
+from ui_tabs import BaseTab
+from probe_cache import get_probe_cache
+from capabilities import check_binaries
+from background import run_in_background
+
+
+class SettingsTab(BaseTab, Ui_SettingsTab):
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.setupUi(self)
+        self._connect_signals()
+        self._load_config()
+    
+    def _connect_signals(self):
+        self.ffmpeg_browse_button.clicked.connect(lambda: self._browse_file(self.ffmpeg_path_edit, "选择FFmpeg可执行文件", "Executable Files (*.exe);;All Files (*)"))
+        self.ffprobe_browse_button.clicked.connect(lambda: self._browse_file(self.ffprobe_path_edit, "选择FFprobe可执行文件", "Executable Files (*.exe);;All Files (*)"))
+        self.test_button.clicked.connect(self._test_ffmpeg)
+        self.save_button.clicked.connect(self._save_config)
+        self.reset_button.clicked.connect(self._reset_to_defaults)
+        self.clear_probe_cache_button.clicked.connect(self._clear_probe_cache)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._update_probe_cache_stats()
+    
+    def _update_probe_cache_stats(self):
+        stats = get_probe_cache().stats()
+        self.probe_cache_label.setText(
+            f"条目: {stats['entries']}/{stats['max_entries']} | 本次命中: {stats['hits']} | 未命中: {stats['misses']}")
+    
+    def _clear_probe_cache(self):
+        get_probe_cache().clear()
+        self._update_probe_cache_stats()
+        self.console.append("<font color='#2ecc71'>媒体信息缓存已清空</font>")
+    
+    def _browse_file(self, line_edit, title, filter_str):
+        file_name, _ = QFileDialog.getOpenFileName(self, title, "", filter_str)
+        if file_name:
+            line_edit.setText(file_name)
+    
+    def _load_config(self):
+        try:
+            from config import get_config
+            config = get_config()
+            
+            # FFmpeg路径
+            ffmpeg_path = config.get("ffmpeg_path", "ffmpeg")
+            self.ffmpeg_path_edit.setText(ffmpeg_path if ffmpeg_path != "ffmpeg" else "")
+            
+            # FFprobe路径
+            ffprobe_path = config.get("ffprobe_path", "ffprobe")
+            self.ffprobe_path_edit.setText(ffprobe_path if ffprobe_path != "ffprobe" else "")
+            
+            # 复选框设置
+            self.overwrite_files_check.setChecked(config.get("overwrite_files", True))
+            self.max_jobs_spin.setValue(config.get("max_concurrent_jobs", 0))
+            self.console_lines_spin.setValue(config.get("console_max_lines", 5000))
+            
+        except ImportError:
+            self.console.append("<font color='#e74c3c'>错误: 配置模块加载失败</font>")
+    
+    def _save_config(self):
+        try:
+            from config import get_config
+            config = get_config()
+            
+            # FFmpeg路径
+            ffmpeg_path = self.ffmpeg_path_edit.text().strip()
+            config.set("ffmpeg_path", ffmpeg_path if ffmpeg_path else "ffmpeg")
+            
+            # FFprobe路径
+            ffprobe_path = self.ffprobe_path_edit.text().strip()
+            config.set("ffprobe_path", ffprobe_path if ffprobe_path else "ffprobe")
+            
+            # 复选框设置
+            config.set("overwrite_files", self.overwrite_files_check.isChecked())
+            config.set("max_concurrent_jobs", self.max_jobs_spin.value())
+            config.set("console_max_lines", self.console_lines_spin.value())
+            # 并行任务数和控制台行数立即生效
+            self.process_handler.job_queue.set_max_workers(self.max_jobs_spin.value())
+            self.console.set_max_lines(self.console_lines_spin.value())
+            
+            # 保存到文件
+            if config.save():
+                self.console.append("<font color='#2ecc71'>设置已保存成功</font>")
+                self.console.append("<font color='#f1c40f'>部分设置需要重启应用才能生效</font>")
+            else:
+                self.console.append("<font color='#e74c3c'>错误: 保存设置失败</font>")
+                
+        except ImportError:
+            self.console.append("<font color='#e74c3c'>错误: 配置模块加载失败</font>")
+    
+    def _test_ffmpeg(self):
+        ffmpeg_path = self.ffmpeg_path_edit.text().strip() or "ffmpeg"
+        ffprobe_path = self.ffprobe_path_edit.text().strip() or "ffprobe"
+        
+        self.console.append("<hr><b>测试FFmpeg配置...</b>")
+        self.test_button.setEnabled(False)
+        # 两个程序在后台同时检测，结果按路径和修改时间缓存
+        run_in_background(check_binaries, ffmpeg_path, ffprobe_path,
+                          on_finished=self._on_test_finished, on_failed=self._on_test_failed)
+    
+    def _on_test_finished(self, result):
+        self.test_button.setEnabled(True)
+        ffmpeg, ffprobe = result["ffmpeg"], result["ffprobe"]
+        
+        if ffmpeg["ok"]:
+            self.console.append(f"<font color='#2ecc71'>✓ FFmpeg 可用: {ffmpeg['resolved']}</font>")
+            self.console.append(f"<font color='#9aace5'>版本: {ffmpeg['version'] or '未知版本'}</font>")
+            video_encoders = sum(1 for kind in ffmpeg["encoders"].values() if kind == 'V')
+            audio_encoders = sum(1 for kind in ffmpeg["encoders"].values() if kind == 'A')
+            self.console.append(f"<font color='#9aace5'>编码器: 视频 {video_encoders} 个, 音频 {audio_encoders} 个</font>")
+        else:
+            self.console.append(f"<font color='#e74c3c'>✗ FFmpeg 不可用: {ffmpeg['path']}</font>")
+            self.console.append(f"<font color='#e74c3c'>错误: {ffmpeg['error'] or '未知错误'}</font>")
+        
+        if ffprobe["ok"]:
+            self.console.append(f"<font color='#2ecc71'>✓ FFprobe 可用: {ffprobe['resolved']}</font>")
+        else:
+            self.console.append(f"<font color='#e67e22'>⚠ FFprobe 不可用: {ffprobe['path']}</font>")
+            self.console.append(f"<font color='#e67e22'>警告: 媒体信息预览功能可能受限</font>")
+        
+        self.console.append("<b>测试完成</b><hr>")
+    
+    def _on_test_failed(self, error):
+        self.test_button.setEnabled(True)
+        self.console.append(f"<font color='#e74c3c'>错误: 测试失败 - {error}</font>")
+    
+    def _reset_to_defaults(self):
+        reply = QMessageBox.question(self, "确认重置", 
+                                    "确定要重置所有设置为默认值吗？",
+                                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                                    QMessageBox.StandardButton.No)
+        
+        if reply == QMessageBox.StandardButton.Yes:
+            self.ffmpeg_path_edit.clear()
+            self.ffprobe_path_edit.clear()
+            self.overwrite_files_check.setChecked(True)
+            self.max_jobs_spin.setValue(0)
+            self.console_lines_spin.setValue(5000)
+            self.console.append("<font color='#2ecc71'>设置已重置为默认值</font>")
+            self.console.append("<font color='#f1c40f'>请点击'保存设置'以应用更改</font>")
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/thumbnails.py
+# 媒体信息面板的缩略图条：只解码关键帧 (-skip_frame nokey) 并在输入端定位，
+# 一个 ffmpeg 进程拼接为一张图片，按文件身份（路径 + 大小 + 修改时间）缓存在磁盘上
+
+import os
+import hashlib
+import threading
+import subprocess
+
+from probe_cache import file_identity
+
+DEFAULT_COUNT = 6
+DEFAULT_HEIGHT = 64
+DEFAULT_MAX_FILES = 2000
+
+
+def thumbnail_times(duration, count=DEFAULT_COUNT):
+    """在时长内均匀选取 count 个时间点（各区间的中点）"""
+    return [round(duration * (i + 0.5) / count, 3) for i in range(count)]
+
+
+def build_strip_command(input_file, times, height, output_file):
+    """每个时间点作为一个输入：-ss 在输入端定位，-skip_frame nokey 只解码关键帧，
+    各取一帧缩放到相同高度后用 hstack 横向拼接
+
+    -noaccurate_seek 时各输入第一帧的时间戳互不相同（通常为负），hstack 按时间戳对齐，
+    不归零时永远等不到同时刻的帧，输出为空，因此每帧都用 setpts=0 归零。
+    """
+    command = ["ffmpeg", "-v", "error", "-nostdin", "-y"]
+    for t in times:
+        command.extend(["-skip_frame", "nokey", "-noaccurate_seek", "-ss", f"{t:.3f}", "-i", input_file])
+    graph = [f"[{i}:v:0]trim=end_frame=1,setpts=0,scale=-2:{height},setsar=1[t{i}]" for i in range(len(times))]
+    if len(times) > 1:
+        graph.append("".join(f"[t{i}]" for i in range(len(times))) + f"hstack=inputs={len(times)}[strip]")
+        label = "[strip]"
+    else:
+        label = "[t0]"
+    return command + ["-filter_complex", ";".join(graph), "-map", label, "-frames:v", "1",
+                      "-q:v", "4", output_file]
+
+
+def has_video(probe_data):
+    """是否有可生成缩略图的视频流（不包括音频文件中的封面图片）"""
+    for stream in (probe_data or {}).get("streams", []):
+        if stream.get("codec_type") == "video" and not (stream.get("disposition") or {}).get("attached_pic"):
+            return True
+    return False
+
+
+class ThumbnailCache:
+    """缩略图条的磁盘缓存，每个文件一张 JPEG；超过 max_files 张时删除最久未使用的"""
+
+    def __init__(self, cache_dir, max_files=DEFAULT_MAX_FILES):
+        self.cache_dir = str(cache_dir)
+        self.max_files = max_files
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def path_for(self, path, count=DEFAULT_COUNT, height=DEFAULT_HEIGHT):
+        """缓存文件路径（不论是否已生成）；文件不存在时返回 None"""
+        identity = file_identity(path)
+        if identity is None:
+            return None
+        key = hashlib.sha1(f"{identity[0]}|{identity[1]}|{identity[2]}|{count}|{height}".encode("utf-8"))
+        return os.path.join(self.cache_dir, key.hexdigest() + ".jpg")
+
+    def get(self, path, count=DEFAULT_COUNT, height=DEFAULT_HEIGHT):
+        """返回已缓存的缩略图条路径，未缓存或文件已变化时返回 None"""
+        cached = self.path_for(path, count, height)
+        if cached is None or not os.path.exists(cached):
+            return None
+        try:
+            os.utime(cached)  # 记录访问时间，用于淘汰
+        except OSError:
+            pass
+        return cached
+
+    def create(self, path, duration, ffmpeg_path="ffmpeg", count=DEFAULT_COUNT, height=DEFAULT_HEIGHT,
+               timeout=60):
+        """生成（或读取缓存的）缩略图条，返回图片路径；失败时返回 None（在后台线程中调用）"""
+        cached = self.get(path, count, height)
+        if cached is not None:
+            return cached
+        target = self.path_for(path, count, height)
+        if target is None or duration <= 0:
+            return None
+        temp = f"{target}.{threading.get_ident()}.part.jpg"
+        command = build_strip_command(path, thumbnail_times(duration, count), height, temp)
+        command[0] = ffmpeg_path
+        try:
+            result = subprocess.run(command, capture_output=True, timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            result = None
+        if result is None or result.returncode != 0 or not os.path.exists(temp):
+            if os.path.exists(temp):
+                os.remove(temp)
+            return None
+        os.replace(temp, target)
+        self._evict()
+        return target
+
+    def _evict(self):
+        with self._lock:
+            try:
+                entries = [e for e in os.scandir(self.cache_dir) if e.name.endswith(".jpg")
+                           and not e.name.endswith(".part.jpg")]
+            except OSError:
+                return
+            excess = len(entries) - self.max_files
+            if excess <= 0:
+                return
+            entries.sort(key=lambda e: e.stat().st_mtime)
+            for entry in entries[:excess]:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+
+# 全局缓存实例
+_cache_instance = None
+
+def get_thumbnail_cache():
+    """获取全局缩略图缓存实例"""
+    global _cache_instance
+    if _cache_instance is None:
+        from config import get_config
+        config = get_config()
+        _cache_instance = ThumbnailCache(config.config_dir / "thumbnails",
+                                         config.get("thumbnail_cache_max_files", DEFAULT_MAX_FILES))
+    return _cache_instance
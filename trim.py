@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/trim.py
+# 视频截取：输入端关键帧定位的快速截取，以及只重新编码首尾不完整 GOP 的智能剪切
+
+import os
+import subprocess
+import tempfile
+
+from probe_cache import probe_media
+
+# 智能剪切支持的视频编码及首尾片段使用的编码器和质量参数
+SMART_CUT_ENCODERS = {
+    "h264": ["libx264", "-crf", "18", "-preset", "fast"],
+    "hevc": ["libx265", "-crf", "20", "-preset", "fast"],
+}
+KEYFRAME_SEARCH_WINDOW = 30.0  # 在开始/结束点附近查找关键帧的范围(秒)
+AV_SYNC_TOLERANCE = 0.1  # 输出中音频与视频的起始时间/时长允许相差的秒数
+_EPSILON = 0.001
+
+
+class SmartCutError(Exception):
+    """无法进行智能剪切（可改用快速截取）"""
+
+
+def _ts(seconds):
+    return f"{seconds:.3f}"
+
+
+def _output_args(output_file, overwrite):
+    return ["-y", output_file] if overwrite else [output_file]
+
+
+def build_fast_trim_command(input_file, output_file, start_sec=0.0, end_sec=None, overwrite=True):
+    """快速截取：-ss 放在 -i 之前，直接定位到开始点之前最近的关键帧，然后复制流
+
+    不需要从文件开头读取，耗时与截取长度相关；开始点会对齐到关键帧。
+    """
+    command = ["ffmpeg"]
+    if start_sec > 0:
+        command.extend(["-ss", _ts(start_sec)])
+    command.extend(["-i", input_file])
+    if end_sec is not None:
+        command.extend(["-t", _ts(end_sec - start_sec)])
+    command.extend(["-c", "copy", "-avoid_negative_ts", "make_zero"])
+    return command + _output_args(output_file, overwrite)
+
+
+def parse_keyframe_packets(output):
+    """解析 `ffprobe -show_entries packet=pts_time,dts_time,flags -of csv=p=0` 输出
+
+    返回按时间排序的关键帧 [(pts, dts)]；dts 不可用时使用 pts。
+    """
+    keyframes = {}
+    for line in output.splitlines():
+        parts = line.strip().split(',')
+        if len(parts) < 3 or 'K' not in parts[2]:
+            continue
+        try:
+            pts = float(parts[0])
+        except ValueError:
+            continue
+        try:
+            dts = float(parts[1])
+        except ValueError:
+            dts = pts
+        keyframes[pts] = dts
+    return sorted(keyframes.items())
+
+
+def media_start_time(probe_data):
+    """输入文件的起始时间 (format.start_time)，无法获取时为 0
+
+    ffprobe 的 -read_intervals 和数据包时间都是文件中的绝对时间戳，而 ffmpeg 的 -ss/-t 相对于起始时间；
+    MPEG-TS 等格式的起始时间通常不为 0（如 1.4 秒），两者之间需要换算。
+    """
+    try:
+        return float(((probe_data or {}).get("format") or {}).get("start_time") or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def probe_keyframes(ffprobe_path, input_file, start_sec, end_sec, window=KEYFRAME_SEARCH_WINDOW, timeout=60,
+                    start_time=0.0):
+    """只读取开始点和结束点附近的数据包，返回其中的关键帧 [(pts, dts)]
+
+    start_sec/end_sec 和返回的时间都相对于文件起始时间 start_time（与 -ss 一致）。
+    """
+    start_abs, end_abs = start_sec + start_time, end_sec + start_time
+    if end_sec - start_sec <= 2 * window:
+        intervals = f"{_ts(start_abs)}%{_ts(end_abs)}"
+    else:
+        intervals = f"{_ts(start_abs)}%+{window},{_ts(end_abs - window)}%{_ts(end_abs)}"
+    command = [ffprobe_path, "-v", "error", "-select_streams", "v:0", "-read_intervals", intervals,
+               "-show_entries", "packet=pts_time,dts_time,flags", "-of", "csv=p=0", input_file]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, encoding='utf-8',
+                                errors='ignore', timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise SmartCutError(f"读取关键帧失败: {e}")
+    if result.returncode != 0:
+        raise SmartCutError(f"读取关键帧失败: {result.stderr.strip()}")
+    return [(pts - start_time, dts - start_time) for pts, dts in parse_keyframe_packets(result.stdout)]
+
+
+def plan_segments(start_sec, end_sec, keyframes):
+    """将 [start, end) 划分为 (方式, 开始, 结束) 片段，方式为 'encode' 或 'copy'
+
+    keyframes 为 [(pts, dts)]。第一个关键帧之前和最后一个关键帧之后的部分重新编码，
+    中间按 GOP 直接复制；复制片段的结束时间取最后一个关键帧的 dts，
+    因为流复制按解码时间截断，有 B 帧时关键帧的 dts 早于 pts。
+    """
+    inside = [(pts, dts) for pts, dts in keyframes if start_sec - _EPSILON <= pts <= end_sec + _EPSILON]
+    if len(inside) < 2:
+        return [("encode", start_sec, end_sec)]
+    first, (last, last_dts) = inside[0][0], inside[-1]
+    segments = []
+    if first - start_sec > _EPSILON:
+        segments.append(("encode", start_sec, first))
+    segments.append(("copy", first, last_dts))
+    if end_sec - last > _EPSILON:
+        segments.append(("encode", last, end_sec))
+    return segments
+
+
+def _video_stream(probe_data):
+    for stream in probe_data.get("streams", []):
+        if stream.get("codec_type") == "video" and not stream.get("disposition", {}).get("attached_pic"):
+            return stream
+    return None
+
+
+def prepare_smart_cut(ffprobe_path, input_file, output_file, start_sec=0.0, end_sec=None, overwrite=True):
+    """生成智能剪切的执行计划（在后台线程中调用）
+
+    返回 {"segments": [{"command", "description", "duration", "mode"}], "final": {...}, "work_dir": 临时目录}。
+    片段（视频片段和截取的音频）之间互不依赖，可并行执行；final 在所有片段完成后拼接视频并合并音频。
+    无法智能剪切时抛出 SmartCutError。
+    """
+    probe_data = probe_media(input_file, ffprobe_path)
+    if probe_data is None:
+        raise SmartCutError("无法读取媒体信息 (需要 FFprobe)")
+    stream = _video_stream(probe_data)
+    if stream is None:
+        raise SmartCutError("输入文件中没有视频流")
+    codec = stream.get("codec_name")
+    if codec not in SMART_CUT_ENCODERS:
+        raise SmartCutError(f"暂不支持 {codec} 编码的智能剪切 (支持: {', '.join(SMART_CUT_ENCODERS)})")
+
+    if end_sec is None:
+        try:
+            end_sec = float(probe_data["format"]["duration"])
+        except (KeyError, TypeError, ValueError):
+            raise SmartCutError("无法获取视频时长，请指定结束时间")
+    if end_sec <= start_sec:
+        raise SmartCutError("结束时间必须晚于开始时间")
+
+    keyframes = probe_keyframes(ffprobe_path, input_file, start_sec, end_sec,
+                                start_time=media_start_time(probe_data))
+    encoder_args = SMART_CUT_ENCODERS[codec]
+    pix_fmt = stream.get("pix_fmt")
+    work_dir = tempfile.mkdtemp(prefix="skydreambox_trim_")
+    name = os.path.basename(output_file)
+
+    segments = []
+    for index, (mode, seg_start, seg_end) in enumerate(plan_segments(start_sec, end_sec, keyframes)):
+        seg_path = os.path.join(work_dir, f"part{index:02d}.ts")
+        if mode == "copy":
+            # 稍微越过关键帧定位，确保不会落到前一个关键帧
+            command = ["ffmpeg", "-ss", _ts(seg_start + _EPSILON), "-i", input_file,
+                       "-t", _ts(seg_end - seg_start - 2 * _EPSILON), "-map", "0:v:0", "-c:v", "copy"]
+            description = f"智能剪切(复制 {seg_start:.2f}s 起): {name}"
+        else:
+            command = ["ffmpeg", "-ss", _ts(seg_start), "-i", input_file,
+                       "-t", _ts(seg_end - seg_start), "-map", "0:v:0", "-c:v"] + encoder_args
+            if pix_fmt:
+                command.extend(["-pix_fmt", pix_fmt])
+            description = f"智能剪切(编码 {seg_start:.2f}s-{seg_end:.2f}s): {name}"
+        command.extend(["-an", "-sn", "-dn", "-f", "mpegts", "-y", seg_path])
+        segments.append({"command": command, "description": description, "mode": mode,
+                         "duration": seg_end - seg_start, "path": seg_path})
+
+    list_path = os.path.join(work_dir, "segments.txt")
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for segment in segments:
+            escaped = segment["path"].replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    final_command = ["ffmpeg", "-f", "concat", "-safe", "0", "-i", list_path]
+    if any(s.get("codec_type") == "audio" for s in probe_data.get("streams", [])):
+        # 流复制时输入端定位会从开始点之前的关键帧输出，音频会比视频早一个 GOP；
+        # 输出端的 -ss 0 丢弃定位点之前的数据包，使音频与视频片段同样从开始点开始
+        audio_path = os.path.join(work_dir, "audio.mka")
+        segments.append({"command": ["ffmpeg", "-ss", _ts(start_sec), "-i", input_file,
+                                     "-ss", "0", "-t", _ts(end_sec - start_sec), "-map", "0:a", "-c", "copy",
+                                     "-vn", "-sn", "-dn", "-f", "matroska", "-y", audio_path],
+                         "description": f"智能剪切(音频): {name}", "mode": "audio",
+                         "duration": end_sec - start_sec, "path": audio_path})
+        final_command.extend(["-i", audio_path, "-map", "0:v", "-map", "1:a"])
+    else:
+        final_command.extend(["-map", "0:v"])
+    final_command.extend(["-c", "copy"])
+    final = {"command": final_command + _output_args(output_file, overwrite),
+             "description": f"智能剪切(合并): {name}", "duration": end_sec - start_sec}
+    return {"segments": segments, "final": final, "work_dir": work_dir}
+
+
+def _stream_times(stream):
+    """流的 (起始时间, 时长)；Matroska 的时长记录在 DURATION 标签中，无法获取时为 None"""
+    try:
+        start = float(stream.get("start_time") or 0.0)
+    except ValueError:
+        start = 0.0
+    duration = stream.get("duration")
+    if duration is None:
+        duration = (stream.get("tags") or {}).get("DURATION")
+        if duration:
+            h, m, sec = duration.split(":")
+            duration = int(h) * 3600 + int(m) * 60 + float(sec)
+    try:
+        return start, float(duration) if duration is not None else None
+    except ValueError:
+        return start, None
+
+
+def av_sync_problems(probe_data, tolerance=AV_SYNC_TOLERANCE):
+    """比较第一个视频流和第一个音频流的起始时间与时长，返回不一致之处的说明列表"""
+    video = _video_stream(probe_data)
+    audio = next((s for s in probe_data.get("streams", []) if s.get("codec_type") == "audio"), None)
+    if video is None or audio is None:
+        return []
+    (video_start, video_duration), (audio_start, audio_duration) = _stream_times(video), _stream_times(audio)
+    problems = []
+    if abs(video_start - audio_start) > tolerance:
+        problems.append(f"起始时间 视频 {video_start:.3f}s / 音频 {audio_start:.3f}s")
+    if video_duration is not None and audio_duration is not None \
+            and abs(video_duration - audio_duration) > tolerance:
+        problems.append(f"时长 视频 {video_duration:.3f}s / 音频 {audio_duration:.3f}s")
+    return problems
+
+
+def check_av_sync(ffprobe_path, output_file, tolerance=AV_SYNC_TOLERANCE):
+    """检查剪切结果的音视频是否对齐，返回 (是否一致, 说明)；无法读取媒体信息时视为一致"""
+    probe_data = probe_media(output_file, ffprobe_path)
+    if probe_data is None:
+        return True, "无法读取输出的媒体信息，未检查音视频同步"
+    problems = av_sync_problems(probe_data, tolerance)
+    if problems:
+        return False, f"音视频不同步: {'; '.join(problems)}"
+    return True, "音视频起始时间和时长一致"
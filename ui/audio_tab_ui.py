@@ -3,7 +3,7 @@
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit, QLabel,
-    QGroupBox, QComboBox, QStyle, QGridLayout
+    QGroupBox, QComboBox, QStyle, QGridLayout, QCheckBox
 )
 from PySide6.QtCore import Qt
 
@@ -66,12 +66,47 @@ class Ui_AudioTab:
         self.compression_combo = QComboBox()
         options_layout.addWidget(self.compression_combo, 2, 3)
 
+        self.auto_copy_check = QCheckBox("自动复制兼容的流")
+        self.auto_copy_check.setToolTip("源音频编码与目标相同且未修改采样率、采样格式、压缩等级，"
+                                        "有损编码的源码率不高于目标码率时，直接复制而不重新编码")
+        options_layout.addWidget(self.auto_copy_check, 3, 0, 1, 4)
+
         # 设置列伸展，让两栏宽度均等
         options_layout.setColumnStretch(1, 1)
         options_layout.setColumnStretch(3, 1)
         
         main_layout.addWidget(options_group)
 
+        # --- 批量处理组 ---
+        batch_group = QGroupBox("批量处理")
+        batch_layout = QVBoxLayout(batch_group)
+        batch_layout.setSpacing(8)
+
+        self.batch_input_edit = QLineEdit()
+        self.batch_input_edit.setPlaceholderText("文件夹或通配符, 如 D:/videos/**/*.mkv")
+        self.select_batch_input_button = QPushButton("选择")
+        self.select_batch_input_button.setIcon(AudioTab.style().standardIcon(QStyle.StandardPixmap.SP_DirOpenIcon))
+        batch_layout.addLayout(self._create_hbox("来源:", self.batch_input_edit, self.select_batch_input_button))
+
+        self.batch_output_dir_edit = QLineEdit()
+        self.batch_output_dir_edit.setPlaceholderText("留空则输出到源文件所在目录")
+        self.select_batch_output_button = QPushButton("选择")
+        self.select_batch_output_button.setIcon(AudioTab.style().standardIcon(QStyle.StandardPixmap.SP_DirOpenIcon))
+        batch_layout.addLayout(self._create_hbox("输出目录:", self.batch_output_dir_edit, self.select_batch_output_button))
+
+        batch_buttons_layout = QHBoxLayout()
+        self.skip_existing_check = QCheckBox("跳过已存在的输出")
+        self.skip_existing_check.setChecked(True)
+        batch_buttons_layout.addWidget(self.skip_existing_check)
+        batch_buttons_layout.addStretch()
+        self.save_preset_button = QPushButton("保存为预设...")
+        self.save_preset_button.setToolTip("保存当前参数，供命令行监视文件夹模式使用: cli.py watch <文件夹> --preset <名称>")
+        batch_buttons_layout.addWidget(self.save_preset_button)
+        self.batch_run_button = QPushButton("批量处理")
+        batch_buttons_layout.addWidget(self.batch_run_button)
+        batch_layout.addLayout(batch_buttons_layout)
+        main_layout.addWidget(batch_group)
+
         # --- 第三部分: 执行按钮 ---
         self.run_button = QPushButton("开始处理")
         main_layout.addWidget(self.run_button, 0, Qt.AlignmentFlag.AlignCenter)
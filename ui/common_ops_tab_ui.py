@@ -3,7 +3,7 @@
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit, QLabel,
-    QGroupBox, QStyle
+    QGroupBox, QStyle, QComboBox
 )
 from PySide6.QtCore import Qt
 
@@ -14,7 +14,7 @@ class Ui_CommonOpsTab:
         main_layout.setContentsMargins(10, 15, 10, 15)
 
         # --- 视频截取组 ---
-        trim_group = QGroupBox("快速截取 (无损)")
+        trim_group = QGroupBox("视频截取")
         trim_layout = QVBoxLayout(trim_group)
 
         self.trim_input_edit = QLineEdit()
@@ -38,6 +38,16 @@ class Ui_CommonOpsTab:
         time_layout.addWidget(self.end_time_edit)
         trim_layout.addLayout(time_layout)
 
+        mode_layout = QHBoxLayout()
+        self.trim_mode_combo = QComboBox()
+        self.trim_mode_combo.addItems(["快速 (关键帧定位, 无损)", "精确 (智能剪切, 仅重新编码首尾)"])
+        self.trim_mode_combo.setToolTip("快速: 开始点对齐到之前最近的关键帧，全部直接复制\n"
+                                        "精确: 首尾不完整的 GOP 重新编码，中间直接复制，逐帧精确")
+        mode_layout.addWidget(QLabel("模式:"))
+        mode_layout.addWidget(self.trim_mode_combo)
+        mode_layout.addStretch()
+        trim_layout.addLayout(mode_layout)
+
         self.trim_button = QPushButton("开始截取")
         trim_layout.addWidget(self.trim_button, 0, Qt.AlignmentFlag.AlignCenter)
         main_layout.addWidget(trim_group)
@@ -63,6 +73,22 @@ class Ui_CommonOpsTab:
 
         self.img_audio_button = QPushButton("开始合成")
         img_audio_layout.addWidget(self.img_audio_button, 0, Qt.AlignmentFlag.AlignCenter)
+
+        # 专辑模式: 文件夹中的每首音轨都与上方图片（封面）合成，并行处理
+        self.album_dir_edit = QLineEdit()
+        self.album_dir_edit.setPlaceholderText("音轨所在文件夹，使用上方图片作为封面")
+        self.select_album_dir_button = QPushButton("选择")
+        self.select_album_dir_button.setIcon(CommonOpsTab.style().standardIcon(QStyle.StandardPixmap.SP_DirOpenIcon))
+        img_audio_layout.addLayout(self._create_hbox("专辑:", self.album_dir_edit, self.select_album_dir_button))
+
+        self.album_output_dir_edit = QLineEdit()
+        self.album_output_dir_edit.setPlaceholderText("留空则输出到音轨所在文件夹")
+        self.select_album_output_button = QPushButton("选择")
+        self.select_album_output_button.setIcon(CommonOpsTab.style().standardIcon(QStyle.StandardPixmap.SP_DirOpenIcon))
+        img_audio_layout.addLayout(self._create_hbox("输出:", self.album_output_dir_edit, self.select_album_output_button))
+
+        self.album_button = QPushButton("专辑批量合成")
+        img_audio_layout.addWidget(self.album_button, 0, Qt.AlignmentFlag.AlignCenter)
         main_layout.addWidget(img_audio_group)
 
         main_layout.addStretch()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/ui/console_view.py
+
+from PySide6.QtWidgets import QPlainTextEdit
+from PySide6.QtGui import QTextCursor
+from PySide6.QtCore import QTimer
+
+
+class ConsoleView(QPlainTextEdit):
+    """
+    FFmpeg 输出控制台。
+    基于 QPlainTextEdit（只布局可见的文本块），行数有上限；
+    进程输出先暂存，由定时器合并后一次性绘制。
+    """
+    def __init__(self, max_lines=5000, refresh_hz=15, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(max_lines)
+        self._pending = []
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(max(1, 1000 // refresh_hz))
+        self._flush_timer.timeout.connect(self.flush)
+
+    def set_max_lines(self, max_lines):
+        self.setMaximumBlockCount(max_lines)
+
+    def append_output(self, text):
+        """追加进程输出（合并刷新）"""
+        self._pending.append(text)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self):
+        self._flush_timer.stop()
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending = []
+        cursor = self.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(text)
+        self.setTextCursor(cursor)
+        self.ensureCursorVisible()
+
+    def append(self, html):
+        """追加一段HTML消息（与 QTextEdit.append 用法一致）"""
+        self.flush()
+        self.appendHtml(html)
+        self.ensureCursorVisible()
+
+    def clear(self):
+        self._pending = []
+        self._flush_timer.stop()
+        super().clear()
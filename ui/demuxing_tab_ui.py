@@ -33,6 +33,9 @@ class Ui_DemuxingTab:
         self.extract_audio_button = QPushButton("仅音频")
         buttons_layout.addWidget(self.extract_video_button)
         buttons_layout.addWidget(self.extract_audio_button)
+        self.extract_all_button = QPushButton("全部流")
+        self.extract_all_button.setToolTip("读取一次文件，把每个视频、音频、字幕流和附件分别保存为独立文件")
+        buttons_layout.addWidget(self.extract_all_button)
         buttons_layout.addStretch()
         demux_layout.addLayout(buttons_layout)
 
@@ -2,12 +2,15 @@
 # SkyDreamBox/ui/main_window_ui.py
 
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTabWidget, QTextEdit,
-    QProgressBar, QSplitter, QScrollArea, QMenuBar
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTabWidget,
+    QProgressBar, QSplitter, QScrollArea, QMenuBar, QTableWidget,
+    QAbstractItemView, QHeaderView, QPushButton
 )
 from PySide6.QtGui import QAction
 from PySide6.QtCore import Qt
 
+from ui.console_view import ConsoleView
+
 class Ui_MainWindow:
     def setupUi(self, MainWindow):
         MainWindow.setObjectName("MainWindow")
@@ -41,7 +44,16 @@ class Ui_MainWindow:
         self.info_label.setWordWrap(True)
         self.info_label.setAlignment(Qt.AlignmentFlag.AlignTop)
         self.info_label.setObjectName("info_label")
-        info_scroll_area.setWidget(self.info_label)
+        # 关键帧缩略图条（后台生成，选择视频文件后显示）
+        self.thumbnail_label = QLabel()
+        self.thumbnail_label.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
+        self.thumbnail_label.hide()
+        info_widget = QWidget()
+        info_layout = QVBoxLayout(info_widget)
+        info_layout.setContentsMargins(0, 0, 0, 0)
+        info_layout.addWidget(self.thumbnail_label)
+        info_layout.addWidget(self.info_label, 1)
+        info_scroll_area.setWidget(info_widget)
         self.info_console_tabs.addTab(info_scroll_area, "媒体信息")
 
         # 2b. FFmpeg 输出信息 Tab
@@ -49,8 +61,7 @@ class Ui_MainWindow:
         console_layout = QVBoxLayout(console_widget)
         console_layout.setContentsMargins(0, 0, 0, 0)
         console_layout.setSpacing(5)
-        self.console = QTextEdit()
-        self.console.setReadOnly(True)
+        self.console = ConsoleView()
         self.console.setObjectName("console")
 
         # 进度条和状态标签
@@ -61,12 +72,42 @@ class Ui_MainWindow:
         self.progress_status_label = QLabel("待机")
         self.progress_status_label.setMinimumWidth(220)
         progress_layout.addWidget(self.progress_status_label)
+        self.save_log_button = QPushButton("保存日志")
+        self.save_log_button.setToolTip("将当前任务的完整日志保存到文件")
+        progress_layout.addWidget(self.save_log_button)
         progress_layout.setStretch(1, 1)
 
         console_layout.addWidget(self.console)
         console_layout.addLayout(progress_layout)
         self.info_console_tabs.addTab(console_widget, "FFmpeg 输出")
 
+        # 2c. 任务队列 Tab
+        queue_widget = QWidget()
+        queue_layout = QVBoxLayout(queue_widget)
+        queue_layout.setContentsMargins(0, 0, 0, 0)
+        queue_layout.setSpacing(5)
+        self.job_table = QTableWidget(0, 4)
+        self.job_table.setHorizontalHeaderLabels(["ID", "任务", "状态", "进度"])
+        self.job_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.job_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.job_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.job_table.verticalHeader().setVisible(False)
+        header = self.job_table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        queue_layout.addWidget(self.job_table)
+
+        queue_buttons_layout = QHBoxLayout()
+        self.job_status_label = QLabel("运行中: 0 | 排队: 0")
+        queue_buttons_layout.addWidget(self.job_status_label)
+        queue_buttons_layout.addStretch()
+        self.promote_job_button = QPushButton("优先处理")
+        self.cancel_job_button = QPushButton("取消任务")
+        queue_buttons_layout.addWidget(self.promote_job_button)
+        queue_buttons_layout.addWidget(self.cancel_job_button)
+        queue_layout.addLayout(queue_buttons_layout)
+        self.info_console_tabs.addTab(queue_widget, "任务队列")
+
         bottom_layout.addWidget(self.info_console_tabs)
         self.splitter.addWidget(bottom_widget)
 
@@ -12,7 +12,7 @@ class Ui_ProfessionalTab:
         layout.setSpacing(10)
         layout.setContentsMargins(10, 15, 10, 15)
 
-        layout.addWidget(QLabel("直接输入FFmpeg命令 (程序会自动添加 `-nostdin` 和 `-loglevel verbose` 参数):"))
+        layout.addWidget(QLabel("直接输入FFmpeg命令 (程序会自动添加 `-nostdin`、`-progress pipe:1` 和 `-loglevel info` 参数):"))
         self.command_input = QTextEdit()
         self.command_input.setPlaceholderText("示例: ffmpeg -i input.mp4 -c:v libx264 -crf 22 output.mp4")
         self.command_input.setObjectName("console") # Reuse console style
@@ -3,7 +3,7 @@
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit, QLabel,
-    QGroupBox, QComboBox, QGridLayout, QStyle, QMessageBox, QCheckBox
+    QGroupBox, QComboBox, QGridLayout, QStyle, QMessageBox, QCheckBox, QSpinBox
 )
 from PySide6.QtCore import Qt
 
@@ -51,8 +51,29 @@ class Ui_SettingsTab:
         self.overwrite_files_check.setChecked(True)
         general_layout.addWidget(self.overwrite_files_check)
         
+        self.max_jobs_spin = QSpinBox()
+        self.max_jobs_spin.setRange(0, 256)
+        self.max_jobs_spin.setSpecialValueText("自动")
+        general_layout.addLayout(self._create_hbox_widget(QLabel("最大并行任务数:"), self.max_jobs_spin))
+        
+        self.console_lines_spin = QSpinBox()
+        self.console_lines_spin.setRange(500, 1000000)
+        self.console_lines_spin.setSingleStep(1000)
+        self.console_lines_spin.setValue(5000)
+        general_layout.addLayout(self._create_hbox_widget(QLabel("日志保留行数:"), self.console_lines_spin))
+        
         main_layout.addWidget(general_group)
         
+        # --- 缓存组 ---
+        cache_group = QGroupBox("媒体信息缓存")
+        cache_layout = QHBoxLayout(cache_group)
+        self.probe_cache_label = QLabel()
+        cache_layout.addWidget(self.probe_cache_label)
+        cache_layout.addStretch()
+        self.clear_probe_cache_button = QPushButton("清空缓存")
+        cache_layout.addWidget(self.clear_probe_cache_button)
+        main_layout.addWidget(cache_group)
+        
         # --- 按钮组 ---
         button_layout = QHBoxLayout()
         button_layout.addStretch()
@@ -3,10 +3,12 @@
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit, QLabel,
-    QGroupBox, QComboBox, QGridLayout, QStyle
+    QGroupBox, QComboBox, QGridLayout, QStyle, QCheckBox
 )
 from PySide6.QtCore import Qt
 
+from utils import LADDER_RENDITIONS
+
 class Ui_VideoTab:
     def setupUi(self, VideoTab):
         main_layout = QVBoxLayout(VideoTab)
@@ -74,12 +76,55 @@ class Ui_VideoTab:
         self.resolution_edit.setPlaceholderText("选填, 如 1920:1080")
         video_grid.addWidget(self.resolution_edit, 2, 3)
 
-        # 第四行: 视频比特率
+        # 第四行: 视频比特率 和 编码预设
         self.video_bitrate_label = QLabel("比特率:")
         self.video_bitrate_edit = QLineEdit()
         self.video_bitrate_edit.setPlaceholderText("选填, 如 5000k 或 5M")
         video_grid.addWidget(self.video_bitrate_label, 3, 0)
-        video_grid.addWidget(self.video_bitrate_edit, 3, 1, 1, 3)
+        video_grid.addWidget(self.video_bitrate_edit, 3, 1)
+
+        self.preset_label = QLabel("预设:")
+        self.preset_combo = QComboBox()
+        video_grid.addWidget(self.preset_label, 3, 2)
+        video_grid.addWidget(self.preset_combo, 3, 3)
+
+        # 第五行: 分段并行编码
+        self.chunked_check = QCheckBox("分段并行编码 (适合长视频)")
+        self.chunked_check.setToolTip("在关键帧处将视频切分为多段，由多个 FFmpeg 进程同时编码，完成后无损拼接。\n"
+                                      "各片段独立控制码率，仅支持 CRF/CQ，设置视频码率或目标大小时不可用")
+        video_grid.addWidget(self.chunked_check, 4, 0, 1, 2)
+        self.auto_copy_check = QCheckBox("自动复制兼容的流")
+        self.auto_copy_check.setToolTip("源视频/音频编码与所选编码器相同、目标格式支持且未修改分辨率、帧率、码率等参数时，"
+                                        "直接复制而不重新编码")
+        video_grid.addWidget(self.auto_copy_check, 4, 2, 1, 2)
+
+        # 第六行: 按目标质量自动调优 CRF/预设
+        autotune_layout = QHBoxLayout()
+        self.autotune_check = QCheckBox("自动调优 CRF/预设")
+        self.autotune_check.setToolTip("从视频中截取几个片段试编码多组 CRF/预设，"
+                                       "选出达到目标质量的最快设置后再完整编码")
+        autotune_layout.addWidget(self.autotune_check)
+        self.autotune_metric_combo = QComboBox()
+        self.autotune_metric_combo.addItems(["SSIM", "PSNR"])
+        autotune_layout.addWidget(self.autotune_metric_combo)
+        self.autotune_target_edit = QLineEdit()
+        autotune_layout.addWidget(QLabel("目标:"))
+        autotune_layout.addWidget(self.autotune_target_edit)
+        autotune_layout.addStretch()
+        video_grid.addLayout(autotune_layout, 5, 0, 1, 4)
+
+        # 第七行: 目标文件大小（两遍编码）
+        target_size_layout = QHBoxLayout()
+        self.target_size_check = QCheckBox("目标文件大小 (两遍编码)")
+        self.target_size_check.setToolTip("按视频时长和音频码率计算视频码率，先快速分析一遍再正式编码，"
+                                          "CRF/CQ/比特率不生效")
+        target_size_layout.addWidget(self.target_size_check)
+        self.target_size_edit = QLineEdit()
+        self.target_size_edit.setPlaceholderText("如 25")
+        target_size_layout.addWidget(self.target_size_edit)
+        target_size_layout.addWidget(QLabel("MB"))
+        target_size_layout.addStretch()
+        video_grid.addLayout(target_size_layout, 6, 0, 1, 4)
 
         # 设置列伸展
         video_grid.setColumnStretch(1, 1)
@@ -109,6 +154,63 @@ class Ui_VideoTab:
 
         main_layout.addWidget(options_group)
 
+        # --- 多分辨率输出组 ---
+        # 一次解码同时输出多个分辨率，每档可设置编码器和比特率，字幕/帧率/预设/音频沿用上方参数
+        ladder_group = QGroupBox("多分辨率输出 (一次解码)")
+        ladder_layout = QGridLayout(ladder_group)
+        ladder_layout.setSpacing(8)
+        self.ladder_checks = []
+        self.ladder_codec_combos = []
+        self.ladder_bitrate_edits = []
+        for row, (label, _, bitrate) in enumerate(LADDER_RENDITIONS):
+            check = QCheckBox(label)
+            codec_combo = QComboBox()
+            bitrate_edit = QLineEdit(bitrate)
+            bitrate_edit.setPlaceholderText("留空则使用CRF")
+            ladder_layout.addWidget(check, row, 0)
+            ladder_layout.addWidget(codec_combo, row, 1)
+            ladder_layout.addWidget(QLabel("比特率:"), row, 2)
+            ladder_layout.addWidget(bitrate_edit, row, 3)
+            self.ladder_checks.append(check)
+            self.ladder_codec_combos.append(codec_combo)
+            self.ladder_bitrate_edits.append(bitrate_edit)
+        ladder_layout.setColumnStretch(1, 1)
+        ladder_layout.setColumnStretch(3, 1)
+        self.ladder_run_button = QPushButton("生成多分辨率版本")
+        self.ladder_run_button.setToolTip("输出到“输出”路径所在的文件夹，文件名为 <原文件名>_<分辨率>.<格式>")
+        ladder_layout.addWidget(self.ladder_run_button, len(LADDER_RENDITIONS), 3, Qt.AlignmentFlag.AlignRight)
+        main_layout.addWidget(ladder_group)
+
+        # --- 批量处理组 ---
+        batch_group = QGroupBox("批量处理")
+        batch_layout = QVBoxLayout(batch_group)
+        batch_layout.setSpacing(8)
+
+        self.batch_input_edit = QLineEdit()
+        self.batch_input_edit.setPlaceholderText("文件夹或通配符, 如 D:/videos/**/*.mkv")
+        self.select_batch_input_button = QPushButton("选择")
+        self.select_batch_input_button.setIcon(VideoTab.style().standardIcon(QStyle.StandardPixmap.SP_DirOpenIcon))
+        batch_layout.addLayout(self._create_hbox("来源:", self.batch_input_edit, self.select_batch_input_button))
+
+        self.batch_output_dir_edit = QLineEdit()
+        self.batch_output_dir_edit.setPlaceholderText("留空则输出到源文件所在目录")
+        self.select_batch_output_button = QPushButton("选择")
+        self.select_batch_output_button.setIcon(VideoTab.style().standardIcon(QStyle.StandardPixmap.SP_DirOpenIcon))
+        batch_layout.addLayout(self._create_hbox("输出:", self.batch_output_dir_edit, self.select_batch_output_button))
+
+        batch_buttons_layout = QHBoxLayout()
+        self.skip_existing_check = QCheckBox("跳过已存在的输出")
+        self.skip_existing_check.setChecked(True)
+        batch_buttons_layout.addWidget(self.skip_existing_check)
+        batch_buttons_layout.addStretch()
+        self.save_preset_button = QPushButton("保存为预设...")
+        self.save_preset_button.setToolTip("保存当前参数，供命令行监视文件夹模式使用: cli.py watch <文件夹> --preset <名称>")
+        batch_buttons_layout.addWidget(self.save_preset_button)
+        self.batch_run_button = QPushButton("批量处理")
+        batch_buttons_layout.addWidget(self.batch_run_button)
+        batch_layout.addLayout(batch_buttons_layout)
+        main_layout.addWidget(batch_group)
+
         self.run_button = QPushButton("开始处理")
         main_layout.addWidget(self.run_button, 0, Qt.AlignmentFlag.AlignCenter)
         main_layout.addStretch()
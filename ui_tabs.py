@@ -1,43 +1,44 @@
 # -*- coding: utf-8 -*-
 # SkyDreamBox/ui_tabs.py
+# 选项卡的公共部分（输入校验、BaseTab）；各选项卡在 tabs/ 中，首次打开时才导入
 
 import os
 import re
-from PySide6.QtWidgets import QWidget, QFileDialog, QMessageBox
-from PySide6.QtGui import QPixmap
-from PySide6.QtCore import Qt
-
-
-# 引入 UI 定义
-from ui.video_tab_ui import Ui_VideoTab
-from ui.audio_tab_ui import Ui_AudioTab
-from ui.muxing_tab_ui import Ui_MuxingTab
-from ui.demuxing_tab_ui import Ui_DemuxingTab
-from ui.common_ops_tab_ui import Ui_CommonOpsTab
-from ui.pro_tab_ui import Ui_ProfessionalTab
-from ui.about_tab_ui import Ui_AboutTab # 导入新的 AboutTab UI
-from ui.settings_tab_ui import Ui_SettingsTab
-
-from utils import (
-    VIDEO_FORMATS, VIDEO_FORMAT_CODECS, AUDIO_CODECS_FOR_VIDEO_FORMAT,
-    AUDIO_BITRATES, AUDIO_FORMATS, AUDIO_FORMAT_CODECS, AUDIO_SAMPLE_RATES,
-    WAV_BIT_DEPTH_CODECS, AUDIO_SAMPLE_FORMATS,
-    SUBTITLE_FORMATS, DEFAULT_COMPRESSION_LEVEL, RESOLUTION_PRESETS
-)
-# constants 和 resource_path 不再在此文件中直接使用，可以移除
+import importlib
+from PySide6.QtWidgets import QWidget, QFileDialog, QInputDialog
+
+from commands import expand_batch_inputs, plan_batch
+from job_queue import JobGroup
+import profiler
+
+# 选项卡名称 -> (模块, 类名)，按界面中的顺序排列
+TAB_CLASSES = {
+    "视频处理": ("tabs.video_tab", "VideoTab"),
+    "音频处理": ("tabs.audio_tab", "AudioTab"),
+    "音视频合并": ("tabs.muxing_tab", "MuxingTab"),
+    "音视频分离": ("tabs.demuxing_tab", "DemuxingTab"),
+    "常用工具": ("tabs.common_ops_tab", "CommonOperationsTab"),
+    "专业命令": ("tabs.pro_tab", "ProfessionalTab"),
+    "设置": ("tabs.settings_tab", "SettingsTab"),
+    "关于": ("tabs.about_tab", "AboutTab"),
+}
+
+
+def load_tab_class(name):
+    """导入选项卡所在的模块并返回选项卡类（模块只在第一次调用时导入）"""
+    module_name, class_name = TAB_CLASSES[name]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def __getattr__(name):
+    # 兼容 from ui_tabs import VideoTab 的写法
+    for tab_name, (_, class_name) in TAB_CLASSES.items():
+        if class_name == name:
+            return load_tab_class(tab_name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # --- Helper Functions ---
 
-def escape_ffmpeg_filter_path(file_path):
-    if not file_path:
-        return file_path
-    # 转义冒号（FFmpeg滤镜分隔符）
-    escaped = file_path.replace(':', '\\\\:')
-    # 如果路径包含空格，用单引号括起来
-    if ' ' in escaped:
-        escaped = f"'{escaped}'"
-    return escaped
-
 def validate_time_format(time_str):
     if not time_str: return True
     return re.fullmatch(r'\d{1,2}:\d{2}:\d{2}(\.\d+)?', time_str) is not None
@@ -72,11 +73,20 @@ def display_error(console, message):
 # --- Base Tab Class ---
 
 class BaseTab(QWidget):
+    job_label = "任务"  # 任务队列中显示的任务类别
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # --profile: 记录各选项卡构建命令的耗时
+        if "_get_command" in cls.__dict__:
+            cls._get_command = profiler.traced(f"{cls.__name__}._get_command", "command")(cls._get_command)
+
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
         self.process_handler = main_window.process_handler
         self.console = main_window.console
+        self.command_notes = []  # _get_command 的补充说明（如自动流复制的决定），任务开始后显示
 
     def _run_command(self):
         self.main_window.reset_progress_display()
@@ -84,15 +94,20 @@ class BaseTab(QWidget):
         if not self._validate_inputs():
             return
         try:
+            self.command_notes = []
             command = self._get_command()
             if command:
-                is_started, message = self.process_handler.run_ffmpeg(command)
+                is_started, message = self.process_handler.run_ffmpeg(
+                    command, self._job_description(command),
+                    duration=self._job_duration(),
+                    total_frames=self.main_window.total_frames)
                 if not is_started:
                     self.console.append(f"<font color='#e67e22'>{message}</font>")
                 else:
                     self.console.clear()
                     self.console.append(f"<b>{message}</b>\n<hr>")
-                    self.main_window.set_buttons_enabled(False)
+                    for note in self.command_notes:
+                        self.console.append(f"<font color='#9aace5'>{note}</font>")
         except Exception as e:
             display_error(self.console, f"构建命令时发生意外错误: {e}")
 
@@ -102,655 +117,78 @@ class BaseTab(QWidget):
     def _get_command(self):
         raise NotImplementedError
 
-    def set_buttons_enabled(self, enabled):
-        if hasattr(self, 'run_button'):
-            self.run_button.setEnabled(enabled)
-
-# --- Tab Implementations ---
-
-class VideoTab(BaseTab, Ui_VideoTab):
-    def __init__(self, main_window):
-        super().__init__(main_window)
-        self.setupUi(self)
-        self._connect_signals()
-        self._initialize_ui_state()
-
-    def _connect_signals(self):
-        self.select_input_button.clicked.connect(lambda: self.main_window.select_file(self.input_edit))
-        self.select_output_button.clicked.connect(self.select_output_path)
-        self.select_subtitle_button.clicked.connect(self.select_subtitle_file)
-        self.run_button.clicked.connect(self._run_command)
-        self.format_combo.currentTextChanged.connect(self._on_video_format_changed)
-        self.audio_codec_combo.currentIndexChanged.connect(self._update_audio_bitrate_visibility)
-        self.video_codec_combo.currentTextChanged.connect(self._update_video_options_visibility)
-        # --- 新增: 连接分辨率预设下拉菜单的信号 ---
-        self.resolution_preset_combo.currentTextChanged.connect(self._on_resolution_preset_changed)
-
-    def _initialize_ui_state(self):
-        self.format_combo.addItems(VIDEO_FORMATS)
-        self.audio_bitrate_combo.addItems(AUDIO_BITRATES)
-        self.audio_bitrate_combo.setCurrentText("192k")
-        # --- 新增: 初始化分辨率预设下拉菜单 ---
-        self.resolution_preset_combo.addItems(["自定义"] + list(RESOLUTION_PRESETS.keys()))
-        self._on_video_format_changed(self.format_combo.currentText())
-
-    # --- 新增: 分辨率预设选择事件处理函数 ---
-    def _on_resolution_preset_changed(self, preset):
-        if preset in RESOLUTION_PRESETS:
-            width = RESOLUTION_PRESETS[preset]
-            self.resolution_edit.setText(f"{width}:-1")
-            self.resolution_edit.setEnabled(False)
-        else: # "自定义"
-            self.resolution_edit.clear()
-            self.resolution_edit.setEnabled(True)
-
-    def _on_video_format_changed(self, v_format):
-        self.video_codec_combo.clear()
-        self.video_codec_combo.addItems(VIDEO_FORMAT_CODECS.get(v_format, []))
-        self.audio_codec_combo.clear()
-        self.audio_codec_combo.addItems(AUDIO_CODECS_FOR_VIDEO_FORMAT.get(v_format, []))
-        self.auto_set_output_path(self.input_edit.text())
-        self._update_audio_bitrate_visibility()
-
-    def _update_audio_bitrate_visibility(self):
-        codec = self.audio_codec_combo.currentText()
-        is_visible = codec not in ['flac', 'copy', 'alac']
-        self.audio_bitrate_label.setVisible(is_visible)
-        self.audio_bitrate_combo.setVisible(is_visible)
-
-    def _update_video_options_visibility(self):
-        codec = self.video_codec_combo.currentText()
-        is_crf_visible = "libx" in codec or "av1" in codec or "qsv" in codec
-        is_cq_visible = "nvenc" in codec or "amf" in codec
-
-        self.crf_label.setVisible(is_crf_visible)
-        self.crf_edit.setVisible(is_crf_visible)
-
-        self.cq_label.setVisible(is_cq_visible)
-        self.cq_edit.setVisible(is_cq_visible)
-
-        is_bitrate_visible = codec != 'copy'
-        self.video_bitrate_label.setVisible(is_bitrate_visible)
-        self.video_bitrate_edit.setVisible(is_bitrate_visible)
-
-    def _validate_inputs(self):
-        if not self.input_edit.text() or not os.path.exists(self.input_edit.text()):
-            display_error(self.console, "输入视频文件不存在或未指定。"); return False
-        if not self.output_edit.text():
-            display_error(self.console, "输出文件路径不能为空。"); return False
-        if self.crf_edit.isVisible() and not validate_crf(self.crf_edit.text()):
-            display_error(self.console, f"无效的CRF值: {self.crf_edit.text()} (应为0-51的整数)"); return False
-        if self.cq_edit.isVisible() and not validate_cq(self.cq_edit.text()):
-            display_error(self.console, f"无效的CQ值: {self.cq_edit.text()} (应为0-51的整数)"); return False
-        if not validate_fps(self.fps_edit.text()):
-            display_error(self.console, f"无效的FPS值: {self.fps_edit.text()}"); return False
-        if not validate_resolution(self.resolution_edit.text()):
-            display_error(self.console, f"无效的分辨率格式: {self.resolution_edit.text()} (应为 宽度:高度)"); return False
-        if self.video_bitrate_edit.isVisible() and not validate_bitrate(self.video_bitrate_edit.text()):
-            display_error(self.console, f"无效的视频比特率: {self.video_bitrate_edit.text()}"); return False
-        if self.subtitle_edit.text() and not os.path.exists(self.subtitle_edit.text()):
-            display_error(self.console, "指定的字幕文件不存在。"); return False
-        return True
-
-    def auto_set_output_path(self, input_path):
-        if not input_path: return
-        base_path, _ = os.path.splitext(input_path)
-        selected_format = self.format_combo.currentText()
-        self.output_edit.setText(f"{base_path}_output.{selected_format}")
-
-    def select_output_path(self):
-        filter_str = f"{self.format_combo.currentText().upper()} (*.{self.format_combo.currentText()});;All Files (*)"
-        default_path = self.output_edit.text() or os.path.dirname(self.input_edit.text())
-        file_name, _ = QFileDialog.getSaveFileName(self, "选择输出路径", default_path, filter_str)
-        if file_name: self.output_edit.setText(file_name)
-
-    def select_subtitle_file(self):
-        file_name, _ = QFileDialog.getOpenFileName(self, "选择字幕文件", "", SUBTITLE_FORMATS)
-        if file_name: self.subtitle_edit.setText(file_name)
-
-    def _get_command(self):
-        input_file, output_file = self.input_edit.text(), self.output_edit.text()
-        command = ["ffmpeg", "-i", input_file]
-        
-        subtitle_file = self.subtitle_edit.text()
-        
-        # 将视频滤镜相关的命令存入一个列表
-        video_filters = []
-        
-        if subtitle_file:
-            escaped_subtitle_path = escape_ffmpeg_filter_path(subtitle_file)
-            video_filters.append(f"subtitles={escaped_subtitle_path}")
-
-        video_codec = self.video_codec_combo.currentText()
-        command.extend(["-c:v", video_codec])
-        
-        if self.resolution_edit.text():
-            resolution = self.resolution_edit.text()
-            video_filters.append(f"scale={resolution}")
-
-        # 如果有任何视频滤镜，将它们合并并添加到命令中
-        if video_filters:
-            command.extend(["-vf", ",".join(video_filters)])
-
-        if video_codec != 'copy':
-            if "qsv" in video_codec:
-                if self.crf_edit.isVisible() and self.crf_edit.text():
-                    command.extend(["-global_quality", self.crf_edit.text()])
-            else:
-                if self.crf_edit.isVisible() and self.crf_edit.text():
-                    command.extend(["-crf", self.crf_edit.text()])
-
-            if self.cq_edit.isVisible() and self.cq_edit.text():
-                command.extend(["-cq", self.cq_edit.text()])
-
-            if self.video_bitrate_edit.isVisible() and self.video_bitrate_edit.text():
-                command.extend(["-b:v", self.video_bitrate_edit.text()])
-            if self.fps_edit.text():
-                command.extend(["-r", self.fps_edit.text()])
-
-        audio_codec = self.audio_codec_combo.currentText()
-        command.extend(["-c:a", audio_codec])
-        if audio_codec != 'copy' and self.audio_bitrate_combo.isVisible() and self.audio_bitrate_combo.currentText():
-            command.extend(["-b:a", self.audio_bitrate_combo.currentText()])
-        
-        command.extend(["-y", output_file])
-        return command
-
-# ... (后面其他选项卡的代码保持不变)
-class AudioTab(BaseTab, Ui_AudioTab):
-    def __init__(self, main_window):
-        super().__init__(main_window)
-        self.setupUi(self)
-        self._connect_signals()
-        self._initialize_ui_state()
-
-    def _connect_signals(self):
-        self.select_input_button.clicked.connect(lambda: self.main_window.select_file(self.input_edit))
-        self.select_output_button.clicked.connect(self.select_output_path)
-        self.run_button.clicked.connect(self._run_command)
-        self.format_combo.currentTextChanged.connect(self._on_audio_format_changed)
-        self.codec_combo.currentTextChanged.connect(self._update_dynamic_options)
-        self.bitrate_combo.currentTextChanged.connect(self._update_dynamic_options)
-
-    def _initialize_ui_state(self):
-        self.format_combo.addItems(AUDIO_FORMATS)
-        self.sample_rate_combo.addItems(AUDIO_SAMPLE_RATES)
-        self.bitrate_combo.addItems(AUDIO_BITRATES)
-        self.bitrate_combo.setCurrentText("192k")
-        self.compression_combo.addItems(map(str, range(13)))
-        self.compression_combo.setCurrentText(DEFAULT_COMPRESSION_LEVEL)
-        self._on_audio_format_changed(self.format_combo.currentText())
-
-    def _on_audio_format_changed(self, a_format):
-        self.codec_combo.clear()
-        codecs = AUDIO_FORMAT_CODECS.get(a_format, [])
-        self.codec_combo.addItems(codecs)
-
-        self.bit_depth_combo.clear()
-        if a_format == 'wav':
-            self.bit_depth_combo.addItems(WAV_BIT_DEPTH_CODECS.keys())
-        else:
-            self.bit_depth_combo.addItems(AUDIO_SAMPLE_FORMATS.keys())
-        
-        self.auto_set_output_path(self.input_edit.text())
-        self._update_dynamic_options()
-
-    def _update_dynamic_options(self):
-        a_format = self.format_combo.currentText()
-        codec = self.codec_combo.currentText()
-        if not codec: return
-        
-        is_copy = codec == 'copy'
-        is_lossy = codec in ['libmp3lame', 'aac', 'opus', 'vorbis']
-        is_flac = codec == 'flac'
-        is_wav = a_format == 'wav'
-
-        self.sample_rate_combo.setEnabled(not is_copy)
-        self.bitrate_combo.setEnabled(not is_copy)
-        self.compression_combo.setEnabled(not is_copy)
-
-        self.bitrate_label.setVisible(is_lossy)
-        self.bitrate_combo.setVisible(is_lossy)
-
-        self.compression_label.setVisible(is_flac)
-        self.compression_combo.setVisible(is_flac)
-        
-        # MODIFIED: For lossy codecs, bit depth is not applicable. Also hide for 'copy'
-        is_bit_depth_visible = not is_copy and not is_lossy
-        self.bit_depth_label.setVisible(is_bit_depth_visible)
-        self.bit_depth_combo.setVisible(is_bit_depth_visible)
-        self.bit_depth_combo.setEnabled(is_bit_depth_visible)
-
-        if is_bit_depth_visible:
-            self.bit_depth_label.setText("位深:" if is_wav else "采样格式:")
-
-    def auto_set_output_path(self, input_path):
-        if not input_path: return
-        base_path, _ = os.path.splitext(input_path)
-        selected_format = self.format_combo.currentText()
-        self.output_edit.setText(f"{base_path}_output.{selected_format}")
-
-    def select_output_path(self):
-        filter_str = f"{self.format_combo.currentText().upper()} (*.{self.format_combo.currentText()});;All Files (*)"
-        default_path = self.output_edit.text() or os.path.dirname(self.input_edit.text())
-        file_name, _ = QFileDialog.getSaveFileName(self, "选择输出路径", default_path, filter_str)
-        if file_name: self.output_edit.setText(file_name)
-        
-    def _validate_inputs(self):
-        if not self.input_edit.text() or not os.path.exists(self.input_edit.text()):
-            display_error(self.console, "输入音频文件不存在或未指定。"); return False
-        if not self.output_edit.text():
-            display_error(self.console, "输出文件路径不能为空。"); return False
-        return True
-
-    def _get_command(self):
-        input_file, output_file = self.input_edit.text(), self.output_edit.text()
-        command = ["ffmpeg", "-i", input_file]
-        
-        a_format = self.format_combo.currentText()
-        codec = self.codec_combo.currentText()
-        if not codec: raise ValueError("未选择任何有效的编码器")
-        
-        if a_format == 'wav':
-            bit_depth_text = self.bit_depth_combo.currentText()
-            wav_codec = WAV_BIT_DEPTH_CODECS.get(bit_depth_text, "pcm_s16le")
-            command.extend(["-c:a", wav_codec])
-        else:
-            command.extend(["-c:a", codec])
-
-            if codec != 'copy':
-                is_lossy = codec in ['libmp3lame', 'aac', 'opus', 'vorbis']
-
-                if self.bitrate_label.isVisible() and is_lossy:
-                    bitrate = self.bitrate_combo.currentText()
-                    if bitrate:
-                        command.extend(["-b:a", bitrate])
-                
-                if self.compression_label.isVisible() and codec == 'flac':
-                    command.extend(["-compression_level", self.compression_combo.currentText()])
-
-                # MODIFIED: Only add sample format for non-lossy codecs
-                if not is_lossy:
-                    sample_fmt_text = self.bit_depth_combo.currentText()
-                    sample_fmt = AUDIO_SAMPLE_FORMATS.get(sample_fmt_text)
-                    if sample_fmt:
-                        command.extend(["-sample_fmt", sample_fmt])
-
-        if codec != 'copy':
-            sample_rate = self.sample_rate_combo.currentText()
-            if sample_rate and sample_rate != "(默认)":
-                command.extend(["-ar", sample_rate])
-
-        command.extend(["-y", output_file])
-        return command
-    
-class MuxingTab(BaseTab, Ui_MuxingTab):
-    def __init__(self, main_window):
-        super().__init__(main_window)
-        self.setupUi(self)
-        self._connect_signals()
-
-    def _connect_signals(self):
-        self.select_video_button.clicked.connect(lambda: self.main_window.select_file(self.video_input_edit))
-        self.select_audio_button.clicked.connect(lambda: self.main_window.select_file(self.audio_input_edit))
-        self.select_subtitle_button.clicked.connect(self.select_subtitle_file)
-        self.select_output_button.clicked.connect(self.select_output_path)
-        self.run_button.clicked.connect(self._run_command)
-    
-    def select_subtitle_file(self):
-        file_name, _ = QFileDialog.getOpenFileName(self, "选择字幕文件", "", SUBTITLE_FORMATS)
-        if file_name: self.subtitle_input_edit.setText(file_name)
-
-    def select_output_path(self):
-        default_dir = os.path.dirname(self.video_input_edit.text())
-        file_name, _ = QFileDialog.getSaveFileName(self, "选择输出文件", default_dir, "Media Files (*.mp4 *.mkv)")
-        if file_name: self.output_edit.setText(file_name)
-        
-    def _validate_inputs(self):
-        if not self.video_input_edit.text() or not os.path.exists(self.video_input_edit.text()):
-            display_error(self.console, "输入的视频文件不存在或未指定。"); return False
-        if not self.audio_input_edit.text() or not os.path.exists(self.audio_input_edit.text()):
-            display_error(self.console, "输入的音频文件不存在或未指定。"); return False
-        if self.subtitle_input_edit.text() and not os.path.exists(self.subtitle_input_edit.text()):
-            display_error(self.console, "指定的字幕文件不存在。"); return False
-        if not self.output_edit.text():
-            display_error(self.console, "输出文件路径不能为空。"); return False
-        return True
-
-    def _get_command(self):
-        video_file = self.video_input_edit.text()
-        audio_file = self.audio_input_edit.text()
-        subtitle_file = self.subtitle_input_edit.text()
-        output_file = self.output_edit.text()
-        
-        command = ["ffmpeg", "-i", video_file, "-i", audio_file]
-        if subtitle_file:
-            command.extend(["-i", subtitle_file])
-        
-        command.extend(["-map", "0:v:0", "-map", "1:a:0"])
-        if subtitle_file:
-            command.extend(["-map", "2:s:0"])
-        
-        command.extend(["-c:v", "copy", "-c:a", "copy"])
-        if subtitle_file:
-            if output_file.endswith('.mp4'):
-                command.extend(["-c:s", "mov_text"])
-            else:
-                command.extend(["-c:s", "copy"])
-                
-        command.extend(["-y", output_file])
-        return command
-
-class DemuxingTab(BaseTab, Ui_DemuxingTab):
-    def __init__(self, main_window):
-        super().__init__(main_window)
-        self.setupUi(self)
-        self._connect_signals()
-        self.current_stream_type = None
-
-    def _connect_signals(self):
-        self.select_input_button.clicked.connect(lambda: self.main_window.select_file(self.input_edit))
-        self.extract_video_button.clicked.connect(lambda: self._run_demux_command('video'))
-        self.extract_audio_button.clicked.connect(lambda: self._run_demux_command('audio'))
-
-    def _run_demux_command(self, stream_type):
-        self.current_stream_type = stream_type
-        self._run_command()
-
-    def set_buttons_enabled(self, enabled):
-        self.extract_video_button.setEnabled(enabled)
-        self.extract_audio_button.setEnabled(enabled)
-    
-    def _validate_inputs(self):
-        if not self.input_edit.text() or not os.path.exists(self.input_edit.text()):
-            display_error(self.console, "输入文件不存在或未指定。"); return False
-        return True
-
-    def _get_command(self):
-        input_file = self.input_edit.text()
-        base, ext = os.path.splitext(input_file)
-        
-        try:
-            from config import get_config
-            config = get_config()
-            overwrite = config.get("overwrite_files", True)
-        except ImportError:
-            overwrite = True
-        
-        if self.current_stream_type == 'video':
-            output_file = f"{base}_video_only{ext}"
-            if overwrite:
-                return ["ffmpeg", "-i", input_file, "-c:v", "copy", "-an", "-y", output_file]
-            else:
-                return ["ffmpeg", "-i", input_file, "-c:v", "copy", "-an", output_file]
-        elif self.current_stream_type == 'audio':
-            output_file = f"{base}_audio_only.mka"
-            if overwrite:
-                return ["ffmpeg", "-i", input_file, "-c:a", "copy", "-vn", "-y", output_file]
-            else:
-                return ["ffmpeg", "-i", input_file, "-c:a", "copy", "-vn", output_file]
-        return None
-
-class CommonOperationsTab(BaseTab, Ui_CommonOpsTab):
-    def __init__(self, main_window):
-        super().__init__(main_window)
-        self.setupUi(self)
-        self._connect_signals()
-        self.current_command_type = None
-
-    def _connect_signals(self):
-        self.select_trim_input_button.clicked.connect(lambda: self.main_window.select_file(self.trim_input_edit))
-        self.select_trim_output_button.clicked.connect(self.select_trim_output_path)
-        self.trim_button.clicked.connect(lambda: self._run_specific_command('trim'))
-        
-        self.select_img_button.clicked.connect(self.select_image_file)
-        self.select_audio_button.clicked.connect(lambda: self.main_window.select_file(self.audio_input_edit))
-        self.select_img_audio_output_button.clicked.connect(self.select_img_audio_output_path)
-        self.img_audio_button.clicked.connect(lambda: self._run_specific_command('img_audio'))
-
-    def _run_specific_command(self, command_type):
-        self.current_command_type = command_type
-        self._run_command()
-
-    def set_buttons_enabled(self, enabled):
-        self.trim_button.setEnabled(enabled)
-        self.img_audio_button.setEnabled(enabled)
-
-    def select_trim_output_path(self):
-        default_dir = os.path.dirname(self.trim_input_edit.text())
-        file_name, _ = QFileDialog.getSaveFileName(self, "选择输出文件", default_dir)
-        if file_name: self.trim_output_edit.setText(file_name)
-
-    def select_image_file(self):
-        file_name, _ = QFileDialog.getOpenFileName(self, "选择图片文件", "", "Image Files (*.png *.jpg *.jpeg *.bmp)")
-        if file_name: self.img_input_edit.setText(file_name)
-
-    def select_img_audio_output_path(self):
-        default_dir = os.path.dirname(self.img_input_edit.text())
-        file_name, _ = QFileDialog.getSaveFileName(self, "选择输出视频", default_dir, "Video Files (*.mp4)")
-        if file_name: self.img_audio_output_edit.setText(file_name)
-
-    def _validate_inputs(self):
-        if self.current_command_type == 'trim':
-            if not self.trim_input_edit.text() or not os.path.exists(self.trim_input_edit.text()):
-                display_error(self.console, "截取输入的视频文件不存在或未指定。"); return False
-            if not self.trim_output_edit.text():
-                display_error(self.console, "截取输出的文件路径不能为空。"); return False
-            if not validate_time_format(self.start_time_edit.text()):
-                display_error(self.console, f"无效的开始时间格式: {self.start_time_edit.text()}"); return False
-            if not validate_time_format(self.end_time_edit.text()):
-                display_error(self.console, f"无效的结束时间格式: {self.end_time_edit.text()}"); return False
-        elif self.current_command_type == 'img_audio':
-            if not self.img_input_edit.text() or not os.path.exists(self.img_input_edit.text()):
-                display_error(self.console, "输入的图片文件不存在或未指定。"); return False
-            if not self.audio_input_edit.text() or not os.path.exists(self.audio_input_edit.text()):
-                display_error(self.console, "图声合成的输出路径不能为空。"); return False
-            if not self.img_audio_output_edit.text():
-                display_error(self.console, "图声合成的输出路径不能为空。"); return False
-        return True
-
-    def _get_command(self):
-        # 获取覆盖设置
+    def _job_duration(self):
+        """任务输出的时长(秒)，用于计算进度；默认为当前媒体文件的时长"""
+        return self.main_window.total_duration_sec
+
+    def _job_description(self, command):
+        # 命令的最后一个参数通常是输出文件
+        return f"{self.job_label}: {os.path.basename(command[-1])}"
+
+    # --- 批量处理 ---
+    # 子类需提供 batch_input_edit / batch_output_dir_edit / skip_existing_check 控件，
+    # 并实现 _validate_options、_batch_output_format 和 _build_batch_command；
+    # 有 save_preset_button 时还需实现 _preset_params（返回与命令行选项同名的参数）
+
+    batch_extensions = []
+
+    def _connect_batch_signals(self):
+        self.select_batch_input_button.clicked.connect(
+            lambda: self._select_directory(self.batch_input_edit, "选择批量处理的文件夹"))
+        self.select_batch_output_button.clicked.connect(
+            lambda: self._select_directory(self.batch_output_dir_edit, "选择输出文件夹"))
+        self.batch_run_button.clicked.connect(self._run_batch)
+        if hasattr(self, "save_preset_button"):
+            self.save_preset_button.clicked.connect(self._save_preset)
+
+    def _save_preset(self):
+        """将当前参数保存为预设（子类实现 _preset_params）"""
+        from presets import save_preset, list_presets, PresetError
+        if not self._validate_options():
+            self.main_window.switch_to_console_tab(); return
+        name, ok = QInputDialog.getItem(self, "保存为预设", "预设名称 (同名时覆盖):", list_presets(), 0, True)
+        if not ok or not name.strip():
+            return
+        self.main_window.switch_to_console_tab()
         try:
-            from config import get_config
-            config = get_config()
-            overwrite = config.get("overwrite_files", True)
-        except ImportError:
-            overwrite = True
-        
-        if self.current_command_type == 'trim':
-            input_file = self.trim_input_edit.text()
-            output_file = self.trim_output_edit.text()
-            start_time = self.start_time_edit.text()
-            end_time = self.end_time_edit.text()
-
-            command = ["ffmpeg", "-i", input_file, "-c", "copy"]
-            if start_time and start_time != '00:00:00':
-                command.extend(["-ss", start_time])
-            if end_time:
-                command.extend(["-to", end_time])
-            
-            if overwrite:
-                command.extend(["-y", output_file])
-            else:
-                command.append(output_file)
-            return command
-
-        elif self.current_command_type == 'img_audio':
-            img_file = self.img_input_edit.text()
-            audio_file = self.audio_input_edit.text()
-            output_file = self.img_audio_output_edit.text()
-            
-            command = [
-                "ffmpeg", "-loop", "1", "-i", img_file,
-                "-i", audio_file,
-                "-c:v", "libx264", "-tune", "stillimage",
-                "-c:a", "aac", "-b:a", "192k",
-                "-shortest"
-            ]
-            if overwrite:
-                command.extend(["-y", output_file])
-            else:
-                command.append(output_file)
-            return command
-        return None
-
-class ProfessionalTab(BaseTab, Ui_ProfessionalTab):
-    def __init__(self, main_window):
-        super().__init__(main_window)
-        self.setupUi(self)
-        self._connect_signals()
+            path = save_preset(name, self._preset_params())
+        except (PresetError, OSError, ValueError) as e:
+            display_error(self.console, f"保存预设失败: {e}"); return
+        self.console.append(f"<font color='#2ecc71'>预设已保存: {path}</font>")
+        self.console.append(f"<font color='#9aace5'>监视文件夹: python cli.py watch &lt;文件夹&gt; "
+                            f"--preset {name.strip()} --done-dir &lt;完成文件夹&gt;</font>")
+
+    def _select_directory(self, line_edit, title):
+        directory = QFileDialog.getExistingDirectory(self, title, line_edit.text())
+        if directory: line_edit.setText(directory)
+
+    def _run_batch(self):
+        self.main_window.switch_to_console_tab()
+        pattern = self.batch_input_edit.text().strip()
+        if not pattern:
+            display_error(self.console, "请指定批量处理的文件夹或通配符。"); return
+        output_dir = self.batch_output_dir_edit.text().strip()
+        if output_dir and not os.path.isdir(output_dir):
+            display_error(self.console, "批量输出目录不存在。"); return
+        if not self._validate_options():
+            return
 
-    def _connect_signals(self):
-        self.run_button.clicked.connect(self._run_command)
-    
-    def _validate_inputs(self):
-        if not self.command_input.toPlainText().strip():
-            display_error(self.console, "命令不能为空。")
-            return False
-        return True
+        inputs = expand_batch_inputs(pattern, self.batch_extensions)
+        plan, skipped = plan_batch(inputs, self._batch_output_format(), output_dir or None,
+                                   self.skip_existing_check.isChecked())
+        if not plan:
+            display_error(self.console, f"没有需要处理的文件 (匹配 {len(inputs)} 个, 跳过 {skipped} 个已存在的输出)。")
+            return
 
-    def _get_command(self):
-        command_text = self.command_input.toPlainText().strip()
-        try:
-            import shlex
-            return shlex.split(command_text)
-        except ImportError:
-            return command_text.split()
- 
-# --- 设置选项卡 ---
-class SettingsTab(BaseTab, Ui_SettingsTab):
-    def __init__(self, main_window):
-        super().__init__(main_window)
-        self.setupUi(self)
-        self._connect_signals()
-        self._load_config()
-    
-    def _connect_signals(self):
-        self.ffmpeg_browse_button.clicked.connect(lambda: self._browse_file(self.ffmpeg_path_edit, "选择FFmpeg可执行文件", "Executable Files (*.exe);;All Files (*)"))
-        self.ffprobe_browse_button.clicked.connect(lambda: self._browse_file(self.ffprobe_path_edit, "选择FFprobe可执行文件", "Executable Files (*.exe);;All Files (*)"))
-        self.test_button.clicked.connect(self._test_ffmpeg)
-        self.save_button.clicked.connect(self._save_config)
-        self.reset_button.clicked.connect(self._reset_to_defaults)
-    
-    def _browse_file(self, line_edit, title, filter_str):
-        file_name, _ = QFileDialog.getOpenFileName(self, title, "", filter_str)
-        if file_name:
-            line_edit.setText(file_name)
-    
-    def _load_config(self):
-        try:
-            from config import get_config
-            config = get_config()
-            
-            # FFmpeg路径
-            ffmpeg_path = config.get("ffmpeg_path", "ffmpeg")
-            self.ffmpeg_path_edit.setText(ffmpeg_path if ffmpeg_path != "ffmpeg" else "")
-            
-            # FFprobe路径
-            ffprobe_path = config.get("ffprobe_path", "ffprobe")
-            self.ffprobe_path_edit.setText(ffprobe_path if ffprobe_path != "ffprobe" else "")
-            
-            # 复选框设置
-            self.overwrite_files_check.setChecked(config.get("overwrite_files", True))
-            
-        except ImportError:
-            self.console.append("<font color='#e74c3c'>错误: 配置模块加载失败</font>")
-    
-    def _save_config(self):
-        try:
-            from config import get_config
-            config = get_config()
-            
-            # FFmpeg路径
-            ffmpeg_path = self.ffmpeg_path_edit.text().strip()
-            config.set("ffmpeg_path", ffmpeg_path if ffmpeg_path else "ffmpeg")
-            
-            # FFprobe路径
-            ffprobe_path = self.ffprobe_path_edit.text().strip()
-            config.set("ffprobe_path", ffprobe_path if ffprobe_path else "ffprobe")
-            
-            # 复选框设置
-            config.set("overwrite_files", self.overwrite_files_check.isChecked())
-            
-            # 保存到文件
-            if config.save():
-                self.console.append("<font color='#2ecc71'>设置已保存成功</font>")
-                self.console.append("<font color='#f1c40f'>部分设置需要重启应用才能生效</font>")
-            else:
-                self.console.append("<font color='#e74c3c'>错误: 保存设置失败</font>")
-                
-        except ImportError:
-            self.console.append("<font color='#e74c3c'>错误: 配置模块加载失败</font>")
-    
-    def _test_ffmpeg(self):
+        group = JobGroup(f"批量{self.job_label}")
+        group.skipped = skipped
         try:
-            from config import get_config
-            config = get_config()
-            
-            ffmpeg_path = self.ffmpeg_path_edit.text().strip() or "ffmpeg"
-            ffprobe_path = self.ffprobe_path_edit.text().strip() or "ffprobe"
-            
-            self.console.append("<hr><b>测试FFmpeg配置...</b>")
-            
-            # 测试FFmpeg
-            import subprocess
-            try:
-                result = subprocess.run([ffmpeg_path, "-version"], 
-                                       capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    self.console.append(f"<font color='#2ecc71'>✓ FFmpeg 可用: {ffmpeg_path}</font>")
-                    # 提取版本信息
-                    version_line = result.stdout.split('\n')[0] if result.stdout else "未知版本"
-                    self.console.append(f"<font color='#9aace5'>版本: {version_line}</font>")
-                else:
-                    self.console.append(f"<font color='#e74c3c'>✗ FFmpeg 不可用: {ffmpeg_path}</font>")
-                    self.console.append(f"<font color='#e74c3c'>错误: {result.stderr[:200] if result.stderr else '未知错误'}</font>")
-            except (subprocess.SubprocessError, FileNotFoundError) as e:
-                self.console.append(f"<font color='#e74c3c'>✗ FFmpeg 未找到: {ffmpeg_path}</font>")
-                self.console.append(f"<font color='#e74c3c'>错误: {str(e)}</font>")
-            
-            # 测试FFprobe
-            try:
-                result = subprocess.run([ffprobe_path, "-version"], 
-                                       capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    self.console.append(f"<font color='#2ecc71'>✓ FFprobe 可用: {ffprobe_path}</font>")
-                else:
-                    self.console.append(f"<font color='#e67e22'>⚠ FFprobe 不可用: {ffprobe_path}</font>")
-                    self.console.append(f"<font color='#e67e22'>警告: 媒体信息预览功能可能受限</font>")
-            except (subprocess.SubprocessError, FileNotFoundError) as e:
-                self.console.append(f"<font color='#e67e22'>⚠ FFprobe 未找到: {ffprobe_path}</font>")
-                self.console.append(f"<font color='#e67e22'>警告: 媒体信息预览功能可能受限</font>")
-            
-            self.console.append("<b>测试完成</b><hr>")
-            
-        except ImportError as e:
-            self.console.append(f"<font color='#e74c3c'>错误: 测试失败 - {str(e)}</font>")
-    
-    def _reset_to_defaults(self):
-        reply = QMessageBox.question(self, "确认重置", 
-                                    "确定要重置所有设置为默认值吗？",
-                                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                                    QMessageBox.StandardButton.No)
-        
-        if reply == QMessageBox.StandardButton.Yes:
-            self.ffmpeg_path_edit.clear()
-            self.ffprobe_path_edit.clear()
-            self.overwrite_files_check.setChecked(True)
-            self.console.append("<font color='#2ecc71'>设置已重置为默认值</font>")
-            self.console.append("<font color='#f1c40f'>请点击'保存设置'以应用更改</font>")
-    
-    def set_buttons_enabled(self, enabled):
-        # 设置选项卡没有需要禁用的按钮
-        pass
-
-# --- 修改后的 AboutTab ---
-class AboutTab(BaseTab, Ui_AboutTab):
-    def __init__(self, main_window):
-        super().__init__(main_window)
-        self.setupUi(self)
-
-    def set_buttons_enabled(self, enabled):
-        # 此选项卡没有需要禁用的按钮
-        pass
\ No newline at end of file
+            for input_file, output_file in plan:
+                command = self._build_batch_command(input_file, output_file)
+                self.process_handler.run_ffmpeg(command, self._job_description(command), group=group)
+        except Exception as e:
+            display_error(self.console, f"构建命令时发生意外错误: {e}")
+            return
+        self.console.clear()
+        self.console.append(f"<b>{group.name}: 已加入 {len(plan)} 个任务，跳过 {skipped} 个已存在的输出 "
+                            f"(并行上限 {self.process_handler.job_queue.max_workers})</b>\n<hr>")
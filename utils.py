@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 # SkyDreamBox/utils.py
 
-import re
 import sys
 import os
 import datetime
@@ -49,6 +48,13 @@ AUDIO_SAMPLE_FORMATS = {
     "32-bit (float)": "fltp"
 }
 
+# 有损音频编码器（可设置比特率，不设置采样格式）
+LOSSY_AUDIO_CODECS = ['libmp3lame', 'aac', 'opus', 'vorbis']
+
+# 批量处理时识别的输入文件扩展名
+VIDEO_INPUT_EXTENSIONS = ["mp4", "mkv", "avi", "mov", "webm", "flv", "wmv", "ts", "m2ts", "mts", "mpg", "mpeg", "m4v", "3gp"]
+AUDIO_INPUT_EXTENSIONS = ["mp3", "flac", "aac", "wav", "opus", "ogg", "m4a", "wma", "ape", "alac", "aiff", "ac3", "dts"]
+
 VIDEO_FORMATS = list(VIDEO_FORMAT_CODECS.keys())
 AUDIO_FORMATS = list(AUDIO_FORMAT_CODECS.keys())
 AUDIO_BITRATES = ["128k", "192k", "256k", "320k"]
@@ -56,6 +62,39 @@ AUDIO_SAMPLE_RATES = ["(默认)", "24000", "44100", "48000", "96000", "192000"]
 SUBTITLE_FORMATS = "字幕文件 (*.srt *.ass *.ssa);;所有文件 (*)"
 DEFAULT_COMPRESSION_LEVEL = "5"
 
+# 支持两遍编码（目标文件大小模式）的视频编码器
+TWO_PASS_CODECS = ["libx264", "libx265", "libvpx-vp9", "libaom-av1", "mpeg4"]
+
+# libx264/libx265 的编码预设，从快到慢
+VIDEO_PRESET_CODECS = ["libx264", "libx265"]
+VIDEO_PRESETS = ["(默认)", "ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow", "slower", "veryslow"]
+
+# 提取全部流时各编码对应的扩展名和编码方式（None 表示直接复制），未列出的按流类型使用 Matroska
+STREAM_EXTRACT_FORMATS = {
+    # 视频
+    "h264": ("mp4", None), "hevc": ("mp4", None), "mpeg4": ("mp4", None), "av1": ("mkv", None),
+    "vp8": ("webm", None), "vp9": ("webm", None),
+    # 音频
+    "aac": ("m4a", None), "alac": ("m4a", None), "mp3": ("mp3", None), "ac3": ("ac3", None),
+    "eac3": ("eac3", None), "dts": ("dts", None), "truehd": ("thd", None), "flac": ("flac", None),
+    "opus": ("opus", None), "vorbis": ("ogg", None),
+    "pcm_s16le": ("wav", None), "pcm_s24le": ("wav", None), "pcm_s32le": ("wav", None), "pcm_f32le": ("wav", None),
+    # 字幕 (mov_text 不能直接复制到独立文件，转换为 SRT)
+    "subrip": ("srt", None), "ass": ("ass", None), "ssa": ("ass", None), "webvtt": ("vtt", None),
+    "mov_text": ("srt", "srt"), "hdmv_pgs_subtitle": ("sup", None),
+}
+STREAM_TYPE_DEFAULT_EXTENSIONS = {"video": "mkv", "audio": "mka", "subtitle": "mks"}
+# 封面图片（disposition.attached_pic）只有一帧，按图片保存；其他 MJPEG/PNG 视频流仍使用默认容器
+ATTACHED_PIC_EXTENSIONS = {"mjpeg": "jpg", "png": "png", "bmp": "bmp", "gif": "gif", "webp": "webp"}
+
+# 多分辨率输出的默认档位: (标签, 高度, 默认视频比特率)
+LADDER_RENDITIONS = [
+    ("1080p", 1080, "5000k"),
+    ("720p", 720, "2800k"),
+    ("480p", 480, "1400k"),
+    ("360p", 360, "800k"),
+]
+
 RESOLUTION_PRESETS = {
     "720p": 1280,
     "1080p": 1920,
@@ -121,7 +160,7 @@ QTabBar::tab:selected, QTabBar::tab:hover {
 QTabBar::tab:selected {
     border-color: #2196F3;
 }
-QLineEdit, QTextEdit, QComboBox, QSpinBox, QDoubleSpinBox {
+QLineEdit, QTextEdit, QPlainTextEdit, QComboBox, QSpinBox, QDoubleSpinBox {
     background-color: #2C2C2C;
     border: 1px solid #333333;
     padding: 8px;
@@ -130,7 +169,7 @@ QLineEdit, QTextEdit, QComboBox, QSpinBox, QDoubleSpinBox {
     selection-background-color: #2196F3;
     selection-color: #000000;
 }
-QLineEdit:focus, QTextEdit:focus, QComboBox:focus, QSpinBox:focus, QDoubleSpinBox:focus {
+QLineEdit:focus, QTextEdit:focus, QPlainTextEdit:focus, QComboBox:focus, QSpinBox:focus, QDoubleSpinBox:focus {
     border: 2px solid #2196F3;
     padding: 7px; /* Adjust padding to maintain size */
 }
@@ -284,18 +323,6 @@ QToolTip {
 }
 """
 
-# =============================================================================
-# Regular Expression for Progress Parsing (进度解析正则表达式)
-# =============================================================================
-PROGRESS_RE = re.compile(
-    r"frame=\s*(?P<frame>\d+)\s+"
-    r"fps=\s*(?P<fps>[\d\.]+)\s+"
-    r".*?"
-    r"time=\s*(?P<time>[\d:\.]+)\s+"
-    r".*?"
-    r"speed=\s*(?P<speed>[\d\.]+)x"
-)
-
 # =============================================================================
 # Helper Functions (辅助函数)
 # =============================================================================
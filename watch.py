@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+# SkyDreamBox/watch.py
+# 监视文件夹：Linux 上用 inotify 得到新文件通知（其他平台或不可用时定期扫描），
+# 文件大小和修改时间保持不变一段时间后才交给处理函数，成功后把结果移动到完成文件夹（不依赖 PySide6）
+
+import os
+import sys
+import time
+import errno
+import select
+import shutil
+import struct
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# inotify 事件 (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+# 复制/下载中的临时文件
+_TEMP_SUFFIXES = (".part", ".tmp", ".crdownload", ".partial", ".!qb")
+# 完成文件夹中记录已处理的源文件（未指定 originals_dir 时）
+PROCESSED_RECORD = ".skydreambox_processed"
+# 完成文件夹中正在生成的结果
+WORK_DIR_NAME = ".skydreambox_partial"
+
+
+class InotifyWatcher:
+    """inotify 通知：wait() 返回 (有变化的文件路径集合, 是否需要完整扫描)"""
+
+    def __init__(self, directory, recursive=False):
+        import ctypes
+        import ctypes.util
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify 仅在 Linux 上可用")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self.recursive = recursive
+        self._dirs = {}  # watch descriptor -> 目录
+        self._add_watch(directory)
+        if recursive:
+            for root, dirs, _ in os.walk(directory):
+                dirs[:] = [d for d in dirs if not d.startswith(".")]
+                for d in dirs:
+                    self._add_watch(os.path.join(root, d))
+
+    def _add_watch(self, directory):
+        import ctypes
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"无法监视 {directory}")
+        self._dirs[wd] = directory
+
+    def wait(self, timeout):
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set(), False
+        paths, rescan = set(), False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length].rstrip(b"\0")
+                offset += _EVENT_HEADER.size + length
+                if mask & IN_Q_OVERFLOW:
+                    rescan = True  # 事件太多时内核会丢弃，改为完整扫描
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if mask & IN_ISDIR:
+                    if self.recursive and not os.path.basename(path).startswith("."):
+                        try:
+                            self._add_watch(path)
+                        except OSError:
+                            pass
+                        rescan = True  # 新目录在开始监视之前可能已有文件
+                else:
+                    paths.add(path)
+        return paths, rescan
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """没有 inotify 时的替代：只等待，由调用者按扫描间隔完整扫描"""
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+        return set(), False
+
+    def close(self):
+        pass
+
+
+class StabilityTracker:
+    """文件大小和修改时间连续 settle_seconds 秒不变（且不为空）时视为写入完成"""
+
+    def __init__(self, settle_seconds):
+        self.settle_seconds = settle_seconds
+        self.pending = {}  # 路径 -> (大小, 修改时间, 开始不变的时间)
+
+    def observe(self, path, now):
+        if path not in self.pending:
+            self.pending[path] = (-1, -1, now)
+
+    def ready(self, now):
+        """返回已稳定的文件（从等待列表中移除），已消失的文件直接移除"""
+        ready = []
+        for path, (size, mtime, since) in list(self.pending.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self.pending[path]
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime):
+                self.pending[path] = (stat.st_size, stat.st_mtime_ns, now)
+            elif stat.st_size > 0 and now - since >= self.settle_seconds:
+                del self.pending[path]
+                ready.append(path)
+        return ready
+
+
+def _identity(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0
+
+
+def _move(source, target_dir):
+    """移动文件到目录中，重名时加上序号，返回新路径"""
+    os.makedirs(target_dir, exist_ok=True)
+    stem, ext = os.path.splitext(os.path.basename(source))
+    target = os.path.join(target_dir, stem + ext)
+    index = 1
+    while os.path.exists(target):
+        target = os.path.join(target_dir, f"{stem}_{index}{ext}")
+        index += 1
+    shutil.move(source, target)
+    return target
+
+
+class WatchFolder:
+    """监视文件夹并按处理函数处理新文件
+
+    process(源文件, 工作目录) 在工作线程中调用，把结果写到工作目录并返回是否成功；
+    成功后工作目录中的文件移动到 done_dir（保持相对于监视文件夹的子目录）。
+    同时处理的文件不超过 max_workers 个，其余按发现顺序排队。
+    on_event(事件字典) 报告 watching / queued / started / done / failed / error 事件。
+    """
+
+    def __init__(self, directory, done_dir, process, extensions, max_workers=2, settle_seconds=10.0,
+                 originals_dir=None, failed_dir=None, recursive=False, use_inotify=True, scan_interval=None,
+                 on_event=None):
+        self.directory = os.path.abspath(directory)
+        self.done_dir = os.path.abspath(done_dir)
+        self.process = process
+        self.extensions = extensions
+        self.max_workers = max(1, max_workers)
+        self.originals_dir = os.path.abspath(originals_dir) if originals_dir else None
+        self.failed_dir = os.path.abspath(failed_dir) if failed_dir else None
+        self.recursive = recursive
+        self.on_event = on_event
+        self.tracker = StabilityTracker(settle_seconds)
+        self.watcher = None
+        if use_inotify:
+            try:
+                self.watcher = InotifyWatcher(self.directory, recursive)
+            except (OSError, AttributeError):  # 非 Linux、libc 没有 inotify 或监视数量达到上限
+                self.watcher = None
+        self.mode = "inotify" if self.watcher is not None else "polling"
+        if self.watcher is None:
+            self.watcher = PollingWatcher()
+        # inotify 收不到网络共享上由其他机器写入的文件，仍需定期完整扫描
+        self.scan_interval = scan_interval or (30.0 if self.mode == "inotify" else 5.0)
+        self.queue = deque()  # 已稳定、等待处理的文件
+        self.active = set()  # 正在处理的文件
+        self._workers = 0  # 正在运行的工作线程数
+        self._queue_lock = threading.Lock()
+        self.handled = {}  # 已处理（或失败）的文件 -> 处理时的 (大小, 修改时间)
+        self.finished = 0
+        self.failed = 0
+        self._record_path = os.path.join(self.done_dir, PROCESSED_RECORD)
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._excluded = tuple(d for d in (self.done_dir, self.originals_dir, self.failed_dir) if d)
+
+    # --- 事件 ---
+    def _emit(self, kind, **fields):
+        if self.on_event:
+            with self._lock:
+                self.on_event(dict(event=kind, **fields))
+
+    # --- 发现文件 ---
+    def _is_candidate(self, path):
+        name = os.path.basename(path)
+        stem, ext = os.path.splitext(name)
+        if name.startswith((".", "~")) or name.lower().endswith(_TEMP_SUFFIXES) or stem.endswith("_output"):
+            return False
+        if self.extensions and ext.lower().lstrip(".") not in self.extensions:
+            return False
+        if path.startswith(tuple(d + os.sep for d in self._excluded)):
+            return False
+        with self._queue_lock:
+            if path in self.active or path in self.queue:
+                return False
+        return self.handled.get(path) != _identity(path)
+
+    def scan(self):
+        """列出监视文件夹中的所有候选文件"""
+        found = []
+        for root, dirs, files in os.walk(self.directory):
+            dirs[:] = [d for d in dirs if not d.startswith(".")
+                       and os.path.join(root, d) not in self._excluded] if self.recursive else []
+            found.extend(os.path.join(root, name) for name in files)
+        return [path for path in found if self._is_candidate(path)]
+
+    def _load_record(self):
+        if self.originals_dir:
+            return
+        try:
+            with open(self._record_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    size, mtime, path = line.rstrip("\n").split("\t", 2)
+                    self.handled[path] = (int(size), int(mtime))
+        except (OSError, ValueError):
+            pass
+
+    def _append_record(self, path, identity):
+        if self.originals_dir or identity is None:
+            return
+        with self._lock:
+            with open(self._record_path, 'a', encoding='utf-8') as f:
+                f.write(f"{identity[0]}\t{identity[1]}\t{path}\n")
+
+    # --- 主循环 ---
+    def run(self, once=False):
+        """运行直到 stop() 被调用；once 为 True 时在没有等待或正在处理的文件时返回"""
+        os.makedirs(self.done_dir, exist_ok=True)
+        self._load_record()
+        self._emit("watching", directory=self.directory, mode=self.mode, max_workers=self.max_workers)
+        now = time.monotonic()
+        for path in self.scan():
+            self.tracker.observe(path, now)
+        last_scan = now
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                while not self._stopping.is_set():
+                    paths, rescan = self.watcher.wait(1.0)
+                    now = time.monotonic()
+                    if rescan or now - last_scan >= self.scan_interval:
+                        paths |= set(self.scan())
+                        last_scan = now
+                    for path in paths:
+                        if self._is_candidate(path):
+                            self.tracker.observe(path, now)
+                    for path in sorted(self.tracker.ready(now), key=_mtime):
+                        with self._queue_lock:
+                            self.queue.append(path)
+                            queued = len(self.queue)
+                        self._emit("queued", path=path, queued=queued)
+                    with self._queue_lock:
+                        # 工作线程处理完一个文件后直接取下一个，这里只在线程数不足时补充
+                        while self._workers < min(self.max_workers, len(self.queue)):
+                            self._workers += 1
+                            executor.submit(self._drain)
+                        idle = not (self.queue or self._workers)
+                    if once and idle and not self.tracker.pending:
+                        break
+            finally:
+                self._stopping.set()
+                self.watcher.close()
+
+    def _drain(self):
+        """工作线程：依次处理队列中的文件，队列为空或停止时结束"""
+        while True:
+            with self._queue_lock:
+                if self.stopping or not self.queue:
+                    self._workers -= 1
+                    return
+                path = self.queue.popleft()
+                self.active.add(path)
+            try:
+                self._process_one(path)
+            except Exception as e:  # 移动结果或源文件失败
+                self._count("failed")
+                self._emit("error", path=path, message=str(e))
+            finally:
+                with self._queue_lock:
+                    self.active.discard(path)
+
+    def _count(self, name):
+        with self._queue_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stop(self):
+        """停止监视；正在处理的文件由调用者终止其 FFmpeg 进程后结束，源文件保持不动"""
+        self._stopping.set()
+
+    @property
+    def stopping(self):
+        return self._stopping.is_set()
+
+    # --- 处理单个文件 ---
+    def _process_one(self, path):
+        identity = _identity(path)
+        key = hashlib.sha1(path.encode("utf-8")).hexdigest()[:12]
+        work_dir = os.path.join(self.done_dir, WORK_DIR_NAME, key)
+        shutil.rmtree(work_dir, ignore_errors=True)
+        os.makedirs(work_dir)
+        self._emit("started", path=path)
+        started = time.time()
+        try:
+            ok = self.process(path, work_dir)
+        except Exception as e:
+            if not self.stopping:
+                self._emit("error", path=path, message=str(e))
+            ok = False
+        try:
+            if self.stopping:
+                return
+            if ok:
+                self._finish(path, identity, work_dir, started)
+            else:
+                self._fail(path, identity, started)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            try:
+                os.rmdir(os.path.dirname(work_dir))  # 没有其他文件在处理时一并删除
+            except OSError:
+                pass
+
+    def _relative_dir(self, path, base_dir):
+        """源文件所在的子目录对应到 base_dir 中的目录"""
+        return os.path.normpath(os.path.join(base_dir, os.path.relpath(os.path.dirname(path), self.directory)))
+
+    def _finish(self, path, identity, work_dir, started):
+        target_dir = self._relative_dir(path, self.done_dir)
+        outputs = []
+        for root, _, files in os.walk(work_dir):
+            for name in files:
+                source = os.path.join(root, name)
+                target = os.path.join(target_dir, os.path.relpath(source, work_dir))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(source, target)  # 同一文件系统中的原子替换，完成文件夹中不会出现不完整的文件
+                outputs.append(target)
+        if self.originals_dir:
+            _move(path, self._relative_dir(path, self.originals_dir))
+        else:
+            self._append_record(path, identity)
+        self.handled[path] = identity
+        self._count("finished")
+        self._emit("done", path=path, outputs=outputs, elapsed=round(time.time() - started, 3))
+
+    def _fail(self, path, identity, started):
+        self._count("failed")
+        moved = None
+        if self.failed_dir and os.path.exists(path):
+            moved = _move(path, self._relative_dir(path, self.failed_dir))
+        else:
+            self.handled[path] = identity  # 文件再次变化后重试
+        self._emit("failed", path=path, moved_to=moved, elapsed=round(time.time() - started, 3))